@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Local stand-in for the vCenter calls used by the post-boot configuration
+
+Emulates vCenter connect, VM lookup by UUID, power/VMware Tools state transitions after power on and reboot,
+guest operations (GuestOperationsUnavailable until the guest is ready) and the guest file transfer over a local
+HTTP PUT endpoint. All delays are configurable and every vCenter call is counted.
+
+Usage:
+    with FakeVCenter(tools_ready_delay=2, guest_operations_delay=3) as vcenter:
+        vm_uuid = vcenter.add_vm()
+        operation = PostBootVMConfigureOperation(..., vcenter_service=vcenter.service)
+"""
+
+from collections import Counter
+from datetime import datetime
+import threading
+import time
+import uuid
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+    from socketserver import ThreadingMixIn
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+    from SocketServer import ThreadingMixIn
+
+import pyVmomi
+
+
+GUEST_ID = "other3xLinux64Guest"
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _Namespace(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class FakeVM(object):
+    def __init__(self, vcenter, vm_uuid):
+        """VM which boots in the background, its state is derived from the time since the last (re)boot
+
+        :param FakeVCenter vcenter:
+        :param str vm_uuid:
+        """
+        self._vcenter = vcenter
+        self.uuid = vm_uuid
+        self.files = {}
+        self.programs = []
+        self._boot_time = time.time()
+        self._reboot_time = None
+
+    def _uptime(self):
+        """Seconds since the guest OS started booting, None while the guest is shutting down
+
+        :rtype: float
+        """
+        now = time.time()
+        if self._reboot_time is not None:
+            if now - self._reboot_time < self._vcenter.shutdown_delay:
+                return None
+            self._boot_time = self._reboot_time + self._vcenter.shutdown_delay
+            self._reboot_time = None
+
+        return now - self._boot_time
+
+    @property
+    def summary(self):
+        self._vcenter.count("VirtualMachine.summary")
+        return _Namespace(runtime=_Namespace(powerState=pyVmomi.vim.VirtualMachine.PowerState.poweredOn))
+
+    @property
+    def runtime(self):
+        self._vcenter.count("VirtualMachine.runtime")
+        self._uptime()
+        return _Namespace(host=_Namespace(_moId=self._vcenter.host_id),
+                          bootTime=datetime.fromtimestamp(self._boot_time))
+
+    @property
+    def guest(self):
+        self._vcenter.count("VirtualMachine.guest")
+        uptime = self._uptime()
+        if uptime is None:
+            # guest is still running after RebootGuest(), VMware Tools report it as before the reboot
+            uptime = self._reboot_time - self._boot_time
+        tools_ready = uptime >= self._vcenter.tools_ready_delay
+
+        if tools_ready:
+            return _Namespace(toolsStatus=pyVmomi.vim.VirtualMachineToolsStatus.toolsOk, guestId=GUEST_ID)
+
+        return _Namespace(toolsStatus=pyVmomi.vim.VirtualMachineToolsStatus.toolsNotRunning, guestId=None)
+
+    @property
+    def is_shutting_down(self):
+        """Guest is still running after RebootGuest()
+
+        :rtype: bool
+        """
+        return self._uptime() is None
+
+    @property
+    def guest_operations_ready(self):
+        """
+
+        :rtype: bool
+        """
+        uptime = self._uptime()
+        return uptime is not None and uptime >= self._vcenter.guest_operations_delay
+
+    def RebootGuest(self):
+        self._vcenter.count("VirtualMachine.RebootGuest")
+        self._vcenter.api_delay()
+        self._reboot_time = time.time()
+
+
+class FakeFileManager(object):
+    def __init__(self, vcenter):
+        """
+
+        :param FakeVCenter vcenter:
+        """
+        self._vcenter = vcenter
+
+    def InitiateFileTransferToGuest(self, vm, auth, guestFilePath, fileAttributes, fileSize, overwrite):
+        self._vcenter.count("FileManager.InitiateFileTransferToGuest")
+        self._vcenter.api_delay()
+        self._vcenter.check_guest_operations(vm)
+
+        return self._vcenter.register_upload(vm=vm, path=guestFilePath)
+
+
+class FakeProcessManager(object):
+    def __init__(self, vcenter):
+        """
+
+        :param FakeVCenter vcenter:
+        """
+        self._vcenter = vcenter
+
+    def StartProgramInGuest(self, vm, auth, spec):
+        self._vcenter.count("ProcessManager.StartProgramInGuest")
+        self._vcenter.api_delay()
+        self._vcenter.check_guest_operations(vm)
+        vm.programs.append((spec.programPath, spec.arguments))
+
+        return len(vm.programs)
+
+
+class FakeServiceInstance(object):
+    def __init__(self, vcenter):
+        """
+
+        :param FakeVCenter vcenter:
+        """
+        self._vcenter = vcenter
+        self.content = _Namespace(guestOperationsManager=_Namespace(fileManager=FakeFileManager(vcenter),
+                                                                    processManager=FakeProcessManager(vcenter)))
+
+    def RetrieveContent(self):
+        self._vcenter.count("ServiceInstance.RetrieveContent")
+        return self.content
+
+
+class FakeVCenterService(object):
+    def __init__(self, vcenter):
+        """Replacement of the pyVmomiService with the same connect/get_vm_by_uuid interface
+
+        :param FakeVCenter vcenter:
+        """
+        self._vcenter = vcenter
+
+    def connect(self, address, user, password, port=443):
+        self._vcenter.count("connect")
+        time.sleep(self._vcenter.connect_delay)
+        return FakeServiceInstance(self._vcenter)
+
+    def get_vm_by_uuid(self, si, vm_uuid):
+        self._vcenter.count("get_vm_by_uuid")
+        self._vcenter.api_delay()
+        return self._vcenter.vms.get(vm_uuid)
+
+
+class FakeVCenter(object):
+    def __init__(self, tools_ready_delay=1.0, guest_operations_delay=1.5, shutdown_delay=0.5, connect_delay=0.05,
+                 api_latency=0.01, address="127.0.0.1", host_id="host-1"):
+        """
+
+        :param float tools_ready_delay: seconds after (re)boot when VMware Tools become ready
+        :param float guest_operations_delay: seconds after (re)boot when guest operations become available
+        :param float shutdown_delay: seconds after RebootGuest() while the guest still looks running
+        :param float connect_delay: duration of the vCenter login
+        :param float api_latency: duration of each vCenter API call
+        :param str address: address of the file transfer HTTP endpoint
+        :param str host_id: managed object ID of the ESXi host all VMs run on
+        """
+        self.tools_ready_delay = tools_ready_delay
+        self.guest_operations_delay = guest_operations_delay
+        self.shutdown_delay = shutdown_delay
+        self.connect_delay = connect_delay
+        self.api_latency = api_latency
+        self.address = address
+        self.host_id = host_id
+        self.vms = {}
+        self.calls = Counter()
+        self.service = FakeVCenterService(self)
+
+        self._lock = threading.Lock()
+        self._uploads = {}
+        self._http_server = None
+
+    def count(self, call_name):
+        """
+
+        :param str call_name:
+        """
+        with self._lock:
+            self.calls[call_name] += 1
+
+    def api_delay(self):
+        if self.api_latency:
+            time.sleep(self.api_latency)
+
+    def check_guest_operations(self, vm):
+        """
+
+        :param FakeVM vm:
+        :raise pyVmomi.vim.fault.GuestOperationsUnavailable:
+        """
+        if not vm.guest_operations_ready:
+            self.count("GuestOperationsUnavailable")
+            raise pyVmomi.vim.fault.GuestOperationsUnavailable()
+
+    def add_vm(self):
+        """Power on a new VM, it starts booting immediately
+
+        :return: VM uuid
+        :rtype: str
+        """
+        vm_uuid = str(uuid.uuid4())
+        self.vms[vm_uuid] = FakeVM(vcenter=self, vm_uuid=vm_uuid)
+        return vm_uuid
+
+    def register_upload(self, vm, path):
+        """
+
+        :param FakeVM vm:
+        :param str path: file path in the guest
+        :return: URL for the HTTP PUT request
+        :rtype: str
+        """
+        token = uuid.uuid4().hex
+        with self._lock:
+            self._uploads[token] = (vm, path)
+
+        return "http://{}:{}/guestFile?id={}".format(self.address, self._http_server.server_address[1], token)
+
+    def complete_upload(self, token, data):
+        """
+
+        :param str token:
+        :param bytes data:
+        :rtype: bool
+        """
+        with self._lock:
+            upload = self._uploads.pop(token, None)
+
+        if upload is None:
+            return False
+
+        vm, path = upload
+        vm.files[path] = data
+        self.count("guestFile.PUT")
+        return True
+
+    def start(self):
+        vcenter = self
+
+        class FileTransferHandler(BaseHTTPRequestHandler):
+            def do_PUT(self):
+                data = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                token = self.path.rpartition("id=")[2]
+                self.send_response(200 if vcenter.complete_upload(token, data) else 404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+
+            def log_message(self, format, *args):
+                pass
+
+        self._http_server = _ThreadingHTTPServer((self.address, 0), FileTransferHandler)
+        thread = threading.Thread(target=self._http_server.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self._http_server.shutdown()
+        self._http_server.server_close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,402 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+In-process SSH server which emulates VyOS operational/configuration mode prompts
+
+Commands used by the shell (show interfaces, show configuration, load, commit, commit-confirm, save, set, delete,
+printf file uploads and vbash batch scripts) get scripted outputs. Latency per command and size of the outputs are
+configurable, so the CLI paths of the driver can be measured without a real device.
+
+Usage:
+    with FakeVyOSServer(latency={"commit": 0.5}, interfaces_count=8) as server:
+        ... connect to server.address:server.port with server.user/server.password ...
+"""
+
+import re
+import shlex
+import socket
+import threading
+import time
+
+import paramiko
+
+
+DEFAULT_USER = "vyos"
+DEFAULT_PASSWORD = "vyos"
+DEFAULT_HOSTNAME = "vyos"
+HOST_KEY_BITS = 2048
+
+NEW_LINE = "\r\n"
+INTERFACE_LINE = "{:<17}{:<34}{:<5}{}"
+CONFIG_BLOCK = (" interfaces {{\r\n     ethernet eth{index} {{\r\n         address 10.{hi}.{lo}.1/24\r\n"
+                "         description \"fake interface {index}\"\r\n     }}\r\n }}\r\n")
+
+WRITE_FILE_RE = re.compile(r"^printf '%s\\n' (.*) (>>?) (\S+)$")
+VBASH_RE = re.compile(r"^/bin/vbash\s+([^\s;]+)")
+ECHO_RE = re.compile(r"^echo '(.*)'$")
+GUARDED_COMMAND_RE = re.compile(r"^(.+?) \|\| \{ echo '(.*)'; exit 1; \}$")
+
+
+class _ServerInterface(paramiko.ServerInterface):
+    def __init__(self, user, password):
+        self._user = user
+        self._password = password
+        self.shell_requested = threading.Event()
+
+    def check_auth_password(self, username, password):
+        if username == self._user and password == self._password:
+            return paramiko.AUTH_SUCCESSFUL
+
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED_OPEN_FAILED
+
+    def check_channel_pty_request(self, channel, term, width, height, pixelwidth, pixelheight, modes):
+        return True
+
+    def check_channel_shell_request(self, channel):
+        self.shell_requested.set()
+        return True
+
+
+class FakeVyOSShell(object):
+    def __init__(self, server, channel):
+        """Emulation of one interactive VyOS session
+
+        :param FakeVyOSServer server:
+        :param paramiko.Channel channel:
+        """
+        self._server = server
+        self._channel = channel
+        self._config_mode = False
+        self._pending_confirm = None
+
+    @property
+    def prompt(self):
+        """
+
+        :rtype: str
+        """
+        if self._config_mode:
+            return "[edit]{}{}@{}# ".format(NEW_LINE, self._server.user, self._server.hostname)
+
+        return "{}@{}:~$ ".format(self._server.user, self._server.hostname)
+
+    def _send(self, data):
+        self._channel.sendall(data.encode("utf-8"))
+
+    def run(self):
+        """Read lines from the channel and answer them until the client disconnects"""
+        self._send("Welcome to VyOS{nl}{prompt}".format(nl=NEW_LINE, prompt=self.prompt))
+        buffer = ""
+
+        while True:
+            data = self._channel.recv(4096)
+            if not data:
+                return
+
+            buffer += data.decode("utf-8", "replace")
+
+            if "\x03" in buffer:
+                buffer = ""
+                self._send("^C{}{}".format(NEW_LINE, self.prompt))
+                continue
+
+            while True:
+                match = re.search(r"\r\n|\r|\n", buffer)
+                if match is None:
+                    break
+
+                line, buffer = buffer[:match.start()], buffer[match.end():]
+                self._send(line + NEW_LINE)
+                output = self.handle_line(line)
+                if output is not None:
+                    self._send(output)
+
+    def handle_line(self, line):
+        """
+
+        :param str line: received command line
+        :return: output with the next prompt, None if the shell waits for more input
+        :rtype: str
+        """
+        if self._pending_confirm is not None:
+            self._pending_confirm = None
+            if line.strip().lower() != "y":
+                return "commit-confirm canceled{}{}".format(NEW_LINE, self.prompt)
+            self._server.delay("commit")
+            return self.prompt
+
+        command = line.strip()
+        self._server.record(command)
+
+        write_file_match = WRITE_FILE_RE.match(command)
+        if write_file_match:
+            lines, redirect, file_path = write_file_match.groups()
+            if redirect == ">":
+                self._server.files[file_path] = []
+            self._server.files.setdefault(file_path, []).extend(shlex.split(lines))
+            return self.prompt
+
+        vbash_match = VBASH_RE.match(command)
+        if vbash_match:
+            return self._run_vbash(vbash_match.group(1)) + self.prompt
+
+        output = self._execute(command)
+        if output is None:
+            return None
+
+        return output + self.prompt
+
+    def _execute(self, command):
+        """
+
+        :param str command:
+        :return: output of the command without prompt, None if the shell waits for more input
+        :rtype: str
+        """
+        keyword = command.split(" ", 1)[0]
+        self._server.delay(keyword)
+
+        if not command:
+            return ""
+
+        if command == "configure":
+            self._config_mode = True
+            return ""
+
+        if command in ("exit", "exit discard"):
+            if self._config_mode:
+                self._config_mode = False
+                return "exit" + NEW_LINE
+            return ""
+
+        if command.startswith("show interfaces"):
+            return self._server.show_interfaces()
+
+        if command.startswith("show configuration"):
+            return self._server.show_configuration()
+
+        if command.startswith("show version"):
+            return "Version:          VyOS 1.1.8{nl}Description:      Fake VyOS{nl}".format(nl=NEW_LINE)
+
+        if keyword == "load":
+            return ("Loading configuration from '{}'...{nl}Load complete.  Use 'commit' to make changes active."
+                    "{nl}".format(command[len("load "):], nl=NEW_LINE))
+
+        if keyword == "save":
+            return "Saving configuration to '{}'...{nl}Done{nl}".format(
+                command[len("save "):] or "/config/config.boot", nl=NEW_LINE)
+
+        if keyword == "commit-confirm":
+            self._pending_confirm = command[len("commit-confirm "):]
+            self._send("commit confirm will automatically reboot in {} minutes unless confirmed{}"
+                       "Proceed? [confirm]".format(self._pending_confirm, NEW_LINE))
+            return None
+
+        if keyword in ("commit", "confirm", "set", "delete", "discard", "rm"):
+            return ""
+
+        return "{nl}  Invalid command: [{}]{nl}{nl}".format(command, nl=NEW_LINE)
+
+    def _run_vbash(self, file_path):
+        """Interpret batch script generated by the shell, only echo lines and guarded commands are supported
+
+        :param str file_path:
+        :rtype: str
+        """
+        output = []
+
+        for line in self._server.files.pop(file_path, []):
+            echo_match = ECHO_RE.match(line)
+            guarded_match = GUARDED_COMMAND_RE.match(line)
+
+            if echo_match:
+                output.append(echo_match.group(1) + NEW_LINE)
+            elif guarded_match:
+                command, failed_marker = guarded_match.groups()
+                self._server.record(command)
+                command_output = self._execute(command)
+                if self._server.is_failing(command):
+                    output.append("{} failed{}{}".format(command, NEW_LINE, failed_marker + NEW_LINE))
+                    break
+                output.append(command_output or "")
+            elif line.strip() in ("save", "commit"):
+                self._server.record(line.strip())
+                output.append(self._execute(line.strip()) or "")
+
+        self._config_mode = False
+        return "".join(output)
+
+
+class FakeVyOSServer(object):
+    def __init__(self, address="127.0.0.1", port=0, user=DEFAULT_USER, password=DEFAULT_PASSWORD,
+                 hostname=DEFAULT_HOSTNAME, latency=None, default_latency=0.0, interfaces_count=4,
+                 config_size=16 * 1024, failing_commands=None, host_key=None):
+        """
+
+        :param str address: address to listen on
+        :param int port: port to listen on, random free port if 0
+        :param str user:
+        :param str password:
+        :param str hostname: host name shown in the prompt
+        :param dict[str, float] latency: delay in seconds per command keyword, i.e. {"commit": 0.5, "load": 1}
+        :param float default_latency: delay for all other commands
+        :param int interfaces_count: number of ethernet interfaces in the 'show interfaces' output
+        :param int config_size: approximate size of the 'show configuration' output in bytes
+        :param list[str] failing_commands: regexps of the commands which fail inside batch scripts
+        :param paramiko.PKey host_key: host key, new RSA key is generated if not provided
+        """
+        self.address = address
+        self.port = port
+        self.user = user
+        self.password = password
+        self.hostname = hostname
+        self.latency = latency or {}
+        self.default_latency = default_latency
+        self.interfaces_count = interfaces_count
+        self.config_size = config_size
+        self.failing_commands = [re.compile(pattern) for pattern in failing_commands or []]
+        self.files = {}
+        self.commands = []
+        self.connections_count = 0
+
+        self._host_key = host_key or paramiko.RSAKey.generate(HOST_KEY_BITS)
+        self._lock = threading.Lock()
+        self._socket = None
+        self._stopped = threading.Event()
+        self._transports = []
+        self._accept_thread = None
+
+    def delay(self, keyword):
+        """
+
+        :param str keyword: first word of the command
+        """
+        delay = self.latency.get(keyword, self.default_latency)
+        if delay:
+            time.sleep(delay)
+
+    def record(self, command):
+        """
+
+        :param str command:
+        """
+        with self._lock:
+            self.commands.append(command)
+
+    def is_failing(self, command):
+        """
+
+        :param str command:
+        :rtype: bool
+        """
+        return any(pattern.search(command) for pattern in self.failing_commands)
+
+    def show_interfaces(self):
+        """
+
+        :rtype: str
+        """
+        lines = ["Codes: S - State, L - Link, u - Up, D - Down, A - Admin Down",
+                 INTERFACE_LINE.format("Interface", "IP Address", "S/L", "Description"),
+                 INTERFACE_LINE.format("---------", "----------", "---", "-----------")]
+
+        for index in range(self.interfaces_count):
+            lines.append(INTERFACE_LINE.format("eth{}".format(index),
+                                               "10.{}.{}.1/24".format(index // 256, index % 256),
+                                               "u/u",
+                                               "fake interface {}".format(index)))
+
+        lines.append(INTERFACE_LINE.format("lo", "127.0.0.1/8", "u/u", ""))
+
+        return NEW_LINE.join(lines) + NEW_LINE
+
+    def show_configuration(self):
+        """
+
+        :rtype: str
+        """
+        blocks = []
+        size = 0
+        index = 0
+
+        while size < self.config_size:
+            block = CONFIG_BLOCK.format(index=index, hi=index // 256 % 256, lo=index % 256)
+            blocks.append(block)
+            size += len(block)
+            index += 1
+
+        return "".join(blocks)
+
+    def _serve_connection(self, client_socket):
+        transport = paramiko.Transport(client_socket)
+        transport.add_server_key(self._host_key)
+
+        with self._lock:
+            self._transports.append(transport)
+            self.connections_count += 1
+
+        server_interface = _ServerInterface(user=self.user, password=self.password)
+
+        try:
+            transport.start_server(server=server_interface)
+            channel = transport.accept(timeout=30)
+            if channel is None or not server_interface.shell_requested.wait(30):
+                return
+
+            FakeVyOSShell(server=self, channel=channel).run()
+        except (EOFError, socket.error, paramiko.SSHException):
+            pass
+        finally:
+            transport.close()
+
+    def _accept_connections(self):
+        while not self._stopped.is_set():
+            try:
+                client_socket, _ = self._socket.accept()
+            except socket.error:
+                return
+
+            thread = threading.Thread(target=self._serve_connection, args=(client_socket,))
+            thread.daemon = True
+            thread.start()
+
+    def start(self):
+        """Start listening, actual port is available in the 'port' attribute afterwards"""
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((self.address, self.port))
+        self._socket.listen(100)
+        self.port = self._socket.getsockname()[1]
+
+        self._accept_thread = threading.Thread(target=self._accept_connections)
+        self._accept_thread.daemon = True
+        self._accept_thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        try:
+            self._socket.shutdown(socket.SHUT_RDWR)
+        except socket.error:
+            pass
+        self._socket.close()
+
+        with self._lock:
+            for transport in self._transports:
+                transport.close()
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Import time and resident memory of the driver entry points
+
+Each entry point is imported in a fresh interpreter, so the numbers match the cold start of the driver process.
+
+Usage: PYTHONPATH=src python benchmarks/import_cost.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+
+ENTRY_POINTS = [
+    ("driver module", ["driver"]),
+    ("CLI commands", ["driver", "vyos.cli.handler", "vyos.cli.session_pool", "vyos.runners.autoload",
+                      "vyos.runners.configuration", "cloudshell.devices.runners.run_command_runner"]),
+    ("vm_post_boot_configure", ["driver", "vyos.deployment.post_boot_vm_configure"]),
+]
+
+MEASURE_SCRIPT = """
+import importlib
+import json
+import resource
+import sys
+import time
+
+modules_before = len(sys.modules)
+start_time = time.time()
+for module_name in sys.argv[1:]:
+    importlib.import_module(module_name)
+import_time = time.time() - start_time
+
+max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+if sys.platform == "darwin":
+    max_rss //= 1024
+
+print(json.dumps({"import_time": import_time, "max_rss_kb": max_rss, "modules": len(sys.modules) - modules_before}))
+"""
+
+
+def measure(module_names):
+    """
+
+    :param list[str] module_names: modules to import
+    :rtype: dict
+    """
+    output = subprocess.check_output([sys.executable, "-c", MEASURE_SCRIPT] + module_names, env=os.environ)
+    return json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="number of measurements per entry point")
+    args = parser.parse_args()
+
+    print("{:<26}{:>16}{:>16}{:>12}".format("entry point", "import, ms", "max RSS, MB", "modules"))
+
+    for name, module_names in ENTRY_POINTS:
+        results = [measure(module_names) for _ in range(args.repeat)]
+        import_time = sorted(result["import_time"] for result in results)[len(results) // 2]
+        max_rss = sorted(result["max_rss_kb"] for result in results)[len(results) // 2]
+
+        print("{:<26}{:>16.1f}{:>16.1f}{:>12}".format(name, import_time * 1000, max_rss / 1024.0,
+                                                      results[0]["modules"]))
+
+
+if __name__ == "__main__":
+    main()
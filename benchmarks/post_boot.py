@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Post-boot configuration benchmark against the local vCenter stand-in
+
+Runs the same steps as the vm_post_boot_configure command (wait for VMware Tools, upload and run the clear NIC
+hardware id script, reboot, enable SSH) for N concurrent VMs. Reports wall-clock time-to-ready per VM and the
+number of vCenter calls, so polling intervals can be tuned and deployment latency regressions caught.
+
+Usage: PYTHONPATH=src python benchmarks/post_boot.py [--vms 1,8] [--tools-interval 1] [--guest-interval 1]
+                                                       [--tools-ready-delay 2] [--guest-operations-delay 3]
+                                                       [--max-time-to-ready 30] [--json results.json]
+"""
+
+import argparse
+import json
+import logging
+from multiprocessing.pool import ThreadPool
+import os
+import sys
+import time
+
+from fake_vcenter import FakeVCenter
+from vyos.configuration_attributes_structure import VyOSResource
+from vyos.deployment.post_boot_vm_configure import PostBootVMConfigureOperation
+
+
+SHELL_TYPE = "CS_GenericDeployedApp"
+SHELL_NAME = "Vyos"
+VCENTER_NAME = "vcenter"
+CLEAR_NIC_HW_ID_SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src",
+                                           "vyos", "vm_scripts", "clear-nic-hw-id.pl")
+
+
+class _Namespace(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class FakeCloudShellAPI(object):
+    def __init__(self, vm_uuids):
+        """Passwords are stored in plain text, deployed app resources are mapped to the VM uuids
+
+        :param dict[str, str] vm_uuids: resource full name -> VM uuid
+        """
+        self._vm_uuids = vm_uuids
+
+    def GetResourceDetails(self, resourceFullPath):
+        if resourceFullPath == VCENTER_NAME:
+            return _Namespace(Address="127.0.0.1",
+                              ResourceAttributes=[_Namespace(Name="User", Value="administrator"),
+                                                  _Namespace(Name="Password", Value="password")])
+
+        return _Namespace(VmDetails=_Namespace(UID=self._vm_uuids[resourceFullPath]))
+
+    def DecryptPassword(self, encrypted_string):
+        return _Namespace(Value=encrypted_string)
+
+
+def post_boot_configure(resource_config, cs_api, vcenter, logger, tools_interval, guest_interval):
+    """Same sequence of steps as in the vm_post_boot_configure driver command
+
+    :return: time-to-ready in seconds
+    :rtype: float
+    """
+    start_time = time.time()
+    operation = PostBootVMConfigureOperation(resource_config=resource_config,
+                                             cs_api=cs_api,
+                                             vcenter_name=VCENTER_NAME,
+                                             logger=logger,
+                                             vcenter_service=vcenter.service,
+                                             vm_tools_interval=tools_interval,
+                                             guest_operations_interval=guest_interval)
+    operation.wait_for_vm()
+    operation.apply_clear_nic_hw_id_script(script_path=CLEAR_NIC_HW_ID_SCRIPT_PATH)
+    operation.reboot_vm()
+    operation.enable_ssh()
+
+    return time.time() - start_time
+
+
+def run(vms_count, args, logger):
+    """
+
+    :param int vms_count: number of VMs configured concurrently
+    :param args: command line arguments
+    :param logging.Logger logger:
+    :rtype: dict
+    """
+    vcenter = FakeVCenter(tools_ready_delay=args.tools_ready_delay,
+                          guest_operations_delay=args.guest_operations_delay,
+                          shutdown_delay=args.shutdown_delay,
+                          api_latency=args.api_latency)
+
+    with vcenter:
+        resources = {}
+        for index in range(vms_count):
+            fullname = "vyos-{}".format(index)
+            resources[fullname] = vcenter.add_vm()
+
+        cs_api = FakeCloudShellAPI(vm_uuids=resources)
+
+        def configure(fullname):
+            resource_config = VyOSResource(address="NA",
+                                           shell_type=SHELL_TYPE,
+                                           shell_name=SHELL_NAME,
+                                           fullname=fullname,
+                                           name=fullname,
+                                           attributes={"{}.User".format(SHELL_NAME): "vyos",
+                                                       "{}.Password".format(SHELL_NAME): "vyos",
+                                                       "{}.Enable SSH".format(SHELL_NAME): "True"})
+            return post_boot_configure(resource_config=resource_config,
+                                       cs_api=cs_api,
+                                       vcenter=vcenter,
+                                       logger=logger,
+                                       tools_interval=args.tools_interval,
+                                       guest_interval=args.guest_interval)
+
+        pool = ThreadPool(vms_count)
+        start_time = time.time()
+        try:
+            times_to_ready = sorted(pool.map(configure, sorted(resources)))
+        finally:
+            pool.close()
+            pool.join()
+
+        wall_time = time.time() - start_time
+
+    return {"vms": vms_count,
+            "wall_time": round(wall_time, 3),
+            "time_to_ready_min": round(times_to_ready[0], 3),
+            "time_to_ready_median": round(times_to_ready[len(times_to_ready) // 2], 3),
+            "time_to_ready_max": round(times_to_ready[-1], 3),
+            "vcenter_calls": sum(vcenter.calls.values()),
+            "vcenter_calls_per_vm": round(float(sum(vcenter.calls.values())) / vms_count, 1),
+            "calls": dict(vcenter.calls)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vms", default="1,8", help="numbers of concurrently configured VMs")
+    parser.add_argument("--tools-interval", type=float, default=1, help="VMware Tools polling interval")
+    parser.add_argument("--guest-interval", type=float, default=1, help="guest operations retry interval")
+    parser.add_argument("--tools-ready-delay", type=float, default=2, help="seconds after boot to Tools ready")
+    parser.add_argument("--guest-operations-delay", type=float, default=3,
+                        help="seconds after boot to guest operations available")
+    parser.add_argument("--shutdown-delay", type=float, default=0.5, help="seconds from reboot to shutdown")
+    parser.add_argument("--api-latency", type=float, default=0.01, help="duration of each vCenter call")
+    parser.add_argument("--max-time-to-ready", type=float, help="exit with an error if any VM takes longer")
+    parser.add_argument("--json", help="file to write results to")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    logger = logging.getLogger("vyos-benchmark")
+
+    results = []
+    print("{:>5}{:>12}{:>14}{:>14}{:>14}{:>14}{:>12}".format(
+        "vms", "wall, s", "ready min, s", "ready med, s", "ready max, s", "vCenter calls", "calls/VM"))
+
+    for vms_count in [int(count) for count in args.vms.split(",")]:
+        result = run(vms_count=vms_count, args=args, logger=logger)
+        results.append(result)
+        print("{:>5}{:>12.3f}{:>14.3f}{:>14.3f}{:>14.3f}{:>14}{:>12.1f}".format(
+            vms_count, result["wall_time"], result["time_to_ready_min"], result["time_to_ready_median"],
+            result["time_to_ready_max"], result["vcenter_calls"], result["vcenter_calls_per_vm"]))
+        print("      calls: {}".format(", ".join("{}={}".format(name, count)
+                                                 for name, count in sorted(result["calls"].items()))))
+
+    if args.json:
+        with open(args.json, "w") as results_file:
+            json.dump(results, results_file, indent=2)
+
+    if args.max_time_to_ready is not None:
+        slowest = max(result["time_to_ready_max"] for result in results)
+        if slowest > args.max_time_to_ready:
+            print("Time-to-ready {:.3f} sec exceeds the limit of {} sec".format(slowest, args.max_time_to_ready))
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Throughput benchmark of the prompt detection on multi-megabyte outputs
+
+Emulates the CLI expect loop: output arrives in chunks and after each chunk the accumulated buffer is checked
+for the prompt. Compares legacy unanchored prompt, end-anchored prompt over the whole buffer (ExpectSession of
+cloudshell-cli) and end-anchored prompt over the new output and the tail of the checked one (VyOS sessions).
+
+Usage: PYTHONPATH=src python benchmarks/prompt_detection.py [--sizes 1,4,16] [--chunk-size 65536]
+"""
+
+import argparse
+import re
+import time
+
+from vyos.cli.prompt import build_default_prompt
+from vyos.cli.prompt import get_search_start
+
+
+LEGACY_PROMPT = r"\$"
+PROMPT = "vyos@vyos:~$ "
+OUTPUT_LINE = "eth0    192.168.1.1/24   u/u  description 'uplink $1 # primary'\r\n"
+
+
+def generate_output(size):
+    """
+
+    :param int size: output size in bytes
+    :rtype: str
+    """
+    return OUTPUT_LINE * (size // len(OUTPUT_LINE)) + PROMPT
+
+
+def run_expect_loop(output, chunk_size, search):
+    """
+
+    :param str output:
+    :param int chunk_size:
+    :param search: function(buffer, checked_size) -> bool
+    :return: scan time and number of bytes received before prompt was detected
+    :rtype: tuple[float, int]
+    """
+    buffer = ""
+    scan_time = 0.0
+
+    for position in range(0, len(output), chunk_size):
+        checked_size = len(buffer)
+        buffer += output[position:position + chunk_size]
+        start_time = time.time()
+        found = search(buffer, checked_size)
+        scan_time += time.time() - start_time
+        if found:
+            break
+
+    return scan_time, len(buffer)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1,4,16", help="output sizes in megabytes")
+    parser.add_argument("--chunk-size", type=int, default=64 * 1024, help="size of the received chunk")
+    args = parser.parse_args()
+
+    legacy_re = re.compile(LEGACY_PROMPT, re.DOTALL)
+    anchored_re = re.compile(build_default_prompt("vyos"))
+
+    strategies = [("legacy r'\\$'", lambda buf, checked: legacy_re.search(buf) is not None),
+                  ("anchored, full buffer", lambda buf, checked: anchored_re.search(buf) is not None),
+                  ("anchored, new output", lambda buf, checked: anchored_re.search(
+                      buf, get_search_start(buf, checked)) is not None)]
+
+    print("{:<24}{:>10}{:>14}{:>16}{:>14}".format("strategy", "size, MB", "scan time, s", "scan MB/s", "complete"))
+    for size in [int(size) for size in args.sizes.split(",")]:
+        output = generate_output(size * 1024 * 1024)
+        for name, search in strategies:
+            scan_time, received = run_expect_loop(output, args.chunk_size, search)
+            print("{:<24}{:>10}{:>14.4f}{:>16.1f}{:>14}".format(
+                name, size, scan_time, received / 1024.0 / 1024 / max(scan_time, 1e-9),
+                "yes" if received == len(output) else "early match"))
+
+
+if __name__ == "__main__":
+    main()
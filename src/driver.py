@@ -3,24 +3,22 @@ from datetime import timedelta
 from functools import wraps
 import json
 import os
+import threading
 import time
 
-from cloudshell.cli.session_manager_impl import SessionManagerException
 from cloudshell.core.context.error_handling_context import ErrorHandlingContext
-from cloudshell.devices.driver_helper import get_api
-from cloudshell.devices.driver_helper import get_cli
-from cloudshell.devices.driver_helper import get_logger_with_thread_id
-from cloudshell.devices.driver_helper import parse_custom_commands
 from cloudshell.shell.core.resource_driver_interface import ResourceDriverInterface
 from cloudshell.shell.core.driver_context import AutoLoadDetails
 from cloudshell.shell.core.driver_utils import GlobalLock
-from cloudshell.devices.runners.run_command_runner import RunCommandRunner as CommandRunner
+from cloudshell.shell.core.session.cloudshell_session import CloudShellSessionContext
+from cloudshell.shell.core.session.logging_session import LoggingSessionContext
 
-from vyos.cli.handler import VyOSCliHandler
+from vyos.autoload.cache import autoload_cache
 from vyos.configuration_attributes_structure import VyOSResource
-from vyos.deployment.post_boot_vm_configure import PostBootVMConfigureOperation
-from vyos.runners.configuration import VyOSConfigurationRunner
-from vyos.runners.autoload import VyOSAutoloadRunner
+from vyos.logging_utils import CoalescingLogger
+from vyos import metrics
+from vyos import profiling
+from vyos import tracing
 
 
 SHELL_TYPE = "CS_GenericDeployedApp"
@@ -29,36 +27,120 @@ SHELL_NAME = "Vyos"
 SSH_WAITING_TIMEOUT = 20 * 60
 SSH_WAITING_INTERVAL = 5 * 60
 
+PIPELINED_AUTOLOAD_WAITING_TIMEOUT = 20 * 60
+PIPELINED_SSH_PROBE_INTERVAL = 5
+
 CLEAR_NIC_HW_ID_SCRIPT_PATH = "vyos/vm_scripts/clear-nic-hw-id.pl"
 
+CLI_RETRIES = metrics.counter("vyos_cli_retries_total", "Retries of the CLI operations after session errors",
+                              ("operation",))
+LOCK_WAIT = metrics.histogram("vyos_lock_wait_seconds", "Time spent waiting for the driver global lock",
+                              ("command",))
+CLOUDSHELL_API_CALLS = metrics.counter("vyos_cloudshell_api_calls_total", "CloudShell API calls", ("method",))
+
+_lock_requests = threading.local()
+
+
+# get_logger_with_thread_id and parse_custom_commands are the same as in cloudshell.devices.driver_helper, which
+# imports cloudshell-cli and pysnmp at the module level
+
+
+def get_logger_with_thread_id(context):
+    """Get logger of the command context with the thread name
+
+    :param context: command context
+    :rtype: logging.Logger
+    """
+    logger = LoggingSessionContext.get_logger_for_context(context)
+    child = logger.getChild(threading.currentThread().name)
+    for handler in logger.handlers:
+        child.addHandler(handler)
+    child.level = logger.level
+    for log_filter in logger.filters:
+        child.addFilter(log_filter)
+    return child
+
+
+def parse_custom_commands(command, separator=";"):
+    """Parse run custom command string into the commands list
+
+    :param str command: run custom [config] command(s)
+    :param str separator: commands separator in the string
+    :rtype: list[str]
+    """
+    if not command:
+        return []
+
+    return command.strip(separator).split(separator)
+
+
+def get_api(context):
+    """Get CloudShell API session which counts its calls
+
+    :param context: command context
+    :rtype: cloudshell.api.cloudshell_api.CloudShellAPISession
+    """
+    return metrics.CallCounter(CloudShellSessionContext(context).get_api(), calls_counter=CLOUDSHELL_API_CALLS)
+
+
+def measured_lock(f):
+    """GlobalLock.lock which reports time spent waiting for the lock"""
+    @GlobalLock.lock
+    @wraps(f)
+    def locked(*args, **kwargs):
+        LOCK_WAIT.observe(time.time() - _lock_requests.requested_at, command=f.__name__)
+        return f(*args, **kwargs)
+
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        _lock_requests.requested_at = time.time()
+        return locked(*args, **kwargs)
+
+    return wrapper
+
 
 def unstable_ssh(f, timeout=SSH_WAITING_TIMEOUT, interval=SSH_WAITING_INTERVAL):
     @wraps(f)
     def wrapper(*args, **kwargs):
         timeout_time = datetime.now() + timedelta(seconds=timeout)
+        from cloudshell.cli.session_manager_impl import SessionManagerException
+
         logger = kwargs["logger"]
+        loop_logger = CoalescingLogger(logger)
+        attempt = 0
 
         while True:
-            logger.info("Trying to execute operation with CLI command(s)...")
+            if not attempt:
+                logger.info("Trying to execute operation with CLI command(s)...")
+            attempt += 1
 
             try:
-                return f(*args, **kwargs)
-            except SessionManagerException:  # note: it may catch CLI errors, unrelated to the connectivity
-                logger.info("Unable to get CLI session", exc_info=True)
+                with tracing.span("cli.attempt", operation=f.__name__, attempt=attempt):
+                    return f(*args, **kwargs)
+            except SessionManagerException as e:  # note: it may catch CLI errors, unrelated to the connectivity
+                loop_logger.report(str(e), "Unable to get CLI session for %s", f.__name__, exc_info=True)
+                CLI_RETRIES.inc(operation=f.__name__)
 
                 if datetime.now() > timeout_time:
                     raise Exception("Unable to get CLI session within {} minute(s)"
                                     .format(timeout / 60))
-            time.sleep(interval)
+
+            with tracing.span("cli.retry_sleep", operation=f.__name__, attempt=attempt, interval=interval):
+                time.sleep(interval)
 
     return wrapper
 
 
 class VyosDriver(ResourceDriverInterface, GlobalLock):
+    """Driver of the VyOS deployed app
+
+    Heavy dependencies are imported inside the commands: vCenter stack (pyVmomi, pyVim, cloudshell-cp-vcenter)
+    only by vm_post_boot_configure and CLI stack (cloudshell-cli, paramiko) only by the CLI commands,
+    so the driver process starts fast and doesn't load what the command doesn't need.
+    """
     def __init__(self):
         """Constructor must be without arguments, it is created with reflection at run time"""
         super(VyosDriver, self).__init__()
-        self._cli = None
 
     def initialize(self, context):
         """
@@ -70,9 +152,48 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                                                     shell_type=SHELL_TYPE,
                                                     shell_name=SHELL_NAME)
 
-        self._cli = get_cli(resource_config.sessions_concurrency_limit)
+        if resource_config.address and resource_config.address.upper() != "NA":
+            warm_up_thread = threading.Thread(target=self._warm_up_cli_sessions,
+                                              kwargs={"context": context, "resource_config": resource_config})
+            warm_up_thread.daemon = True
+            warm_up_thread.start()
+
         return "Finished initializing"
 
+    def _warm_up_cli_sessions(self, context, resource_config):
+        """Open CLI sessions to the device ahead of the first command, they are kept alive in the session pool
+
+        :param InitCommandContext context: the context the command runs on
+        :param VyOSResource resource_config:
+        """
+        logger = get_logger_with_thread_id(context)
+
+        try:
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=get_api(context), logger=logger)
+            cli_handler.warm_up(sessions_count=resource_config.sessions_concurrency_limit)
+        except Exception:
+            logger.debug("Unable to warm up CLI sessions", exc_info=True)
+
+    @staticmethod
+    def _get_cli_handler(resource_config, api, logger):
+        """Get CLI handler which uses the session pool shared between all commands to the resource
+
+        :param VyOSResource resource_config:
+        :param cloudshell.api.cloudshell_api.CloudShellAPISession api:
+        :param logging.Logger logger:
+        :rtype: vyos.cli.handler.VyOSCliHandler
+        """
+        from vyos.cli.handler import VyOSCliHandler
+        from vyos.cli.session_pool import get_pooled_cli
+        from vyos.cli.session_pool import get_resource_key
+
+        resource_key = get_resource_key(address=resource_config.address,
+                                        port=resource_config.cli_tcp_port,
+                                        user=resource_config.user)
+        cli = get_pooled_cli(resource_key=resource_key, max_pool_size=resource_config.sessions_concurrency_limit)
+
+        return VyOSCliHandler(cli=cli, resource_config=resource_config, api=api, logger=logger)
+
     def cleanup(self):
         """Destroy the driver session, this function is called everytime a driver instance is destroyed
 
@@ -90,6 +211,8 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
         :param logger:
         :return:
         """
+        from vyos.runners.configuration import VyOSConfigurationRunner
+
         configuration_operations = VyOSConfigurationRunner(cli_handler=cli_handler,
                                                            logger=logger,
                                                            resource_config=resource_config,
@@ -98,6 +221,40 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
         configuration_operations.restore(path=resource_config.config_file)
         logger.info('Load configuration flow completed')
 
+    @unstable_ssh
+    def _execute_run_command_flow(self, cli_handler, commands, config_mode, logger):
+        """
+
+        :param cli_handler:
+        :param list[str] commands:
+        :param bool config_mode: whether to execute commands in configuration mode
+        :param logger:
+        :return: commands output
+        :rtype: str
+        """
+        from cloudshell.devices.runners.run_command_runner import RunCommandRunner
+
+        send_command_operations = RunCommandRunner(logger=logger, cli_handler=cli_handler)
+
+        if config_mode:
+            return send_command_operations.run_custom_config_command(custom_command=commands)
+
+        return send_command_operations.run_custom_command(custom_command=commands)
+
+    @unstable_ssh
+    def _execute_stream_command_flow(self, cli_handler, commands, logger):
+        """
+
+        :param cli_handler:
+        :param list[str] commands:
+        :param logger:
+        :return: output summaries
+        :rtype: list[str]
+        """
+        from vyos.flows.stream_command import VyOSStreamCommandFlow
+
+        return VyOSStreamCommandFlow(cli_handler=cli_handler, logger=logger).execute_flow(commands=commands)
+
     @unstable_ssh
     def _execute_autoload_flow(self, resource_config, cli_handler, logger):
         """
@@ -107,6 +264,8 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
         :param logger:
         :return:
         """
+        from vyos.runners.autoload import VyOSAutoloadRunner
+
         autoload_runner = VyOSAutoloadRunner(cli_handler=cli_handler,
                                              logger=logger,
                                              resource_config=resource_config)
@@ -116,7 +275,10 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
 
         return autoload_details
 
-    @GlobalLock.lock
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    @measured_lock
     def get_inventory(self, context):
         """Discovers the resource structure and attributes.
 
@@ -137,21 +299,209 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                 logger.info("No IP configured, skipping Autoload")
                 return AutoLoadDetails([], [])
 
-            cli_handler = VyOSCliHandler(cli=self._cli,
-                                         resource_config=resource_config,
-                                         api=cs_api,
-                                         logger=logger)
+            if autoload_cache.is_pending(resource_config):
+                logger.info("Waiting for the autoload details being discovered after the post-boot reboot")
 
-            if resource_config.config_file:
-                self._execute_load_config_flow(resource_config=resource_config,
-                                               cli_handler=cli_handler,
-                                               cs_api=cs_api,
-                                               logger=logger)
+            autoload_details = autoload_cache.pop(resource_config, timeout=PIPELINED_AUTOLOAD_WAITING_TIMEOUT)
+            if autoload_details is not None:
+                logger.info("Autoload details were discovered ahead of time, device discovery skipped")
+                return autoload_details
 
-            return self._execute_autoload_flow(resource_config=resource_config,
-                                               cli_handler=cli_handler,
-                                               logger=logger)
+            return self._discover_resource(resource_config=resource_config, cs_api=cs_api, logger=logger)
+
+    def _discover_resource(self, resource_config, cs_api, logger):
+        """Load configuration file if needed and discover the resource
+
+        :param VyOSResource resource_config:
+        :param cloudshell.api.cloudshell_api.CloudShellAPISession cs_api:
+        :param logging.Logger logger:
+        :rtype: AutoLoadDetails
+        """
+        cli_handler = self._get_cli_handler(resource_config=resource_config, api=cs_api, logger=logger)
+
+        if resource_config.config_file:
+            self._execute_load_config_flow(resource_config=resource_config,
+                                           cli_handler=cli_handler,
+                                           cs_api=cs_api,
+                                           logger=logger)
+
+        return self._execute_autoload_flow(resource_config=resource_config,
+                                           cli_handler=cli_handler,
+                                           logger=logger)
+
+    @staticmethod
+    def _get_reservation_resources(cs_api, reservation_id):
+        """Get all VyOS deployed apps with IP address in the reservation
+
+        :param cloudshell.api.cloudshell_api.CloudShellAPISession cs_api:
+        :param str reservation_id:
+        :rtype: list[VyOSResource]
+        """
+        reservation = cs_api.GetReservationDetails(reservation_id).ReservationDescription
+        resource_configs = []
+
+        for resource in reservation.Resources:
+            if resource.ResourceModelName != SHELL_NAME:
+                continue
+
+            resource_config = VyOSResource.from_resource_details(resource_details=cs_api.GetResourceDetails(
+                resource.Name), shell_type=SHELL_TYPE, shell_name=SHELL_NAME)
+
+            if resource_config.address and resource_config.address.upper() != "NA":
+                resource_configs.append(resource_config)
+
+        return resource_configs
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def autoload_reservation_apps(self, context, max_workers=""):
+        """Discover all VyOS deployed apps of the reservation concurrently
+
+        Discovered details are kept for a while, so the following Autoload of each app returns them without
+        connecting to the device again
+
+        :param ResourceCommandContext context: the context the command runs on
+        :param str max_workers: max number of apps discovered at the same time
+        :return: JSON with the autoload details per app and the timing summary
+        :rtype: str
+        """
+        from vyos.autoload.bulk import BULK_AUTOLOAD_MAX_WORKERS
+        from vyos.autoload.bulk import discover_concurrently
+        from vyos.autoload.bulk import serialize_autoload_details
+
+        logger = get_logger_with_thread_id(context)
+        logger.info("Bulk autoload command started")
+
+        with ErrorHandlingContext(logger):
+            cs_api = get_api(context)
+            resource_configs = self._get_reservation_resources(cs_api=cs_api,
+                                                               reservation_id=context.reservation.reservation_id)
+            logger.info("Discovering {} VyOS app(s): {}".format(
+                len(resource_configs), ", ".join(resource_config.fullname for resource_config in resource_configs)))
+
+            def discover(resource_config):
+                autoload_details = self._discover_resource(resource_config=resource_config,
+                                                           cs_api=cs_api,
+                                                           logger=logger)
+                autoload_cache.put(resource_config, autoload_details)
+                return autoload_details
+
+            results, summary = discover_concurrently(resource_configs=resource_configs,
+                                                     discover=discover,
+                                                     logger=logger,
+                                                     max_workers=int(max_workers or BULK_AUTOLOAD_MAX_WORKERS))
+            logger.info("Bulk autoload command completed. Summary: {}".format(summary))
+
+            for result in results:
+                if result["details"] is not None:
+                    result["details"] = serialize_autoload_details(result["details"])
+
+            return json.dumps({"results": results, "summary": summary})
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def check_reservation_health(self, context, check_auth="", run_command="", max_workers="", deadline=""):
+        """Check reachability and health of all VyOS deployed apps of the reservation concurrently
+
+        Each app is probed over TCP and its SSH banner is read, optionally SSH authentication is checked and
+        "show system uptime" is executed. Checks don't use the CLI sessions of the driver and are never retried.
+
+        :param ResourceCommandContext context: the context the command runs on
+        :param str check_auth: "True" to check SSH authentication
+        :param str run_command: "True" to execute "show system uptime" (implies check_auth)
+        :param str max_workers: max number of apps checked at the same time
+        :param str deadline: max number of seconds for the check of each app
+        :return: status table
+        :rtype: str
+        """
+        from vyos import health
+
+        logger = get_logger_with_thread_id(context)
+        logger.info("Health check command started")
+
+        with ErrorHandlingContext(logger):
+            cs_api = get_api(context)
+            check_auth = str(check_auth).lower() == "true"
+            command = health.UPTIME_COMMAND if str(run_command).lower() == "true" else None
+            resource_configs = self._get_reservation_resources(cs_api=cs_api,
+                                                               reservation_id=context.reservation.reservation_id)
+            targets = []
+
+            for resource_config in resource_configs:
+                password = None
+                if (check_auth or command) and resource_config.password:
+                    password = cs_api.DecryptPassword(resource_config.password).Value
+
+                targets.append(health.HealthTarget(resource=resource_config.fullname,
+                                                   address=resource_config.address,
+                                                   port=resource_config.cli_tcp_port,
+                                                   user=resource_config.user,
+                                                   password=password))
+
+            results, summary = health.sweep(targets=targets,
+                                            max_workers=int(max_workers or health.HEALTH_CHECK_MAX_WORKERS),
+                                            deadline=float(deadline or health.HEALTH_CHECK_DEADLINE),
+                                            auth=check_auth,
+                                            command=command)
+            logger.info("Health check command completed. Summary: {}".format(summary))
+
+            return health.format_table(results=results, summary=summary)
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def check_configuration_drift(self, context, spread_window="", max_workers=""):
+        """Check whether VyOS deployed apps of the reservation drifted from their Configuration File
+
+        Only digests of the configurations are compared, the running configuration is read and the diff is built
+        only for the drifted apps. The command is cheap enough to be scheduled periodically.
+
+        :param ResourceCommandContext context: the context the command runs on
+        :param str spread_window: seconds to spread the app checks over, i.e. the period of the scheduled checks
+        :param str max_workers: max number of apps waiting for their turn at the same time
+        :return: JSON with the drift details per app and the summary
+        :rtype: str
+        """
+        from vyos.drift import baseline_cache
+        from vyos.drift import drift_scheduler
+        from vyos.drift import DRIFT_MAX_WORKERS
+        from vyos.file_transfer.clients import download_file
+        from vyos.flows.drift import VyOSDriftDetectionFlow
+
+        logger = get_logger_with_thread_id(context)
+        logger.info("Configuration drift command started")
 
+        with ErrorHandlingContext(logger):
+            cs_api = get_api(context)
+            resource_configs = [resource_config for resource_config in self._get_reservation_resources(
+                cs_api=cs_api, reservation_id=context.reservation.reservation_id) if resource_config.config_file]
+            logger.info("Checking configuration drift of {} VyOS app(s): {}".format(
+                len(resource_configs), ", ".join(resource_config.fullname for resource_config in resource_configs)))
+
+            def check(resource_config):
+                baseline, baseline_digest = baseline_cache.get(url=resource_config.config_file,
+                                                               download=download_file)
+                cli_handler = self._get_cli_handler(resource_config=resource_config, api=cs_api, logger=logger)
+
+                return VyOSDriftDetectionFlow(cli_handler=cli_handler, logger=logger).execute_flow(
+                    baseline=baseline,
+                    baseline_digest=baseline_digest,
+                    baseline_name=resource_config.config_file)
+
+            results, summary = drift_scheduler.run(resource_configs=resource_configs,
+                                                   check=check,
+                                                   logger=logger,
+                                                   window=float(spread_window or 0),
+                                                   max_workers=int(max_workers or DRIFT_MAX_WORKERS))
+            logger.info("Configuration drift command completed. Summary: {}".format(summary))
+
+            return json.dumps({"results": results, "summary": summary})
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
     def vm_post_boot_configure(self, context):
         """Command that will be executed after VM cloning and powering on
 
@@ -170,6 +520,8 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
             app_request_data = json.loads(context.resource.app_context.app_request_json)
             vcenter_name = app_request_data["deploymentService"]["cloudProviderName"]
 
+            from vyos.deployment.post_boot_vm_configure import PostBootVMConfigureOperation
+
             vm_configure_operation = PostBootVMConfigureOperation(cs_api=cs_api,
                                                                   resource_config=resource_config,
                                                                   vcenter_name=vcenter_name,
@@ -186,7 +538,120 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
             if resource_config.enable_ssh:
                 vm_configure_operation.enable_ssh()
 
-    @unstable_ssh
+            if resource_config.pipelined_autoload:
+                self._start_pipelined_autoload(resource_config=resource_config,
+                                               address=vm_configure_operation.get_guest_ip_address(),
+                                               cs_api=cs_api,
+                                               logger=logger)
+
+    def _start_pipelined_autoload(self, resource_config, address, cs_api, logger):
+        """Load configuration file and discover the resource in the background as soon as SSH answers
+
+        The following get_inventory waits for the discovered details instead of connecting to the device again
+
+        :param VyOSResource resource_config:
+        :param str address: IP address of the rebooted VM
+        :param cloudshell.api.cloudshell_api.CloudShellAPISession cs_api:
+        :param logging.Logger logger:
+        """
+        from vyos.networking_utils import wait_for_ssh
+
+        if not address:
+            logger.info("VM IP address is unknown, pipelined autoload skipped")
+            return
+
+        resource_config = VyOSResource.get_cached(address=address,
+                                                  family=resource_config.family,
+                                                  shell_type=SHELL_TYPE,
+                                                  shell_name=SHELL_NAME,
+                                                  fullname=resource_config.fullname,
+                                                  name=resource_config.name,
+                                                  attributes=resource_config.attributes)
+        autoload_cache.start(resource_config)
+
+        def discover():
+            try:
+                if not wait_for_ssh(address=address,
+                                    port=resource_config.cli_tcp_port,
+                                    timeout=PIPELINED_AUTOLOAD_WAITING_TIMEOUT,
+                                    interval=PIPELINED_SSH_PROBE_INTERVAL):
+                    raise Exception("SSH isn't available on {} within {} minute(s)".format(
+                        address, PIPELINED_AUTOLOAD_WAITING_TIMEOUT / 60))
+
+                autoload_details = self._discover_resource(resource_config=resource_config,
+                                                           cs_api=cs_api,
+                                                           logger=logger)
+            except Exception:
+                logger.exception("Pipelined autoload of {} failed".format(resource_config.fullname))
+                autoload_cache.cancel(resource_config)
+            else:
+                autoload_cache.put(resource_config, autoload_details)
+                logger.info("Pipelined autoload of {} completed".format(resource_config.fullname))
+
+        logger.info("Starting pipelined autoload of {} on {}".format(resource_config.fullname, address))
+        thread = threading.Thread(target=discover, name="pipelined-autoload-{}".format(resource_config.fullname))
+        thread.daemon = True
+        thread.start()
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def ApplyConnectivityChanges(self, context, request):
+        """Add/remove VLANs of the VyOS apps, changes of each app are applied with a single commit
+
+        Actions are grouped per app, apps are configured in parallel
+
+        :param ResourceCommandContext context: the context the command runs on
+        :param str request: JSON request with the setVlan/removeVlan actions
+        :return: JSON response with the results per action
+        :rtype: str
+        """
+        from vyos import connectivity
+        from vyos.flows.connectivity import VyOSApplyConnectivityChangesFlow
+
+        logger = get_logger_with_thread_id(context)
+        logger.info("Apply connectivity changes command started with the request: {}".format(request))
+
+        with ErrorHandlingContext(logger):
+            api = get_api(context)
+            resource_config = VyOSResource.from_context(context=context,
+                                                        shell_type=SHELL_TYPE,
+                                                        shell_name=SHELL_NAME)
+            actions = connectivity.parse_request(request)
+            device_actions = []
+            action_results = []
+
+            for device, actions_group in connectivity.group_by_device(actions).items():
+                if device == resource_config.fullname:
+                    device_actions.append((resource_config, actions_group))
+                    continue
+
+                try:
+                    device_config = VyOSResource.from_resource_details(resource_details=api.GetResourceDetails(device),
+                                                                       shell_type=SHELL_TYPE,
+                                                                       shell_name=SHELL_NAME)
+                except Exception as e:
+                    logger.exception("Unable to get details of the '{}' device".format(device))
+                    action_results.extend(connectivity.build_action_result(action=action, success=False, message=str(e))
+                                          for action in actions_group)
+                    continue
+
+                device_actions.append((device_config, actions_group))
+
+            flow = VyOSApplyConnectivityChangesFlow(
+                get_cli_handler=lambda config: self._get_cli_handler(resource_config=config, api=api, logger=logger),
+                logger=logger)
+            action_results.extend(flow.execute_flow(device_actions=device_actions))
+
+            order = dict((action.action_id, index) for index, action in enumerate(actions))
+            action_results.sort(key=lambda result: order[result["actionId"]])
+            logger.info("Apply connectivity changes command completed")
+
+            return connectivity.build_response(action_results)
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
     def run_custom_command(self, context, custom_command):
         """Send custom command
 
@@ -203,17 +668,45 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                                                         shell_type=SHELL_TYPE,
                                                         shell_name=SHELL_NAME)
 
-            cli_handler = VyOSCliHandler(cli=self._cli,
-                                         resource_config=resource_config,
-                                         api=cs_api,
-                                         logger=logger)
-            send_command_operations = CommandRunner(logger=logger, cli_handler=cli_handler)
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
 
-            response = send_command_operations.run_custom_command(custom_command=parse_custom_commands(custom_command))
-
-            return response
+            return self._execute_run_command_flow(cli_handler=cli_handler,
+                                                  commands=parse_custom_commands(custom_command),
+                                                  config_mode=False,
+                                                  logger=logger)
         
-    @unstable_ssh
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def run_custom_command_streamed(self, context, custom_command):
+        """Send custom command with its output streamed from the device by chunks
+
+        Full output of each command is written to a spool file on the Execution Server, large outputs are returned
+        truncated to their head and tail with a reference to that file
+
+        :param ResourceCommandContext context: ResourceCommandContext object with all Resource Attributes inside
+        :param str custom_command: commands separated with ';'
+        :return: output summaries
+        :rtype: str
+        """
+        logger = get_logger_with_thread_id(context)
+
+        with ErrorHandlingContext(logger):
+            api = get_api(context)
+            resource_config = VyOSResource.from_context(context=context,
+                                                        shell_type=SHELL_TYPE,
+                                                        shell_name=SHELL_NAME)
+
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
+            summaries = self._execute_stream_command_flow(cli_handler=cli_handler,
+                                                          commands=parse_custom_commands(custom_command),
+                                                          logger=logger)
+
+            return "\n".join(summaries)
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
     def run_custom_config_command(self, context, custom_command):
         """Send custom command in configuration mode
 
@@ -229,23 +722,86 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                                                         shell_type=SHELL_TYPE,
                                                         shell_name=SHELL_NAME)
 
-            cli_handler = VyOSCliHandler(cli=self._cli,
-                                         resource_config=resource_config,
-                                         api=cs_api,
-                                         logger=logger)
-            send_command_operations = CommandRunner(logger=logger, cli_handler=cli_handler)
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
+
+            return self._execute_run_command_flow(cli_handler=cli_handler,
+                                                  commands=parse_custom_commands(custom_command),
+                                                  config_mode=True,
+                                                  logger=logger)
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def run_custom_config_batch_command(self, context, custom_command):
+        """Send batch of configuration commands with a single commit
+
+        Commands are streamed to the device as a vbash script and executed in one configuration session,
+        execution stops on the first failed command without committing any changes
+
+        :param ResourceCommandContext context: ResourceCommandContext object with all Resource Attributes inside
+        :param str custom_command: configuration commands separated with ';' or new lines
+        :return: output per command
+        :rtype: str
+        """
+        logger = get_logger_with_thread_id(context)
+        with ErrorHandlingContext(logger):
+            api = get_api(context)
+            resource_config = VyOSResource.from_context(context=context,
+                                                        shell_type=SHELL_TYPE,
+                                                        shell_name=SHELL_NAME)
+
+            from vyos.flows.run_config_batch import VyOSRunConfigBatchFlow
+
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
+
+            commands = [command for line in parse_custom_commands(custom_command) for command in line.splitlines()]
+            results = VyOSRunConfigBatchFlow(cli_handler=cli_handler, logger=logger).execute_flow(commands=commands)
+
+            return "\n".join("{}\n{}".format(result["command"], result["output"]).strip() for result in results)
 
-            response = send_command_operations.run_custom_config_command(
-                custom_command=parse_custom_commands(custom_command))
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    def run_custom_config_transaction(self, context, custom_command, commit_confirm_minutes=""):
+        """Apply 'set'/'delete' commands as one transaction with a single commit
 
-            return response
-    
+        :param ResourceCommandContext context: ResourceCommandContext object with all Resource Attributes inside
+        :param str custom_command: 'set ...' and 'delete ...' commands separated with ';' or new lines
+        :param str commit_confirm_minutes: if specified, changes are committed with 'commit-confirm' and confirmed
+            automatically once the SSH server of the management address answers, otherwise device rolls them back
+        :rtype: str
+        """
+        logger = get_logger_with_thread_id(context)
+        with ErrorHandlingContext(logger):
+            api = get_api(context)
+            resource_config = VyOSResource.from_context(context=context,
+                                                        shell_type=SHELL_TYPE,
+                                                        shell_name=SHELL_NAME)
+
+            from vyos.flows.config_transaction import VyOSConfigTransactionFlow
+
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
+
+            commands = [command for line in parse_custom_commands(custom_command) for command in line.splitlines()]
+            confirm_minutes = int(commit_confirm_minutes) if commit_confirm_minutes else None
+
+            VyOSConfigTransactionFlow(cli_handler=cli_handler,
+                                      resource_config=resource_config,
+                                      logger=logger).execute_flow(commands=commands, confirm_minutes=confirm_minutes)
+
+            return "Configuration transaction with {} command(s) was committed".format(len(commands))
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
     def save(self, context, folder_path):
         """Save selected file to the provided destination
 
         :param ResourceCommandContext context: ResourceCommandContext object with all Resource Attributes inside
-        :param folder_path: destination path where file will be saved
-        :return str saved configuration file name:
+        :param folder_path: destination path where file will be saved. Several URLs could be separated with
+            ',' or ';', in that case running configuration is read from the device once and uploaded to all of
+            them in parallel
+        :return str saved configuration file name or JSON with results per destination:
         """
         logger = get_logger_with_thread_id(context)
         logger.info("Save configuration")
@@ -256,21 +812,37 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                                                         shell_name=SHELL_NAME)
 
             api = get_api(context)
-            cli_handler = VyOSCliHandler(cli=self._cli,
-                                         resource_config=resource_config,
-                                         api=api,
-                                         logger=logger)
+            from vyos.file_transfer.clients import split_destinations
+            from vyos.runners.configuration import VyOSConfigurationRunner
+
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
 
             configuration_operations = VyOSConfigurationRunner(cli_handler=cli_handler,
                                                                logger=logger,
                                                                resource_config=resource_config,
                                                                api=api)
-            logger.info("Save started")
-            response = configuration_operations.save(folder_path=folder_path)
-            logger.info("Save completed")
-            return response
+            folder_paths = split_destinations(folder_path)
 
-    @GlobalLock.lock
+            if len(folder_paths) <= 1:
+                logger.info("Save started")
+                response = configuration_operations.save(folder_path=next(iter(folder_paths), folder_path))
+                logger.info("Save completed")
+                return response
+
+            logger.info("Save to {} destinations started".format(len(folder_paths)))
+            file_name, results = configuration_operations.save_to_destinations(folder_paths=folder_paths)
+            logger.info("Save to {} destinations completed. Results: {}".format(len(folder_paths), results))
+
+            if not any(result["success"] for result in results):
+                raise Exception("Failed to save configuration to any of the destinations: {}".format(
+                    ", ".join("{} ({})".format(result["destination"], result["error"]) for result in results)))
+
+            return json.dumps({"file_name": file_name, "results": results})
+
+    @profiling.profiled_command
+    @tracing.traced_command
+    @metrics.measured_command
+    @measured_lock
     def restore(self, context, path):
         """Restore selected file to the provided destination
 
@@ -288,10 +860,9 @@ class VyosDriver(ResourceDriverInterface, GlobalLock):
                                                         shell_name=SHELL_NAME)
 
             api = get_api(context)
-            cli_handler = VyOSCliHandler(cli=self._cli,
-                                         resource_config=resource_config,
-                                         api=api,
-                                         logger=logger)
+            from vyos.runners.configuration import VyOSConfigurationRunner
+
+            cli_handler = self._get_cli_handler(resource_config=resource_config, api=api, logger=logger)
 
             configuration_operations = VyOSConfigurationRunner(cli_handler=cli_handler,
                                                                logger=logger,
@@ -365,7 +936,7 @@ if __name__ == "__main__":
     path = "http://192.168.41.65/vyosconfig.txt"
 
     # print dr.get_inventory(context=context)
-    print dr.vm_post_boot_configure(context=context)
+    print(dr.vm_post_boot_configure(context=context))
         # dr.save(context=context,
         #         folder_path=folder_path)
 
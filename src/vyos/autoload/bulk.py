@@ -0,0 +1,68 @@
+from multiprocessing.pool import ThreadPool
+import time
+
+
+BULK_AUTOLOAD_MAX_WORKERS = 8
+
+
+def serialize_autoload_details(autoload_details):
+    """
+
+    :param cloudshell.shell.core.driver_context.AutoLoadDetails autoload_details:
+    :rtype: dict
+    """
+    return {"resources": [{"model": resource.model,
+                           "name": resource.name,
+                           "relative_address": resource.relative_address,
+                           "unique_identifier": resource.unique_identifier}
+                          for resource in autoload_details.resources],
+            "attributes": [{"relative_address": attribute.relative_address,
+                            "attribute_name": attribute.attribute_name,
+                            "attribute_value": attribute.attribute_value}
+                           for attribute in autoload_details.attributes]}
+
+
+def discover_concurrently(resource_configs, discover, logger, max_workers=BULK_AUTOLOAD_MAX_WORKERS):
+    """Discover resources in parallel with a bounded number of workers
+
+    :param list[vyos.configuration_attributes_structure.VyOSResource] resource_configs:
+    :param discover: function(resource_config) -> AutoLoadDetails
+    :param logging.Logger logger:
+    :param int max_workers: max number of resources discovered at the same time
+    :return: results per resource and summary
+    :rtype: tuple[list[dict], dict]
+    """
+    def discover_resource(resource_config):
+        start_time = time.time()
+        result = {"resource": resource_config.fullname, "success": True, "error": None, "details": None}
+
+        try:
+            result["details"] = discover(resource_config)
+        except Exception as e:
+            logger.exception("Failed to discover resource '{}'".format(resource_config.fullname))
+            result.update(success=False, error=str(e))
+
+        result["duration"] = round(time.time() - start_time, 3)
+        return result
+
+    start_time = time.time()
+    results = []
+
+    if resource_configs:
+        pool = ThreadPool(max(min(max_workers, len(resource_configs)), 1))
+        try:
+            results = pool.map(discover_resource, resource_configs)
+        finally:
+            pool.close()
+            pool.join()
+
+    slowest = max(results, key=lambda result: result["duration"]) if results else None
+    summary = {"resources": len(results),
+               "succeeded": len([result for result in results if result["success"]]),
+               "failed": len([result for result in results if not result["success"]]),
+               "wall_time": round(time.time() - start_time, 3),
+               "sum_of_durations": round(sum(result["duration"] for result in results), 3),
+               "slowest_resource": slowest["resource"] if slowest else None,
+               "slowest_duration": slowest["duration"] if slowest else None}
+
+    return results, summary
@@ -0,0 +1,99 @@
+import threading
+import time
+
+
+AUTOLOAD_CACHE_TTL = 10 * 60
+
+
+class AutoloadCache(object):
+    def __init__(self, ttl=AUTOLOAD_CACHE_TTL):
+        """In-process cache of the discovered autoload details
+
+        Details discovered ahead of time (i.e. by the reservation-wide bulk autoload or by the pipelined post-boot
+        configuration) are consumed by the next get_inventory call of the same resource, so the device isn't
+        discovered twice
+
+        :param int ttl: seconds the details stay valid
+        """
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._details = {}
+        self._pending = {}
+
+    @staticmethod
+    def _get_key(resource_config):
+        """
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        :rtype: tuple[str, str]
+        """
+        return resource_config.fullname, resource_config.address
+
+    def start(self, resource_config):
+        """Mark that details of the resource are being discovered in the background
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        """
+        with self._lock:
+            self._pending.setdefault(self._get_key(resource_config), threading.Event())
+
+    def cancel(self, resource_config):
+        """Background discovery of the resource failed, get_inventory has to discover it by itself
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        """
+        with self._lock:
+            event = self._pending.pop(self._get_key(resource_config), None)
+
+        if event is not None:
+            event.set()
+
+    def is_pending(self, resource_config):
+        """
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        :rtype: bool
+        """
+        with self._lock:
+            return self._get_key(resource_config) in self._pending
+
+    def put(self, resource_config, autoload_details):
+        """
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        :param cloudshell.shell.core.driver_context.AutoLoadDetails autoload_details:
+        """
+        key = self._get_key(resource_config)
+
+        with self._lock:
+            self._details[key] = (time.time() + self._ttl, autoload_details)
+            event = self._pending.pop(key, None)
+
+        if event is not None:
+            event.set()
+
+    def pop(self, resource_config, timeout=0):
+        """Get and remove details of the resource if they are not expired
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        :param float timeout: time to wait for the details which are being discovered in the background
+        :rtype: cloudshell.shell.core.driver_context.AutoLoadDetails
+        """
+        key = self._get_key(resource_config)
+
+        with self._lock:
+            event = self._pending.get(key)
+
+        if event is not None and timeout:
+            event.wait(timeout)
+
+        with self._lock:
+            expires_at, autoload_details = self._details.pop(key, (0, None))
+
+        if expires_at < time.time():
+            return None
+
+        return autoload_details
+
+
+autoload_cache = AutoloadCache()
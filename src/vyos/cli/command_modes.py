@@ -1,8 +1,11 @@
 from cloudshell.cli.command_mode import CommandMode
 
+from vyos.cli.prompt import build_config_prompt
+from vyos.cli.prompt import build_default_prompt
+
 
 class DefaultCommandMode(CommandMode):
-    PROMPT = r'\$'
+    PROMPT = build_default_prompt()
     ENTER_COMMAND = ''
     EXIT_COMMAND = '\x03'
 
@@ -11,9 +14,16 @@ class DefaultCommandMode(CommandMode):
                                                  DefaultCommandMode.ENTER_COMMAND,
                                                  DefaultCommandMode.EXIT_COMMAND)
 
+    def set_user(self, user):
+        """Narrow the prompt down to the login user of the session
+
+        :param str user:
+        """
+        self.prompt = build_default_prompt(user)
+
 
 class ConfigCommandMode(CommandMode):
-    PROMPT = r'#'
+    PROMPT = build_config_prompt()
     ENTER_COMMAND = 'configure'
     EXIT_COMMAND = 'exit'
 
@@ -22,6 +32,13 @@ class ConfigCommandMode(CommandMode):
                                                 ConfigCommandMode.ENTER_COMMAND,
                                                 ConfigCommandMode.EXIT_COMMAND)
 
+    def set_user(self, user):
+        """Narrow the prompt down to the login user of the session
+
+        :param str user:
+        """
+        self.prompt = build_config_prompt(user)
+
 
 CommandMode.RELATIONS_DICT = {
     DefaultCommandMode: {
@@ -0,0 +1,15 @@
+from cloudshell.cli.command_template.command_template_executor import CommandTemplateExecutor
+
+from vyos import tracing
+
+
+class VyOSCommandTemplateExecutor(CommandTemplateExecutor):
+    def execute_command(self, **command_kwargs):
+        """Execute command and trace it as a separate phase
+
+        Only the command template is added to the span, formatted command may contain credentials
+        """
+        command_template = getattr(self._command_template, "_command", None)
+
+        with tracing.span("cli.command", command=command_template):
+            return super(VyOSCommandTemplateExecutor, self).execute_command(**command_kwargs)
@@ -32,4 +32,39 @@ LOAD_CONFIGURATION = CommandTemplate("load {source_file_path}", error_map=prepar
 COMMIT = CommandTemplate("commit", error_map=prepare_error_map(
     error_map=OrderedDict((("[Cc]ommit failed", "Failed to commit changes. Please check your configuration file"),))))
 
+COMMIT_CONFIRM = CommandTemplate("commit-confirm {minutes}",
+                                 action_map=OrderedDict(((r"[Pp]roceed\?",
+                                                          lambda session, logger: session.send_line("y", logger)),)),
+                                 error_map=prepare_error_map(error_map=OrderedDict((
+                                     ("[Cc]ommit failed", "Failed to commit changes. Please check your configuration"),
+                                 ))))
+
+CONFIRM = CommandTemplate("confirm", error_map=prepare_error_map())
+
+DISCARD = CommandTemplate("discard", error_map=prepare_error_map())
+
+SET_CONFIGURATION = CommandTemplate("set {path}", error_map=prepare_error_map(
+    error_map=OrderedDict((("[Ss]et failed", "Failed to set configuration node"),
+                           ("is not valid", "Configuration path is not valid")))))
+
+DELETE_CONFIGURATION = CommandTemplate("delete {path}", error_map=prepare_error_map(
+    error_map=OrderedDict((("[Dd]elete failed", "Failed to delete configuration node"),
+                           ("[Nn]othing to delete", "Configuration node doesn't exist")))))
+
 SHOW_INTERFACES = CommandTemplate("show interfaces", error_map=prepare_error_map())
+
+SHOW_CONFIGURATION = CommandTemplate("show configuration | no-more", error_map=prepare_error_map())
+
+SHOW_CONFIGURATION_DIGEST = CommandTemplate("show configuration | {pipeline}", error_map=prepare_error_map())
+
+# arguments are shell-quoted lines, error map is set per file path: the echoed lines may contain "error:"
+WRITE_FILE_LINES = CommandTemplate(r"printf '%s\n' {lines} {redirect} {file_path}")
+
+EXECUTE_VBASH_SCRIPT = CommandTemplate("/bin/vbash {file_path}; rm -f {file_path}")
+
+# exit status of the command and number of lines in its output are printed after the marker, i.e. "<marker>0:1500"
+REDIRECT_COMMAND_OUTPUT = CommandTemplate("{command} > {file_path} 2>&1; echo {marker}$?:$(wc -l < {file_path})")
+
+READ_FILE_LINES = CommandTemplate("sed -n '{first_line},{last_line}p' {file_path}")
+
+REMOVE_FILE = CommandTemplate("rm -f {file_path}")
@@ -1,11 +1,18 @@
+import threading
+
 from cloudshell.cli.command_mode_helper import CommandModeHelper
 from cloudshell.devices.cli_handler_impl import CliHandlerImpl
 
 from vyos.cli.command_modes import ConfigCommandMode
 from vyos.cli.command_modes import DefaultCommandMode
+from vyos.cli.sessions import VyOSSSHSession
+from vyos.cli.sessions import VyOSTelnetSession
+from vyos.cli import transcript
 
 
 class VyOSCliHandler(CliHandlerImpl):
+    WARM_UP_TIMEOUT = 60
+
     def __init__(self, cli, resource_config, logger, api):
         """
 
@@ -16,6 +23,11 @@ class VyOSCliHandler(CliHandlerImpl):
         """
         super(VyOSCliHandler, self).__init__(cli, resource_config, logger, api)
         self._modes = CommandModeHelper.create_command_mode()
+        self._resource_name = resource_config.fullname
+
+        if resource_config.user:
+            for mode in (self.default_mode, self.config_mode):
+                mode.set_user(resource_config.user)
 
     @property
     def default_mode(self):
@@ -28,3 +40,63 @@ class VyOSCliHandler(CliHandlerImpl):
     @property
     def enable_mode(self):
         return self.default_mode
+
+    @property
+    def resource_name(self):
+        return self._resource_name
+
+    def _ssh_session(self):
+        return VyOSSSHSession(self.resource_address, self.username, self.password, self.port, self.on_session_start)
+
+    def _telnet_session(self):
+        return VyOSTelnetSession(self.resource_address, self.username, self.password, self.port,
+                                 self.on_session_start)
+
+    def get_cli_service(self, command_mode):
+        """Get CLI service context manager, sessions are recorded if VYOS_TRANSCRIPT_DIR is set
+
+        :param cloudshell.cli.command_mode.CommandMode command_mode:
+        """
+        cli_service = super(VyOSCliHandler, self).get_cli_service(command_mode)
+        recorder = transcript.get_recorder()
+
+        if recorder is None:
+            return cli_service
+
+        return transcript.RecordingCliServiceContext(cli_service_context=cli_service,
+                                                     recorder=recorder,
+                                                     resource=self._resource_name,
+                                                     mode=type(command_mode).__name__)
+
+    def warm_up(self, sessions_count=1):
+        """Open sessions to the device in parallel and leave them idle in the session pool
+
+        :param int sessions_count: number of sessions to open
+        """
+        opened = []
+        lock = threading.Lock()
+        all_opened = threading.Event()
+
+        def open_session():
+            try:
+                with self.get_cli_service(self.default_mode):
+                    with lock:
+                        opened.append(True)
+                        if len(opened) == sessions_count:
+                            all_opened.set()
+                    all_opened.wait(self.WARM_UP_TIMEOUT)
+            except Exception:
+                self._logger.debug("Unable to open session during warm up", exc_info=True)
+                with lock:
+                    opened.append(False)
+                    if len(opened) == sessions_count:
+                        all_opened.set()
+
+        threads = [threading.Thread(target=open_session) for _ in range(sessions_count)]
+        for thread in threads:
+            thread.daemon = True
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self._logger.debug("Warmed up {} of {} session(s)".format(opened.count(True), sessions_count))
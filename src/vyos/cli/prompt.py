@@ -0,0 +1,66 @@
+import re
+
+
+USER_PATTERN = r"[\w.-]+"
+HOST_PATTERN = r"[\w.-]+"
+
+# Prompts are anchored to the end of the buffer with "$" and have no inline flags: cloudshell-cli searches for them
+# in the output (re.DOTALL) and also removes them from the output with re.sub(r'^.*{prompt}.*$', '', output,
+# flags=re.MULTILINE), so a pattern spanning from the start of the buffer would remove the whole output.
+# VyOS sessions (vyos.cli.sessions) search each read only from get_search_start(), so the cost of the prompt
+# detection doesn't depend on the output size
+DEFAULT_PROMPT_TEMPLATE = r"{user}@{host}:[^\n$#]*\$\s*$"
+CONFIG_PROMPT_TEMPLATE = r"\[edit[^\n]*\]\s*\n{user}@{host}#\s*$"
+
+PROMPT_TAIL_SIZE = 1024
+
+
+def build_default_prompt(user=None):
+    """Operational mode prompt, i.e. 'vyos@vyos:~$ '
+
+    :param str user: login user, generic pattern is used if not provided
+    :rtype: str
+    """
+    return DEFAULT_PROMPT_TEMPLATE.format(user=re.escape(user) if user else USER_PATTERN, host=HOST_PATTERN)
+
+
+def build_config_prompt(user=None):
+    """Configuration mode prompt, i.e. '[edit]\\nvyos@vyos# '
+
+    :param str user: login user, generic pattern is used if not provided
+    :rtype: str
+    """
+    return CONFIG_PROMPT_TEMPLATE.format(user=re.escape(user) if user else USER_PATTERN, host=HOST_PATTERN)
+
+
+PROMPT_RE = re.compile("|".join("(?:{})".format(prompt) for prompt in (build_default_prompt(),
+                                                                       build_config_prompt())))
+
+
+def get_search_start(buffer, checked_size, tail_size=PROMPT_TAIL_SIZE):
+    """Get position to search the buffer for the prompt from, the part checked before is skipped except its tail
+
+    Position is moved back to the start of its line (not further than tail_size), so the prompt split between
+    the reads is matched as a whole
+
+    :param str buffer: accumulated output
+    :param int checked_size: size of the buffer that was already searched
+    :param int tail_size: number of the last checked characters to search again
+    :rtype: int
+    """
+    start = max(0, checked_size - tail_size)
+    if not start:
+        return 0
+
+    line_start = buffer.rfind("\n", max(0, start - tail_size), start)
+    return line_start + 1 if line_start >= 0 else start
+
+
+def remove_prompt(output):
+    """Remove the prompt (operational or configuration mode of any user) that ends the output
+
+    :param str output:
+    :rtype: str
+    """
+    match = PROMPT_RE.search(output, get_search_start(output, len(output)))
+    return output[:match.start()] if match else output
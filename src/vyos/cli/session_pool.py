@@ -0,0 +1,315 @@
+import logging
+import threading
+import time
+
+from cloudshell.cli.cli import CLI
+from cloudshell.cli.session_manager_impl import SessionManagerImpl
+from cloudshell.cli.session_pool_manager import SessionPoolException
+from cloudshell.cli.session_pool_manager import SessionPoolManager
+
+from vyos import metrics
+from vyos import tracing
+
+
+DEFAULT_POOL_TIMEOUT = 100
+KEEP_ALIVE_INTERVAL = 30
+MAX_IDLE_TIME = 30 * 60
+
+CLI_SESSIONS = metrics.counter("vyos_cli_sessions_total", "CLI session checkouts by result: reused from the pool, "
+                                                         "opened or dropped as stale", ("result",))
+CLI_SESSION_SETUP = metrics.histogram("vyos_cli_session_setup_seconds", "Time spent on opening new CLI sessions")
+
+
+class SessionPoolStats(object):
+    def __init__(self):
+        """Counters of the session pool usage"""
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.dropped = 0
+        self.setup_time = 0.0
+
+    @property
+    def hit_rate(self):
+        """
+
+        :rtype: float
+        """
+        total = self.hits + self.misses
+        return float(self.hits) / total if total else 0.0
+
+    def record_hit(self):
+        CLI_SESSIONS.inc(result="reused")
+        with self._lock:
+            self.hits += 1
+
+    def record_miss(self, setup_time):
+        """
+
+        :param float setup_time: time spent on the session connect
+        """
+        CLI_SESSIONS.inc(result="opened")
+        CLI_SESSION_SETUP.observe(setup_time)
+        with self._lock:
+            self.misses += 1
+            self.setup_time += setup_time
+
+    def record_drop(self):
+        CLI_SESSIONS.inc(result="dropped")
+        with self._lock:
+            self.dropped += 1
+
+    def as_dict(self):
+        """
+
+        :rtype: dict
+        """
+        return {"hits": self.hits,
+                "misses": self.misses,
+                "dropped": self.dropped,
+                "hit_rate": round(self.hit_rate, 3),
+                "setup_time": round(self.setup_time, 3)}
+
+
+def _get_transport(session):
+    """Get paramiko transport of the SSH session if any
+
+    :param cloudshell.cli.session.expect_session.ExpectSession session:
+    :rtype: paramiko.Transport
+    """
+    handler = getattr(session, "_handler", None)
+    get_transport = getattr(handler, "get_transport", None)
+
+    return get_transport() if get_transport is not None else None
+
+
+def is_session_alive(session):
+    """Cheap liveness check which doesn't send anything to the device
+
+    :param cloudshell.cli.session.expect_session.ExpectSession session:
+    :rtype: bool
+    """
+    active = getattr(session, "active", None)
+    if callable(active) and not active():
+        return False
+
+    channel = getattr(session, "_current_channel", None)
+    if channel is not None and (getattr(channel, "closed", False) or channel.exit_status_ready()):
+        return False
+
+    transport = _get_transport(session)
+    if transport is not None and not transport.is_active():
+        return False
+
+    return True
+
+
+class VyOSSessionPoolManager(SessionPoolManager):
+    def __init__(self, max_pool_size=1, pool_timeout=DEFAULT_POOL_TIMEOUT, keep_alive_interval=KEEP_ALIVE_INTERVAL,
+                 max_idle_time=MAX_IDLE_TIME, session_manager=None):
+        """Session pool that keeps idle sessions alive and opens new sessions outside of the pool lock
+
+        Each pool has its own session manager: the default one of cloudshell-cli is created once at import time
+        and shared, so the sessions of all resources would count towards the limit of every pool
+
+        :param int max_pool_size: max number of concurrent sessions to the device
+        :param int pool_timeout: time to wait for the free session
+        :param int keep_alive_interval: interval of the SSH keep-alive packets for the idle sessions
+        :param int max_idle_time: idle sessions older than this are reopened instead of reuse
+        :param cloudshell.cli.session_manager_impl.SessionManagerImpl session_manager: new one by default
+        """
+        super(VyOSSessionPoolManager, self).__init__(session_manager=session_manager or SessionManagerImpl(),
+                                                     max_pool_size=max_pool_size,
+                                                     pool_timeout=pool_timeout)
+        self._keep_alive_interval = keep_alive_interval
+        self._max_idle_time = max_idle_time
+        self._closed = False
+        self._connecting = 0
+        self._returned_at = {}
+        self.stats = SessionPoolStats()
+
+    @property
+    def max_pool_size(self):
+        return self._max_pool_size
+
+    def _is_reusable(self, session, new_sessions, logger):
+        """
+
+        :param session:
+        :param list new_sessions: sessions defined by the CLI handler
+        :param logging.Logger logger:
+        :rtype: bool
+        """
+        idle_time = time.time() - self._returned_at.pop(id(session), time.time())
+
+        return (idle_time < self._max_idle_time and
+                is_session_alive(session) and
+                self._session_manager.is_compatible(session, new_sessions, logger))
+
+    def _drop_session(self, session, logger):
+        """Remove session from the session manager and close it
+
+        :param session:
+        :param logging.Logger logger:
+        """
+        self.stats.record_drop()
+        self._session_manager.remove_session(session, logger)
+        try:
+            session.disconnect()
+        except Exception:
+            logger.debug("Unable to disconnect stale session", exc_info=True)
+
+    def _enable_keep_alive(self, session, logger):
+        """Let paramiko send SSH_MSG_IGNORE packets while the session is idle in the pool
+
+        :param session:
+        :param logging.Logger logger:
+        """
+        transport = _get_transport(session)
+        if transport is not None and self._keep_alive_interval:
+            transport.set_keepalive(self._keep_alive_interval)
+            logger.debug("SSH keep-alive enabled with {} sec interval".format(self._keep_alive_interval))
+
+    def get_session(self, new_sessions, prompt, logger):
+        """Get session from the pool or open a new one
+
+        :param list new_sessions: sessions defined by the CLI handler, keyword name is used by cloudshell-cli
+        :param str prompt:
+        :param logging.Logger logger:
+        """
+        with tracing.span("cli.session_checkout") as phase:
+            session = self._get_session(new_sessions=new_sessions, prompt=prompt, logger=logger)
+            phase.set(reused=not session.new_session)
+
+            return session
+
+    def _get_session(self, new_sessions, prompt, logger):
+        """
+
+        :param list new_sessions: sessions defined by the CLI handler
+        :param str prompt:
+        :param logging.Logger logger:
+        """
+        call_time = time.time()
+
+        with self._session_condition:
+            while True:
+                while not self._pool.empty():
+                    session = self._pool.get(False)
+                    if self._is_reusable(session, new_sessions, logger):
+                        session.new_session = False
+                        self.stats.record_hit()
+                        logger.debug("Session reused from the pool in {:.3f} sec. Pool stats: {}"
+                                     .format(time.time() - call_time, self.stats.as_dict()))
+                        return session
+
+                    logger.debug("Dropping stale session from the pool")
+                    self._drop_session(session, logger)
+
+                if self._session_manager.existing_sessions_count() + self._connecting < self._max_pool_size:
+                    self._connecting += 1
+                    break
+
+                self._session_condition.wait(self._pool_timeout)
+                if time.time() - call_time >= self._pool_timeout:
+                    raise SessionPoolException(self.__class__.__name__,
+                                               "Cannot get session instance during {} sec.".format(
+                                                   self._pool_timeout))
+
+        connect_time = time.time()
+        try:
+            with tracing.span("cli.session_open"):
+                session = self._session_manager.new_session(new_sessions, prompt, logger)
+        finally:
+            with self._session_condition:
+                self._connecting -= 1
+                self._session_condition.notify()
+
+        session.new_session = True
+        setup_time = time.time() - connect_time
+        self.stats.record_miss(setup_time=setup_time)
+        self._enable_keep_alive(session, logger)
+        logger.debug("New session opened in {:.3f} sec. Pool stats: {}".format(setup_time, self.stats.as_dict()))
+
+        return session
+
+    def return_session(self, session, logger):
+        """
+
+        :param session:
+        :param logging.Logger logger:
+        """
+        if self._closed:
+            self._drop_session(session, logger)
+            with self._session_condition:
+                self._session_condition.notify()
+            return
+
+        self._returned_at[id(session)] = time.time()
+        super(VyOSSessionPoolManager, self).return_session(session, logger)
+
+    def remove_session(self, session, logger):
+        """
+
+        :param session:
+        :param logging.Logger logger:
+        """
+        self._returned_at.pop(id(session), None)
+        super(VyOSSessionPoolManager, self).remove_session(session, logger)
+
+    def close(self, logger):
+        """Disconnect idle sessions, sessions in use are disconnected when they are returned
+
+        :param logging.Logger logger:
+        """
+        with self._session_condition:
+            self._closed = True
+            while not self._pool.empty():
+                self._drop_session(self._pool.get(False), logger)
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_resource_key(address, port, user):
+    """Get key of the session pool, sessions of the pool are opened to the same address and port with the same user
+
+    Resource name isn't a part of the key, so the pool isn't reused after the address or user of the resource
+    is changed. Sessions opened with the old password are dropped by the pool as incompatible.
+
+    :param str address:
+    :param int port: CLI TCP port
+    :param str user:
+    :rtype: str
+    """
+    return "{}@{}:{}".format(user, address, port)
+
+
+def get_session_pool(resource_key, max_pool_size=1):
+    """Get session pool shared between all commands to the same resource
+
+    :param str resource_key: unique key of the resource, see get_resource_key
+    :param int max_pool_size: max number of concurrent sessions to the resource
+    :rtype: VyOSSessionPoolManager
+    """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(resource_key)
+        if pool is None or pool.max_pool_size != max_pool_size:
+            if pool is not None:
+                pool.close(logger=logging.getLogger(__name__))
+
+            pool = VyOSSessionPoolManager(max_pool_size=max_pool_size)
+            _POOLS[resource_key] = pool
+
+        return pool
+
+
+def get_pooled_cli(resource_key, max_pool_size=1):
+    """Get CLI object which uses shared session pool of the resource
+
+    :param str resource_key: unique key of the resource, see get_resource_key
+    :param int max_pool_size: max number of concurrent sessions to the resource
+    :rtype: cloudshell.cli.cli.CLI
+    """
+    return CLI(session_pool=get_session_pool(resource_key=resource_key, max_pool_size=max_pool_size))
@@ -0,0 +1,177 @@
+from collections import OrderedDict
+import re
+import threading
+import time
+
+from cloudshell.cli.helper.normalize_buffer import normalize_buffer
+from cloudshell.cli.session.expect_session import ActionLoopDetector
+from cloudshell.cli.session.session_exceptions import CommandExecutionException
+from cloudshell.cli.session.session_exceptions import ExpectedSessionException
+from cloudshell.cli.session.session_exceptions import SessionLoopDetectorException
+from cloudshell.cli.session.session_exceptions import SessionLoopLimitException
+from cloudshell.cli.session.ssh_session import SSHSession
+from cloudshell.cli.session.telnet_session import TelnetSession
+
+from vyos.cli.prompt import get_search_start
+
+
+PATTERN_CACHE_SIZE = 512
+
+_PATTERN_CACHE = OrderedDict()
+_PATTERN_CACHE_LOCK = threading.Lock()
+
+
+def compile_pattern(pattern):
+    """Compile pattern of the expected string, action or error map with the flags cloudshell-cli uses (re.DOTALL)
+
+    Compiled patterns are kept in the bounded LRU cache, so prompts and the action/error maps reused between
+    commands are compiled once
+
+    :param str pattern:
+    :rtype: re.RegexObject
+    """
+    with _PATTERN_CACHE_LOCK:
+        regex = _PATTERN_CACHE.pop(pattern, None)
+        if regex is None:
+            regex = re.compile(pattern, re.DOTALL)
+            if len(_PATTERN_CACHE) >= PATTERN_CACHE_SIZE:
+                _PATTERN_CACHE.popitem(last=False)
+
+        _PATTERN_CACHE[pattern] = regex
+
+    return regex
+
+
+class TailExpectSessionMixin(object):
+    """Expect loop which searches only the new output for the expected string and the actions
+
+    ExpectSession.hardware_expect of cloudshell-cli searches the whole accumulated output after each read, so the
+    cost of the command grows with the square of its output size. Here each read is searched starting from
+    the tail of the output checked before (see get_search_start), so patterns split between the reads are still
+    found, and the patterns are compiled once. Otherwise the behaviour is the same as of ExpectSession.
+    """
+
+    # function(event, data) called with the read output chunks ("output") and the keys of the triggered actions
+    # ("action"), used to record the CLI transcripts
+    io_listener = None
+
+    def _notify_io_listener(self, event, data):
+        """
+
+        :param str event: "output" or "action"
+        :param str data: output chunk or action key
+        """
+        if self.io_listener is not None:
+            self.io_listener(event, data)
+
+    def hardware_expect(self, command, expected_string, logger, action_map=None, error_map=None,
+                        timeout=None, retries=None, check_action_loop_detector=True, empty_loop_timeout=None,
+                        remove_command_from_output=True, **optional_args):
+        """Get response from the device and compare it to action_map, error_map and expected_string patterns
+
+        :param str command: command to send
+        :param str expected_string: expected string
+        :param logging.Logger logger:
+        :param collections.OrderedDict action_map: {pattern: action} to trigger some action on received string
+        :param collections.OrderedDict error_map: {pattern: error message}
+        :param int timeout: session timeout
+        :param int retries: maximal retries count
+        :param bool check_action_loop_detector:
+        :param float empty_loop_timeout:
+        :param bool remove_command_from_output: remove echo of the command from the output
+        :rtype: str
+        """
+        action_map = action_map or OrderedDict()
+        error_map = error_map or OrderedDict()
+        retries = retries or self._max_loop_retries
+        empty_loop_timeout = empty_loop_timeout or self._empty_loop_timeout
+
+        if command is not None:
+            self._clear_buffer(self._clear_buffer_timeout, logger)
+
+            logger.debug("Command: {}".format(command))
+            self.send_line(command, logger)
+
+        if not expected_string:
+            raise ExpectedSessionException(self.__class__.__name__, "List of expected messages can't be empty!")
+
+        expected_re = compile_pattern(expected_string)
+        actions = [(action_key, compile_pattern(action_key)) for action_key in action_map]
+
+        output_list = []
+        output_str = ""
+        checked_size = 0
+        retries_count = 0
+        is_correct_exit = False
+
+        action_loop_detector = ActionLoopDetector(self._loop_detector_max_action_loops,
+                                                  self._loop_detector_max_combination_length)
+
+        while retries == 0 or retries_count < retries:
+            read_buffer = self._receive_all(timeout, logger)
+
+            if not read_buffer:
+                retries_count += 1
+                time.sleep(empty_loop_timeout)
+                continue
+
+            read_buffer = normalize_buffer(read_buffer)
+            logger.debug(read_buffer)
+            self._notify_io_listener("output", read_buffer)
+            output_str += read_buffer
+            retries_count = 0
+
+            if command and remove_command_from_output:
+                command_pattern = self._generate_command_pattern(command)
+                if re.search(command_pattern, output_str, flags=re.MULTILINE):
+                    output_str = re.sub(command_pattern, "", output_str, count=1, flags=re.MULTILINE)
+                    remove_command_from_output = False
+                    checked_size = 0
+
+            search_start = get_search_start(output_str, checked_size)
+            checked_size = len(output_str)
+
+            if expected_re.search(output_str, search_start):
+                output_list.append(output_str)
+                is_correct_exit = True
+
+            for action_key, action_re in actions:
+                if action_re.search(output_str, search_start):
+                    output_list.append(output_str)
+
+                    if check_action_loop_detector and action_loop_detector.loops_detected(action_key):
+                        logger.error("Loops detected")
+                        raise SessionLoopDetectorException(self.__class__.__name__, "Expected actions loops detected")
+
+                    logger.debug("Action key: {}".format(action_key))
+                    self._notify_io_listener("action", action_key)
+                    action_map[action_key](self, logger)
+                    output_str = ""
+                    checked_size = 0
+                    break
+
+            if is_correct_exit:
+                break
+
+        if not is_correct_exit:
+            raise SessionLoopLimitException(self.__class__.__name__,
+                                            "Session Loop limit exceeded, {} loops".format(retries_count))
+
+        result_output = "".join(output_list)
+
+        for error_string in error_map:
+            if compile_pattern(error_string).search(result_output):
+                raise CommandExecutionException(self.__class__.__name__,
+                                                "Session returned '{}'".format(error_map[error_string]))
+
+        # Read buffer to the end. Useful when expected_string isn't last in buffer
+        result_output += self._clear_buffer(self._clear_buffer_timeout, logger)
+        return result_output
+
+
+class VyOSSSHSession(TailExpectSessionMixin, SSHSession):
+    pass
+
+
+class VyOSTelnetSession(TailExpectSessionMixin, TelnetSession):
+    pass
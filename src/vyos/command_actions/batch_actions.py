@@ -0,0 +1,188 @@
+from collections import OrderedDict
+import re
+import uuid
+
+from vyos.cli import command_templates
+from vyos.cli.command_template_executor import VyOSCommandTemplateExecutor
+from vyos.cli.prompt import remove_prompt
+
+
+BATCH_SCRIPT_DIR = "/tmp"
+BATCH_SCRIPT_CHUNK_SIZE = 500
+BATCH_EXECUTION_TIMEOUT = 30 * 60
+
+MARKER_BEGIN = "__VYOS_BATCH_BEGIN__"
+MARKER_FAILED = "__VYOS_BATCH_FAILED__"
+MARKER_DONE = "__VYOS_BATCH_DONE__"
+
+COMMIT_INDEX = "commit"
+
+SKIPPED_COMMANDS = ("configure", "exit", "commit")
+SAVE_COMMAND = "save"
+
+MARKER_RE = re.compile(r"^({begin}|{failed}) (\S+)\s*$".format(begin=MARKER_BEGIN, failed=MARKER_FAILED),
+                       re.MULTILINE)
+WRITE_FILE_ERROR_TEMPLATE = r"{file_path}: ([Nn]o such file or directory|[Pp]ermission denied)"
+
+
+def quote_shell_argument(value):
+    """Quote value as a single shell argument, whitespace and special characters are kept as is
+
+    :param str value:
+    :rtype: str
+    """
+    return "'{}'".format(value.replace("'", "'\\''"))
+
+
+def prepare_batch_commands(commands):
+    """Drop session control commands, the batch opens configuration session and commits by itself
+
+    :param list[str] commands:
+    :return: configuration commands and whether 'save' was requested
+    :rtype: tuple[list[str], bool]
+    """
+    batch_commands = []
+    save = False
+
+    for command in commands:
+        command = command.strip()
+        if not command or command in SKIPPED_COMMANDS:
+            continue
+        if command == SAVE_COMMAND:
+            save = True
+            continue
+        batch_commands.append(command)
+
+    return batch_commands, save
+
+
+def build_batch_script(commands, save=False):
+    """Generate vbash script that applies all commands in one configuration session with a single commit
+
+    Each command is surrounded by markers, so output could be split per command afterwards.
+    Script stops on the first failed command, uncommitted changes are discarded on exit.
+
+    :param list[str] commands: configuration mode commands (set/delete/...)
+    :param bool save: save configuration after commit
+    :rtype: str
+    """
+    lines = ["#!/bin/vbash",
+             "source /opt/vyatta/etc/functions/script-template",
+             "configure"]
+
+    for index, command in enumerate(commands):
+        lines.extend(["echo '{} {}'".format(MARKER_BEGIN, index),
+                      "{} || {{ echo '{} {}'; exit 1; }}".format(command, MARKER_FAILED, index)])
+
+    lines.extend(["echo '{} {}'".format(MARKER_BEGIN, COMMIT_INDEX),
+                  "commit || {{ echo '{} {}'; exit 1; }}".format(MARKER_FAILED, COMMIT_INDEX)])
+
+    if save:
+        lines.append("save")
+
+    lines.extend(["exit", "echo '{}'".format(MARKER_DONE)])
+
+    return "\n".join(lines) + "\n"
+
+
+def parse_batch_output(commands, output):
+    """Split output of the batch script per command
+
+    :param list[str] commands: commands that were passed to the batch script
+    :param str output: output of the batch script
+    :return: results per command, last one is the commit result
+    :rtype: list[dict]
+    """
+    results = [{"command": command, "output": "", "executed": False, "success": False} for command in commands]
+    commit_result = {"command": "commit", "output": "", "executed": False, "success": False}
+
+    output = remove_prompt(output.split(MARKER_DONE)[0])
+    current = None
+    position = 0
+
+    for match in MARKER_RE.finditer(output):
+        if current is not None:
+            current["output"] += output[position:match.start()]
+
+        marker, index = match.groups()
+        current = commit_result if index == COMMIT_INDEX else results[int(index)]
+
+        if marker == MARKER_BEGIN:
+            current.update(executed=True, success=True)
+        else:
+            current["success"] = False
+
+        position = match.end()
+
+    if current is not None:
+        current["output"] += output[position:]
+
+    for result in results + [commit_result]:
+        result["output"] = result["output"].strip()
+
+    return results + [commit_result]
+
+
+class ConfigBatchActions(object):
+    def __init__(self, cli_service, logger):
+        """Apply big amount of configuration commands with a few round trips
+
+        :param cli_service: default mode cli_service
+        :param logger:
+        """
+        self._cli_service = cli_service
+        self._logger = logger
+
+    def upload_script(self, script, remote_path, chunk_size=BATCH_SCRIPT_CHUNK_SIZE):
+        """Write script to the device file system with printf, chunk_size lines per round trip
+
+        Script is sent as the printf arguments on a single command line: heredoc needs a multi-line command,
+        but cloudshell-cli command templates join lines of the command.
+
+        :param str script:
+        :param str remote_path:
+        :param int chunk_size:
+        """
+        lines = script.splitlines()
+        error_map = OrderedDict(((WRITE_FILE_ERROR_TEMPLATE.format(file_path=re.escape(remote_path)),
+                                  "Unable to write file on the device"),))
+
+        for start in range(0, len(lines), chunk_size):
+            redirect = ">" if start == 0 else ">>"
+            VyOSCommandTemplateExecutor(self._cli_service,
+                                        command_templates.WRITE_FILE_LINES,
+                                        error_map=error_map).execute_command(
+                lines=" ".join(quote_shell_argument(line) for line in lines[start:start + chunk_size]),
+                redirect=redirect,
+                file_path=remote_path)
+
+    def execute_script(self, remote_path, timeout=BATCH_EXECUTION_TIMEOUT):
+        """Run script on the device and remove it afterwards
+
+        :param str remote_path:
+        :param int timeout:
+        :rtype: str
+        """
+        return VyOSCommandTemplateExecutor(self._cli_service,
+                                           command_templates.EXECUTE_VBASH_SCRIPT,
+                                           timeout=timeout).execute_command(file_path=remote_path)
+
+    def apply(self, commands, save=False, chunk_size=BATCH_SCRIPT_CHUNK_SIZE):
+        """Apply configuration commands with a single commit
+
+        :param list[str] commands: configuration mode commands
+        :param bool save: save configuration after commit
+        :param int chunk_size: number of script lines sent per round trip
+        :return: results per command, last one is the commit result
+        :rtype: list[dict]
+        """
+        remote_path = "{}/vyos-config-batch-{}.sh".format(BATCH_SCRIPT_DIR, uuid.uuid4().hex)
+        script = build_batch_script(commands=commands, save=save)
+
+        self._logger.info("Uploading batch script with {} command(s) to '{}'".format(len(commands), remote_path))
+        self.upload_script(script=script, remote_path=remote_path, chunk_size=chunk_size)
+
+        self._logger.info("Executing batch script '{}'".format(remote_path))
+        output = self.execute_script(remote_path=remote_path)
+
+        return parse_batch_output(commands=commands, output=output)
@@ -0,0 +1,122 @@
+from vyos.command_actions.system_actions import SystemActions
+
+
+SET_OPERATION = "set"
+DELETE_OPERATION = "delete"
+
+
+class ConfigTransaction(object):
+    def __init__(self, cli_service, logger, confirm_minutes=None, verify_callback=None, resource_name=None):
+        """Group configuration changes into one unit that is committed once
+
+        Usage:
+            with ConfigTransaction(config_session, logger) as transaction:
+                transaction.set("interfaces ethernet eth1 vif 10")
+                transaction.delete("interfaces ethernet eth1 vif 20")
+
+        :param cli_service: config mode cli_service
+        :param logger:
+        :param int confirm_minutes: commit with 'commit-confirm', changes will be confirmed automatically
+            only if verify_callback succeeds
+        :param verify_callback: callable without arguments that returns True when management path is available,
+            changes are confirmed only as reliably as this check verifies the device
+        :param str resource_name: commit timeout is learned per resource
+        """
+        self._sys_actions = SystemActions(cli_service, logger, resource_name=resource_name)
+        self._logger = logger
+        self._confirm_minutes = confirm_minutes
+        self._verify_callback = verify_callback
+        self._operations = []
+        self._committed = False
+
+    @property
+    def operations(self):
+        """
+
+        :rtype: list[tuple[str, str]]
+        """
+        return list(self._operations)
+
+    def set(self, path):
+        """Queue 'set' operation
+
+        :param str path: configuration path, i.e. "interfaces ethernet eth1 vif 10"
+        """
+        self._operations.append((SET_OPERATION, path))
+
+    def delete(self, path):
+        """Queue 'delete' operation
+
+        :param str path: configuration path, i.e. "interfaces ethernet eth1 vif 10"
+        """
+        self._operations.append((DELETE_OPERATION, path))
+
+    def add(self, command):
+        """Queue configuration command
+
+        :param str command: 'set ...' or 'delete ...' command
+        """
+        operation, _, path = command.strip().partition(" ")
+
+        if operation not in (SET_OPERATION, DELETE_OPERATION) or not path.strip():
+            raise Exception("Only 'set' and 'delete' commands are allowed in the configuration transaction, "
+                            "got '{}'".format(command))
+
+        self._operations.append((operation, path.strip()))
+
+    def commit(self):
+        """Apply all queued operations and commit them once
+
+        :raise Exception: if any operation or commit failed, or management path wasn't verified
+        """
+        if self._committed:
+            raise Exception("Configuration transaction was already committed")
+
+        self._committed = True
+
+        if not self._operations:
+            self._logger.info("Configuration transaction is empty, nothing to commit")
+            return
+
+        self._logger.info("Applying {} operation(s) in the configuration transaction".format(len(self._operations)))
+
+        try:
+            for operation, path in self._operations:
+                if operation == SET_OPERATION:
+                    self._sys_actions.set(path=path)
+                else:
+                    self._sys_actions.delete(path=path)
+
+            self._sys_actions.commit(confirm_minutes=self._confirm_minutes)
+        except Exception:
+            self._logger.exception("Configuration transaction failed, discarding changes")
+            self._discard()
+            raise
+
+        if self._confirm_minutes:
+            self._confirm()
+
+    def _discard(self):
+        """Discard uncommitted changes, errors are only logged so the original error of the transaction is raised"""
+        try:
+            self._sys_actions.discard()
+        except Exception:
+            self._logger.exception("Unable to discard configuration changes")
+
+    def _confirm(self):
+        """Confirm changes if management path is still available after the 'commit-confirm'"""
+        if self._verify_callback is not None and not self._verify_callback():
+            raise Exception("Management path verification failed after commit. Changes were not confirmed, "
+                            "device will roll back them in {} minute(s)".format(self._confirm_minutes))
+
+        self._sys_actions.confirm()
+        self._logger.info("Configuration changes were confirmed")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self._operations = []
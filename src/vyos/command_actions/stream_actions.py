@@ -0,0 +1,110 @@
+import re
+import uuid
+
+from vyos.cli import command_templates
+from vyos.cli.command_template_executor import VyOSCommandTemplateExecutor
+from vyos.cli.prompt import remove_prompt
+
+
+STREAM_OUTPUT_DIR = "/tmp"
+STREAM_CHUNK_LINES = 1000
+STREAM_EXECUTION_TIMEOUT = 30 * 60
+
+MARKER_LINES = "__VYOS_OUTPUT_LINES__"
+
+LINES_RE = re.compile(r"{}(\d+):(\d+)".format(MARKER_LINES))
+
+
+def strip_prompt(output):
+    """Remove the device prompt that follows the command output
+
+    :param str output:
+    :rtype: str
+    """
+    return "".join(line + "\n" for line in remove_prompt(output).rstrip().splitlines())
+
+
+class StreamActions(object):
+    def __init__(self, cli_service, logger):
+        """Read large command outputs from the device in bounded chunks
+
+        Command output is redirected to the file on the device and read back by chunk_lines lines, so neither
+        the CLI buffer nor the driver ever hold the whole output.
+
+        :param cli_service: default mode cli_service
+        :param logger:
+        """
+        self._cli_service = cli_service
+        self._logger = logger
+        # exit status of the last command run by stream_output, None until its output is redirected
+        self.exit_status = None
+
+    def redirect_output(self, command, remote_path, timeout=STREAM_EXECUTION_TIMEOUT):
+        """Run command on the device with its output written to the file
+
+        :param str command:
+        :param str remote_path:
+        :param int timeout:
+        :return: exit status of the command and number of lines in its output
+        :rtype: tuple[int, int]
+        """
+        output = VyOSCommandTemplateExecutor(self._cli_service,
+                                             command_templates.REDIRECT_COMMAND_OUTPUT,
+                                             timeout=timeout).execute_command(command=command,
+                                                                              file_path=remote_path,
+                                                                              marker=MARKER_LINES)
+        match = LINES_RE.search(output)
+        if not match:
+            self._logger.error("Unable to redirect output of the '{}' command. Output: {}".format(command, output))
+            raise Exception("Unable to redirect output of the '{}' command to the file on the device"
+                            .format(command))
+
+        return int(match.group(1)), int(match.group(2))
+
+    def read_lines(self, remote_path, first_line, last_line):
+        """
+
+        :param str remote_path:
+        :param int first_line: 1-based, inclusive
+        :param int last_line: inclusive
+        :rtype: str
+        """
+        output = VyOSCommandTemplateExecutor(self._cli_service,
+                                             command_templates.READ_FILE_LINES).execute_command(
+            file_path=remote_path,
+            first_line=first_line,
+            last_line=last_line)
+
+        return strip_prompt(output)
+
+    def remove_file(self, remote_path):
+        """
+
+        :param str remote_path:
+        """
+        VyOSCommandTemplateExecutor(self._cli_service,
+                                    command_templates.REMOVE_FILE).execute_command(file_path=remote_path)
+
+    def stream_output(self, command, chunk_lines=STREAM_CHUNK_LINES):
+        """Generate output of the command by chunks, file on the device is removed afterwards
+
+        Exit status of the command is set to the exit_status attribute before the first chunk is generated
+
+        :param str command:
+        :param int chunk_lines: number of output lines per round trip
+        :rtype: collections.Iterable[str]
+        """
+        remote_path = "{}/vyos-output-{}.txt".format(STREAM_OUTPUT_DIR, uuid.uuid4().hex)
+        self.exit_status = None
+
+        try:
+            self.exit_status, lines_count = self.redirect_output(command=command, remote_path=remote_path)
+            self._logger.info("Command '{}' exited with status {} and produced {} line(s), reading them by {} line(s)"
+                              .format(command, self.exit_status, lines_count, chunk_lines))
+
+            for first_line in range(1, lines_count + 1, chunk_lines):
+                yield self.read_lines(remote_path=remote_path,
+                                      first_line=first_line,
+                                      last_line=first_line + chunk_lines - 1)
+        finally:
+            self.remove_file(remote_path=remote_path)
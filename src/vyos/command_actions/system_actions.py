@@ -1,99 +1,247 @@
 import re
+import threading
 from collections import OrderedDict
 
-from cloudshell.cli.command_template.command_template_executor import CommandTemplateExecutor
 from cloudshell.devices.networking_utils import UrlParser
 
 from vyos.cli import command_templates
+from vyos.cli.command_template_executor import VyOSCommandTemplateExecutor
+from vyos.cli.prompt import remove_prompt
+from vyos.cli.sessions import compile_pattern
+from vyos import timeouts
+
+
+ACTION_MAP_CACHE_SIZE = 64
+
+SAVE_TIMEOUT = 180
+LOAD_TIMEOUT = 300
+
+DONE_RE = re.compile(r"[Dd]one", re.IGNORECASE)
+SAVE_ERROR_RE = re.compile(r"error.*\n|failed.*\n", re.IGNORECASE)
+
+_ACTION_MAP_CACHE = OrderedDict()
+_ACTION_MAP_CACHE_LOCK = threading.Lock()
+
+
+def _send_empty_line(session, logger):
+    session.send_line("", logger)
+
+
+def _get_action_map_shape(source_file, destination_file):
+    """Get parts of the source and destination which confirmation patterns depend on
+
+    :param str source_file:
+    :param str destination_file:
+    :return: shape without credentials (remote destination, destination and source file names, host) and password
+    :rtype: tuple[tuple, str]
+    """
+    remote_destination = "://" in destination_file
+    destination_url = UrlParser.parse_url(destination_file)
+    source_url = UrlParser.parse_url(source_file)
+    url = destination_url if remote_destination else source_url
+
+    shape = (remote_destination,
+             destination_url.get(UrlParser.FILENAME),
+             source_url.get(UrlParser.FILENAME),
+             url.get(UrlParser.HOSTNAME))
+
+    return shape, url.get(UrlParser.PASSWORD)
+
+
+def _build_action_map(shape):
+    """Build map of the patterns that just confirm the prompt, patterns are compiled once here
+
+    :param tuple shape: see _get_action_map_shape
+    :rtype: collections.OrderedDict
+    """
+    remote_destination, destination_file_name, source_file_name, host = shape
+    confirm_patterns = []
+
+    if remote_destination:
+        if destination_file_name:
+            confirm_patterns.append(r"[\[\(].*{}[\)\]]".format(re.escape(destination_file_name)))
+        if source_file_name:
+            confirm_patterns.append(r"[\[\(]{}[\)\]]".format(re.escape(source_file_name)))
+    else:
+        for file_name in (destination_file_name, source_file_name):
+            if file_name:
+                confirm_patterns.append(r"(?!/)[\[\(]{}[\)\]]".format(re.escape(file_name)))
+
+    if host:
+        confirm_patterns.append(r"(?!/){}(?!/)".format(re.escape(host)))
+
+    # each confirmation keeps its own key: cloudshell-cli detects action loops by the repeated keys, so the same key
+    # for the destination file, source file and host confirmations would be taken for a loop
+    action_map = OrderedDict()
+    for pattern in confirm_patterns:
+        compile_pattern(pattern)
+        action_map[pattern] = _send_empty_line
+
+    return action_map
 
 
 class SystemActions(object):
-    def __init__(self, cli_service, logger):
+    def __init__(self, cli_service, logger, resource_name=None):
         """
         Reboot actions
         :param cli_service: default mode cli_service
         :type cli_service: CliService
         :param logger:
         :type logger: Logger
+        :param str resource_name: timeouts of load/save/commit are learned per resource, defaults are used if not set
         :return:
         """
         self._cli_service = cli_service
         self._logger = logger
+        self._resource_name = resource_name
 
     @staticmethod
     def prepare_action_map(source_file, destination_file):
-        action_map = OrderedDict()
-        if "://" in destination_file:
-            url = UrlParser.parse_url(destination_file)
-            dst_file_name = url.get(UrlParser.FILENAME)
-            source_file_name = UrlParser.parse_url(source_file).get(UrlParser.FILENAME)
-            action_map[r"[\[\(].*{}[\)\]]".format(
-                dst_file_name)] = lambda session, logger: session.send_line("", logger)
-
-            action_map[r"[\[\(]{}[\)\]]".format(source_file_name)] = lambda session, logger: session.send_line("",
-                                                                                                               logger)
-        else:
-            destination_file_name = UrlParser.parse_url(destination_file).get(UrlParser.FILENAME)
-            url = UrlParser.parse_url(source_file)
-
-            source_file_name = url.get(UrlParser.FILENAME)
-            action_map[r"(?!/)[\[\(]{}[\)\]]".format(
-                destination_file_name)] = lambda session, logger: session.send_line("", logger)
-            action_map[r"(?!/)[\[\(]{}[\)\]]".format(
-                source_file_name)] = lambda session, logger: session.send_line("", logger)
-        host = url.get(UrlParser.HOSTNAME)
-        if host:
-            action_map[r"(?!/){}(?!/)".format(host)] = lambda session, logger: session.send_line("", logger)
-        password = url.get(UrlParser.PASSWORD)
+        """Prepare action map for the load/save commands
+
+        Confirmation patterns are cached per shape of the (source, destination) pair without credentials, so they
+        are escaped and compiled once (see vyos.cli.sessions.compile_pattern) and VyOS sessions search only the new
+        output for them. Password action is added to the copy of the cached map on each call.
+
+        :param str source_file:
+        :param str destination_file:
+        :rtype: collections.OrderedDict
+        """
+        shape, password = _get_action_map_shape(source_file=source_file, destination_file=destination_file)
+
+        with _ACTION_MAP_CACHE_LOCK:
+            confirm_action_map = _ACTION_MAP_CACHE.pop(shape, None)
+            if confirm_action_map is None:
+                confirm_action_map = _build_action_map(shape)
+                if len(_ACTION_MAP_CACHE) >= ACTION_MAP_CACHE_SIZE:
+                    _ACTION_MAP_CACHE.popitem(last=False)
+
+            _ACTION_MAP_CACHE[shape] = confirm_action_map
+
+        action_map = OrderedDict(confirm_action_map)
         if password:
-            action_map[r"[Pp]assword:".format(
-                source_file)] = lambda session, logger: session.send_line(password, logger)
+            action_map[r"[Pp]assword:"] = lambda session, logger: session.send_line(password, logger)
+
         return action_map
 
-    def save(self, destination, action_map=None, error_map=None, timeout=180):
+    def save(self, destination, action_map=None, error_map=None, timeout=None):
         """Copy file from device to tftp or vice versa, as well as copying inside devices filesystem.
 
         :param destination: destination file
         :param action_map: actions will be taken during executing commands, i.e. handles yes/no prompts
         :param error_map: errors will be raised during executing commands, i.e. handles Invalid Commands errors
-        :param timeout: session timeout
+        :param timeout: session timeout, learned from the previous saves if not set
         :raise Exception:
         """
-        output = CommandTemplateExecutor(self._cli_service,
-                                         command_templates.SAVE_CONFIGURATION,
-                                         action_map=action_map,
-                                         error_map=error_map,
-                                         timeout=timeout).execute_command(destination_file_path=destination)
-
-        if not re.search(r"[Dd]one", output, re.IGNORECASE):
-            error_match = re.search(r"error.*\n|failed.*\n", output, re.IGNORECASE)
+        with timeouts.adaptive_timeout(resource=None if timeout else self._resource_name,
+                                       operation=timeouts.SAVE_OPERATION,
+                                       url=destination,
+                                       default=timeout or SAVE_TIMEOUT) as timeout:
+            output = VyOSCommandTemplateExecutor(self._cli_service,
+                                                 command_templates.SAVE_CONFIGURATION,
+                                                 action_map=action_map,
+                                                 error_map=error_map,
+                                                 timeout=timeout).execute_command(destination_file_path=destination)
+
+        if not DONE_RE.search(output):
+            error_match = SAVE_ERROR_RE.search(output)
 
             if error_match:
                 self._logger.error(output)
                 raise Exception("Copy command failed. See logs for the details")
 
-    def load(self, path, action_map=None, error_map=None, timeout=300):
+    def load(self, path, action_map=None, error_map=None, timeout=None):
         """Load configuration file
 
         :param path: relative path to the file on the remote host tftp://server/sourcefile
         :param action_map: actions will be taken during executing commands, i.e. handles yes/no prompts
         :param error_map: errors will be raised during executing commands, i.e. handles Invalid Commands errors
-        :param timeout: session timeout
+        :param timeout: session timeout, learned from the previous loads if not set
         :raise Exception:
         """
-        CommandTemplateExecutor(self._cli_service,
-                                command_templates.LOAD_CONFIGURATION,
-                                action_map=action_map,
-                                error_map=error_map,
-                                timeout=timeout,
-                                check_action_loop_detector=False).execute_command(source_file_path=path)
-
-    def commit(self):
+        with timeouts.adaptive_timeout(resource=None if timeout else self._resource_name,
+                                       operation=timeouts.LOAD_OPERATION,
+                                       url=path,
+                                       default=timeout or LOAD_TIMEOUT) as timeout:
+            VyOSCommandTemplateExecutor(self._cli_service,
+                                        command_templates.LOAD_CONFIGURATION,
+                                        action_map=action_map,
+                                        error_map=error_map,
+                                        timeout=timeout,
+                                        check_action_loop_detector=False).execute_command(source_file_path=path)
+
+    def get_running_config(self):
+        """Read running configuration from the device in the config.boot format
+
+        :rtype: str
         """
+        output = VyOSCommandTemplateExecutor(self._cli_service,
+                                             command_templates.SHOW_CONFIGURATION).execute_command()
 
-        :return:
+        return "\n".join(remove_prompt(output).rstrip().splitlines()) + "\n"
+
+    def get_running_config_digest(self):
+        """Get digest of the normalized running configuration calculated on the device
+
+        :rtype: str
         """
-        command = CommandTemplateExecutor(cli_service=self._cli_service,
-                                          command_template=command_templates.COMMIT)
+        from vyos import drift
+
+        output = VyOSCommandTemplateExecutor(self._cli_service,
+                                             command_templates.SHOW_CONFIGURATION_DIGEST).execute_command(
+            pipeline=drift.NORMALIZE_CONFIG_PIPELINE)
+
+        return drift.parse_digest(output)
 
-        command.execute_command()
+    def set(self, path):
+        """Set configuration node
+
+        :param str path: configuration path, i.e. "interfaces ethernet eth1 vif 10"
+        """
+        VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                    command_template=command_templates.SET_CONFIGURATION).execute_command(path=path)
+
+    def delete(self, path):
+        """Delete configuration node
+
+        :param str path: configuration path, i.e. "interfaces ethernet eth1 vif 10"
+        """
+        VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                    command_template=command_templates.DELETE_CONFIGURATION).execute_command(path=path)
+
+    def commit(self, confirm_minutes=None):
+        """
+
+        :param int confirm_minutes: use 'commit-confirm', device will roll back changes (reboot) if they will not be
+            confirmed within given amount of minutes
+        :return:
+        """
+        with timeouts.adaptive_timeout(resource=self._resource_name,
+                                       operation=timeouts.COMMIT_OPERATION,
+                                       url=None,
+                                       default=None) as timeout:
+            # without history commit keeps the CLI session default timeout
+            optional_kwargs = {"timeout": timeout} if timeout else {}
+
+            if confirm_minutes:
+                command = VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                                      command_template=command_templates.COMMIT_CONFIRM,
+                                                      **optional_kwargs)
+                command.execute_command(minutes=confirm_minutes)
+                return
+
+            command = VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                                  command_template=command_templates.COMMIT,
+                                                  **optional_kwargs)
+
+            command.execute_command()
+
+    def confirm(self):
+        """Confirm changes applied with 'commit-confirm'"""
+        VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                    command_template=command_templates.CONFIRM).execute_command()
+
+    def discard(self):
+        """Discard uncommitted changes of the configuration session"""
+        VyOSCommandTemplateExecutor(cli_service=self._cli_service,
+                                    command_template=command_templates.DISCARD).execute_command()
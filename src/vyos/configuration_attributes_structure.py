@@ -1,107 +1,162 @@
-class VyOSResource(object):
-    def __init__(self, address=None, family=None, shell_type=None, shell_name=None,
-                 fullname=None, name=None, attributes=None):
-        """
+from collections import OrderedDict
+import threading
 
-        :param str address: IP address of the resource
-        :param str family: resource family
-        :param str shell_name: shell name
-        :param str fullname: full name of the resource
-        :param str name: name of the resource
-        :param dict[str, str] attributes: attributes of the resource
-        """
-        self.address = address
-        self.family = family
-        self.shell_name = shell_name
-        self.fullname = fullname
-        self.name = name
-        self.attributes = attributes or {}
 
-        # todo: move it somewhere else !
-        self.vrf_management_name = ""
+RESOURCE_CACHE_SIZE = 256
 
-        if shell_name:
-            self.namespace_prefix = "{}.".format(self.shell_name)
-            self.shell_type = "{}.".format(shell_type)
-        else:
-            self.namespace_prefix = ""
-            self.shell_type = ""
+DEFAULT_CLI_CONNECTION_TYPE = "SSH"
+DEFAULT_CLI_TCP_PORT = 22
+DEFAULT_SESSIONS_CONCURRENCY_LIMIT = 1
 
-    @property
-    def config_file(self):
-        """
+_RESOURCE_CACHE = OrderedDict()
+_RESOURCE_CACHE_LOCK = threading.Lock()
 
-        :rtype: str
-        """
-        return self.attributes.get("{}Configuration File".format(self.namespace_prefix), None)
 
-    @property
-    def enable_ssh(self):
-        """
+class FrozenAttributes(dict):
+    """Read-only attributes of the resource"""
 
-        :rtype: str
-        """
-        enable_ssh = self.attributes.get("{}Enable SSH".format(self.namespace_prefix), "")
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Resource attributes are read-only")
 
-        if enable_ssh.lower() == "true":
-            return True
+    __setitem__ = __delitem__ = __ior__ = clear = pop = popitem = setdefault = update = _immutable
 
-        return False
 
-    @property
-    def user(self):
-        """
+def _to_int(value, default, minimum=None):
+    """
 
-        :rtype: str
-        """
-        return self.attributes.get("{}User".format(self.namespace_prefix), None)
+    :param value: attribute value, i.e. "22" or "1.0"
+    :param int default: used if value is empty or not a number
+    :param int minimum:
+    :rtype: int
+    """
+    try:
+        value = int(float(value))
+    except (TypeError, ValueError):
+        return default
 
-    @property
-    def password(self):
-        """
+    return max(value, minimum) if minimum is not None else value
 
-        :rtype: string
-        """
-        return self.attributes.get("{}Password".format(self.namespace_prefix), None)
 
-    @property
-    def cli_connection_type(self):
-        """
+class VyOSResource(object):
+    __slots__ = ("address", "family", "shell_name", "shell_type", "fullname", "name", "attributes",
+                 "namespace_prefix", "vrf_management_name", "config_file", "enable_ssh", "user", "password",
+                 "cli_connection_type", "cli_tcp_port", "sessions_concurrency_limit", "pipelined_autoload")
 
-        :rtype: str
-        """
-        return self.attributes.get("{}CLI Connection Type".format(self.namespace_prefix), "SSH")
+    def __init__(self, address=None, family=None, shell_type=None, shell_name=None,
+                 fullname=None, name=None, attributes=None):
+        """Immutable resource configuration, attributes are parsed once on creation
 
-    @property
-    def cli_tcp_port(self):
+        :param str address: IP address of the resource
+        :param str family: resource family
+        :param str shell_name: shell name
+        :param str fullname: full name of the resource
+        :param str name: name of the resource
+        :param dict[str, str] attributes: attributes of the resource
         """
+        if shell_name:
+            namespace_prefix = "{}.".format(shell_name)
+            shell_type = "{}.".format(shell_type)
+        else:
+            namespace_prefix = ""
+            shell_type = ""
+
+        attributes = FrozenAttributes(attributes or {})
+        enable_ssh = attributes.get("{}Enable SSH".format(namespace_prefix)) or ""
+        pipelined_autoload = attributes.get("{}Pipelined Autoload".format(namespace_prefix)) or ""
+
+        values = {"address": address,
+                  "family": family,
+                  "shell_name": shell_name,
+                  "shell_type": shell_type,
+                  "fullname": fullname,
+                  "name": name,
+                  "attributes": attributes,
+                  "namespace_prefix": namespace_prefix,
+                  # todo: move it somewhere else !
+                  "vrf_management_name": "",
+                  "config_file": attributes.get("{}Configuration File".format(namespace_prefix)),
+                  "enable_ssh": str(enable_ssh).lower() == "true",
+                  "user": attributes.get("{}User".format(namespace_prefix)),
+                  "password": attributes.get("{}Password".format(namespace_prefix)),
+                  "cli_connection_type": attributes.get("{}CLI Connection Type".format(namespace_prefix),
+                                                        DEFAULT_CLI_CONNECTION_TYPE),
+                  "cli_tcp_port": _to_int(attributes.get("{}CLI TCP Port".format(namespace_prefix)),
+                                          default=DEFAULT_CLI_TCP_PORT),
+                  "sessions_concurrency_limit": _to_int(
+                      attributes.get("{}Sessions Concurrency Limit".format(namespace_prefix)),
+                      default=DEFAULT_SESSIONS_CONCURRENCY_LIMIT,
+                      minimum=1),
+                  "pipelined_autoload": str(pipelined_autoload).lower() == "true"}
+
+        for slot, value in values.items():
+            object.__setattr__(self, slot, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
+
+    def __delattr__(self, name):
+        raise AttributeError("{} is immutable".format(type(self).__name__))
 
-        :rtype: str
-        """
-        return self.attributes.get("{}CLI TCP Port".format(self.namespace_prefix), 22)
+    @classmethod
+    def get_cached(cls, address=None, family=None, shell_type=None, shell_name=None, fullname=None, name=None,
+                   attributes=None):
+        """Get resource configuration shared between the commands with the same resource and attribute values
 
-    @property
-    def sessions_concurrency_limit(self):
+        :param str address: IP address of the resource
+        :param str family: resource family
+        :param str shell_type: shell type
+        :param str shell_name: shell name
+        :param str fullname: full name of the resource
+        :param str name: name of the resource
+        :param dict[str, str] attributes: attributes of the resource
+        :rtype: VyOSResource
         """
+        attributes = attributes or {}
+        key = (address, family, shell_type, shell_name, fullname, name, tuple(sorted(attributes.items())))
 
-        :rtype: float
-        """
-        return self.attributes.get("{}Sessions Concurrency Limit".format(self.namespace_prefix), 1)
+        with _RESOURCE_CACHE_LOCK:
+            resource_config = _RESOURCE_CACHE.pop(key, None)
+            if resource_config is None:
+                resource_config = cls(address=address, family=family, shell_type=shell_type, shell_name=shell_name,
+                                      fullname=fullname, name=name, attributes=attributes)
+                if len(_RESOURCE_CACHE) >= RESOURCE_CACHE_SIZE:
+                    _RESOURCE_CACHE.popitem(last=False)
 
+            _RESOURCE_CACHE[key] = resource_config
+
+        return resource_config
 
     @classmethod
     def from_context(cls, context, shell_type=None, shell_name=None):
-        """Create an instance of TrafficGeneratorVBladeResource from the given context
+        """Get an instance of VyOSResource for the given context
 
         :param cloudshell.shell.core.driver_context.ResourceCommandContext context:
         :param str shell_type: shell type
         :param str shell_name: shell name
-        :rtype: TrafficGeneratorVChassisResource
+        :rtype: VyOSResource
         """
-        return cls(address=context.resource.address,
-                   family=context.resource.family,
-                   shell_type=shell_type,
-                   shell_name=shell_name,
-                   fullname=context.resource.fullname,
-                   attributes=dict(context.resource.attributes),
-                   name=context.resource.name)
+        return cls.get_cached(address=context.resource.address,
+                              family=context.resource.family,
+                              shell_type=shell_type,
+                              shell_name=shell_name,
+                              fullname=context.resource.fullname,
+                              attributes=context.resource.attributes,
+                              name=context.resource.name)
+
+    @classmethod
+    def from_resource_details(cls, resource_details, shell_type=None, shell_name=None):
+        """Get an instance of VyOSResource for the CloudShell API resource details
+
+        :param cloudshell.api.cloudshell_api.ResourceInfo resource_details:
+        :param str shell_type: shell type
+        :param str shell_name: shell name
+        :rtype: VyOSResource
+        """
+        return cls.get_cached(address=resource_details.Address,
+                              family=resource_details.ResourceFamilyName,
+                              shell_type=shell_type,
+                              shell_name=shell_name,
+                              fullname=resource_details.Name,
+                              attributes={attribute.Name: attribute.Value
+                                          for attribute in resource_details.ResourceAttributes},
+                              name=resource_details.Name)
@@ -0,0 +1,152 @@
+"""Connectivity changes (VLAN add/remove) of the ApplyConnectivityChanges request
+
+Actions are grouped per device and turned into 'set'/'delete' commands of the VLAN interfaces (vif):
+
+    setVlan    {"vlanId": "10-11"} on "vyos-1/eth1" -> set interfaces ethernet eth1 vif 10, ... vif 11
+    removeVlan {"vlanId": "10"}    on "vyos-1/eth1" -> delete interfaces ethernet eth1 vif 10
+"""
+
+from collections import OrderedDict
+import json
+
+
+SET_VLAN = "setVlan"
+REMOVE_VLAN = "removeVlan"
+
+MIN_VLAN_ID = 1
+MAX_VLAN_ID = 4094
+
+VIF_PATH_TEMPLATE = "interfaces ethernet {interface} vif {vlan_id}"
+
+
+class ConnectivityAction(object):
+    def __init__(self, action_id, action_type, target, vlan_id):
+        """
+
+        :param str action_id:
+        :param str action_type: setVlan/removeVlan
+        :param str target: full name of the port, i.e. "vyos-1/eth1"
+        :param str vlan_id: VLAN ID, range or list of them, i.e. "10-12,20"
+        """
+        self.action_id = action_id
+        self.action_type = action_type
+        self.target = target
+        self.vlan_id = vlan_id
+
+    @property
+    def device(self):
+        """
+
+        :rtype: str
+        """
+        return self.target.split("/")[0]
+
+    @property
+    def interface(self):
+        """
+
+        :rtype: str
+        """
+        return self.target.split("/")[-1]
+
+    @property
+    def success_message(self):
+        """
+
+        :rtype: str
+        """
+        return "VLAN {} was {} on '{}'".format(self.vlan_id,
+                                               "removed" if self.action_type == REMOVE_VLAN else "configured",
+                                               self.target)
+
+    def get_commands(self):
+        """
+
+        :rtype: list[str]
+        """
+        operation = "set" if self.action_type == SET_VLAN else "delete"
+
+        return ["{} {}".format(operation, VIF_PATH_TEMPLATE.format(interface=self.interface, vlan_id=vlan_id))
+                for vlan_id in parse_vlan_ids(self.vlan_id)]
+
+
+def parse_vlan_ids(vlan_id):
+    """
+
+    :param str vlan_id: VLAN ID, range or list of them, i.e. "10-12,20"
+    :rtype: list[int]
+    """
+    vlan_ids = []
+
+    for item in str(vlan_id).split(","):
+        first, _, last = item.strip().partition("-")
+        try:
+            first = int(first)
+            last = int(last) if last else first
+        except ValueError:
+            raise Exception("Invalid VLAN ID '{}'".format(vlan_id))
+
+        if not MIN_VLAN_ID <= first <= last <= MAX_VLAN_ID:
+            raise Exception("VLAN ID '{}' is out of the {}-{} range".format(item.strip(), MIN_VLAN_ID, MAX_VLAN_ID))
+
+        vlan_ids.extend(range(first, last + 1))
+
+    return vlan_ids
+
+
+def parse_request(request):
+    """
+
+    :param str request: JSON request of the ApplyConnectivityChanges command
+    :rtype: list[ConnectivityAction]
+    """
+    actions = []
+
+    for action in json.loads(request)["driverRequest"]["actions"]:
+        if action["type"] not in (SET_VLAN, REMOVE_VLAN):
+            raise Exception("Unsupported connectivity action type '{}'".format(action["type"]))
+
+        actions.append(ConnectivityAction(action_id=action["actionId"],
+                                          action_type=action["type"],
+                                          target=action["actionTarget"]["fullName"],
+                                          vlan_id=action["connectionParams"]["vlanId"]))
+
+    return actions
+
+
+def group_by_device(actions):
+    """
+
+    :param list[ConnectivityAction] actions:
+    :rtype: collections.OrderedDict[str, list[ConnectivityAction]]
+    """
+    device_actions = OrderedDict()
+    for action in actions:
+        device_actions.setdefault(action.device, []).append(action)
+
+    return device_actions
+
+
+def build_action_result(action, success, message):
+    """
+
+    :param ConnectivityAction action:
+    :param bool success:
+    :param str message: info message on success, error message otherwise
+    :rtype: dict
+    """
+    return {"actionId": action.action_id,
+            "type": action.action_type,
+            "updatedInterface": action.target,
+            "infoMessage": message if success else "",
+            "errorMessage": "" if success else message,
+            "success": success}
+
+
+def build_response(action_results):
+    """
+
+    :param list[dict] action_results:
+    :rtype: str
+    """
+    return json.dumps({"driverResponse": {"actionResults": action_results}})
@@ -9,6 +9,11 @@ from pyVim.connect import SmartConnect
 from pyVim.connect import Disconnect
 import requests
 
+from vyos.guest_scheduler import guest_scheduler
+from vyos.logging_utils import CoalescingLogger
+from vyos import metrics
+from vyos import tracing
+
 
 VYOS_CLEAR_VNIC_ID_SCRIPT_PATH = "/config/scripts/clear-nic-hw-id.pl"
 PERL_PROGRAM_PATH = "/usr/bin/perl"
@@ -19,45 +24,74 @@ VCENTER_RESOURCE_PASSWORD_ATTR = "Password"
 VM_TOOLS_WAITING_TIMEOUT = 20 * 60
 VM_TOOLS_WAITING_INTERVAL = 10
 
+VM_SHUTDOWN_WAITING_TIMEOUT = 5 * 60
+# VMware Tools are down only for a part of the reboot, so the shutdown is polled more often than the tools readiness
+VM_SHUTDOWN_WAITING_INTERVAL = 2
+
 GUEST_OPERATIONS_WAITING_TIMEOUT = 20 * 60
 GUEST_OPERATIONS_WAITING_INTERVAL = 20
 
+GUEST_OPERATIONS_RETRIES = metrics.counter("vyos_guest_operations_retries_total",
+                                           "Retries of the guest operations after GuestOperationsUnavailable",
+                                           ("operation",))
+VM_TOOLS_POLLS = metrics.counter("vyos_vm_tools_polls_total", "Polls of the VM power and VMware Tools state")
+VCENTER_CALLS = metrics.counter("vyos_vcenter_calls_total", "vCenter API calls", ("call",))
+
 
 def wait_for_guest_operations(f, timeout=GUEST_OPERATIONS_WAITING_TIMEOUT, interval=GUEST_OPERATIONS_WAITING_INTERVAL):
     @wraps(f)
     def wrapper(self, *args, **kwargs):
         timeout_time = datetime.now() + timedelta(seconds=timeout)
+        retry_interval = getattr(self, "_guest_operations_interval", interval)
+        loop_logger = CoalescingLogger(self._logger)
+        attempt = 0
 
         while True:
+            attempt += 1
             try:
-                return f(self, *args, **kwargs)
-            except pyVmomi.vim.fault.GuestOperationsUnavailable:
-                self._logger.info("Unable to perform operation due to GuestOperationsUnavailable Exception",
-                                  exc_info=True)
+                with tracing.span("guest.attempt", operation=f.__name__, attempt=attempt):
+                    with guest_scheduler.slot(vcenter=getattr(self, "_vcenter_name", None),
+                                              host=getattr(self, "_esxi_host", None),
+                                              fault_types=(pyVmomi.vim.fault.GuestOperationsUnavailable,)):
+                        return f(self, *args, **kwargs)
+            except pyVmomi.vim.fault.GuestOperationsUnavailable as e:
+                loop_logger.report(str(e), "Unable to perform operation %s due to GuestOperationsUnavailable "
+                                           "Exception", f.__name__, exc_info=True)
+                GUEST_OPERATIONS_RETRIES.inc(operation=f.__name__)
 
                 if datetime.now() > timeout_time:
                     raise Exception("Unable to perform operation due to GuestOperationsUnavailable Exception "
                                     "within {} minute(s)".format(timeout / 60))
-            time.sleep(interval)
+
+            with tracing.span("guest.retry_sleep", operation=f.__name__, attempt=attempt, interval=retry_interval):
+                time.sleep(retry_interval)
 
     return wrapper
 
 
 class PostBootVMConfigureOperation(object):
-    def __init__(self, resource_config, cs_api, vcenter_name, logger):
+    def __init__(self, resource_config, cs_api, vcenter_name, logger, vcenter_service=None,
+                 vm_tools_interval=VM_TOOLS_WAITING_INTERVAL,
+                 guest_operations_interval=GUEST_OPERATIONS_WAITING_INTERVAL):
         """
 
         :param resource_config:
         :param cs_api:
         :param vcenter_name:
         :param logger:
+        :param vcenter_service: object with connect() and get_vm_by_uuid() methods, pyVmomiService by default
+        :param int vm_tools_interval: polling interval of the VMware Tools status
+        :param int guest_operations_interval: retry interval of the guest operations
         """
         self._resource_config = resource_config
         self._cs_api = cs_api
+        self._vcenter_name = vcenter_name
         self._logger = logger
-        self._vcenter_service = pyVmomiService(SmartConnect,
-                                               Disconnect,
-                                               task_waiter=None)
+        self._vm_tools_interval = vm_tools_interval
+        self._guest_operations_interval = guest_operations_interval
+        self._vcenter_service = vcenter_service or pyVmomiService(SmartConnect,
+                                                                  Disconnect,
+                                                                  task_waiter=None)
 
         self._vcenter_si = self._get_vcenter_si(vcenter_service=self._vcenter_service,
                                                 cs_api=cs_api,
@@ -70,6 +104,7 @@ class PostBootVMConfigureOperation(object):
         self._vm = self._get_vm(vcenter_service=self._vcenter_service,
                                 vm_uid=vm_uid)
 
+        self._esxi_host = self._get_esxi_host()
         self._vm_creds = self._get_vm_creds(resource_config=resource_config, cs_api=cs_api)
 
     @staticmethod
@@ -91,7 +126,8 @@ class PostBootVMConfigureOperation(object):
         :param logger:
         :return:
         """
-        deployed_vm_resource = cs_api.GetResourceDetails(resource_config.fullname)
+        with tracing.span("api.get_resource_details", resource=resource_config.fullname):
+            deployed_vm_resource = cs_api.GetResourceDetails(resource_config.fullname)
         vm_uid = deployed_vm_resource.VmDetails.UID
         logger.info("Deployed App VM uuid: {}".format(vm_uid))
 
@@ -104,7 +140,26 @@ class PostBootVMConfigureOperation(object):
         :param vm_uid:
         :return:
         """
-        return vcenter_service.get_vm_by_uuid(self._vcenter_si, vm_uid)
+        VCENTER_CALLS.inc(call="get_vm_by_uuid")
+        with tracing.span("vcenter.get_vm_by_uuid", vm_uid=vm_uid):
+            return vcenter_service.get_vm_by_uuid(self._vcenter_si, vm_uid)
+
+    def _get_esxi_host(self):
+        """Get identifier of the ESXi host the VM runs on, guest operations are throttled per host
+
+        :return: managed object ID of the host, None if it's unknown
+        :rtype: str
+        """
+        try:
+            host = self._vm.runtime.host
+        except Exception:
+            self._logger.debug("Unable to get ESXi host of the VM", exc_info=True)
+            return None
+
+        if host is None:
+            return None
+
+        return getattr(host, "_moId", None) or str(host)
 
     def _get_vcenter_si(self, cs_api, vcenter_service, vcenter_name):
         """
@@ -114,16 +169,21 @@ class PostBootVMConfigureOperation(object):
         :param vcenter_name:
         :return:
         """
-        vcenter_resource = cs_api.GetResourceDetails(resourceFullPath=vcenter_name)
+        with tracing.span("api.get_resource_details", resource=vcenter_name):
+            vcenter_resource = cs_api.GetResourceDetails(resourceFullPath=vcenter_name)
+
         user = self._get_cs_resource_attribute_value(resource=vcenter_resource,
                                                      attribute_name=VCENTER_RESOURCE_USER_ATTR)
 
         encrypted_password = self._get_cs_resource_attribute_value(resource=vcenter_resource,
                                                                    attribute_name=VCENTER_RESOURCE_PASSWORD_ATTR)
 
-        password = cs_api.DecryptPassword(encrypted_password).Value
+        with tracing.span("api.decrypt_password"):
+            password = cs_api.DecryptPassword(encrypted_password).Value
 
-        return vcenter_service.connect(address=vcenter_resource.Address, user=user, password=password)
+        VCENTER_CALLS.inc(call="connect")
+        with tracing.span("vcenter.connect", vcenter=vcenter_name, address=vcenter_resource.Address):
+            return vcenter_service.connect(address=vcenter_resource.Address, user=user, password=password)
 
     def _get_vm_creds(self, resource_config, cs_api):
         """
@@ -132,14 +192,15 @@ class PostBootVMConfigureOperation(object):
         :param cs_api:
         :rtype: pyVmomi.vim.vm.guest.NamePasswordAuthentication
         """
-        password = cs_api.DecryptPassword(resource_config.password).Value
+        with tracing.span("api.decrypt_password"):
+            password = cs_api.DecryptPassword(resource_config.password).Value
 
         return pyVmomi.vim.vm.guest.NamePasswordAuthentication(
             username=resource_config.user,
             password=password)
 
     @wait_for_guest_operations
-    def enable_ssh(self):
+    def _enable_ssh(self):
         """
 
         :return:
@@ -156,11 +217,21 @@ class PostBootVMConfigureOperation(object):
         cmdspec = pyVmomi.vim.vm.guest.ProcessManager.ProgramSpec(arguments=enable_ssh_command,
                                                                   programPath="/bin/bash")
 
-        self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
-                                                                                           auth=self._vm_creds,
-                                                                                           spec=cmdspec)
+        VCENTER_CALLS.inc(call="StartProgramInGuest")
+        with tracing.span("guest.start_program", resource=self._resource_config.fullname, program="/bin/bash"):
+            self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
+                                                                                               auth=self._vm_creds,
+                                                                                               spec=cmdspec)
         self._logger.info("Enabling SSH service on the Deployed VyOS VM command triggered")
 
+    def enable_ssh(self):
+        """
+
+        :return:
+        """
+        with tracing.span("vm.enable_ssh", resource=self._resource_config.fullname):
+            self._enable_ssh()
+
     def _get_vm_power_state(self):
         """
 
@@ -181,35 +252,88 @@ class PostBootVMConfigureOperation(object):
 
         return vm_power_state == pyVmomi.vim.VirtualMachine.PowerState.poweredOn
 
-    def wait_for_vm(self, timeout=VM_TOOLS_WAITING_TIMEOUT, interval=VM_TOOLS_WAITING_INTERVAL):
+    def wait_for_vm(self, timeout=VM_TOOLS_WAITING_TIMEOUT, interval=None):
         """
 
         :param int timeout:
-        :param int interval:
+        :param int interval: polling interval, vm_tools_interval of the operation by default
         :return:
         """
         self._logger.info("Waiting for Virtual Machine Tools to be ready")
+        interval = interval or self._vm_tools_interval
         timeout_time = datetime.now() + timedelta(seconds=timeout)
 
-        while self._vm.summary.runtime.powerState != pyVmomi.vim.VirtualMachine.PowerState.poweredOn \
-                or self._vm.guest.toolsStatus not in [pyVmomi.vim.VirtualMachineToolsStatus.toolsOk,
-                                                      pyVmomi.vim.VirtualMachineToolsStatus.toolsOld]\
-                or self._vm.guest.guestId is None:
-
-            self._logger.info("Waiting for Virtual Machine Tools. Current VM status is : {}. Tools status is {}"
-                              .format(self._vm.summary.runtime.powerState, self._vm.guest.toolsStatus))
+        loop_logger = CoalescingLogger(self._logger)
+
+        with tracing.span("vm.wait_for_tools", resource=self._resource_config.fullname) as phase:
+            polls = 0
+            while True:
+                # each property access is a vCenter call, so the state is read once per poll
+                power_state = self._vm.summary.runtime.powerState
+                guest = self._vm.guest
+                tools_status = guest.toolsStatus
+                polls += 1
+                phase.set(polls=polls)
+                VM_TOOLS_POLLS.inc()
+
+                if power_state == pyVmomi.vim.VirtualMachine.PowerState.poweredOn \
+                        and tools_status in [pyVmomi.vim.VirtualMachineToolsStatus.toolsOk,
+                                             pyVmomi.vim.VirtualMachineToolsStatus.toolsOld] \
+                        and guest.guestId is not None:
+                    break
+
+                loop_logger.report((power_state, tools_status),
+                                   "Waiting for Virtual Machine Tools. Current VM status is : %s. Tools status is %s",
+                                   power_state, tools_status)
 
-            if datetime.now() > timeout_time:
-                raise Exception("VM aren't ready within {} minute(s). Power state: {}. Tools status: {}"
-                                .format(timeout / 60,
-                                        self._vm.summary.runtime.powerState,
-                                        self._vm.guest.toolsStatus))
+                if datetime.now() > timeout_time:
+                    raise Exception("VM aren't ready within {} minute(s). Power state: {}. Tools status: {}"
+                                    .format(timeout / 60, power_state, tools_status))
 
-            time.sleep(interval)
+                time.sleep(interval)
 
         self._logger.info("Virtual Machine Tools are ready. Power state: {}. Tools status: {}".format(
-            self._vm.summary.runtime.powerState,
-            self._vm.guest.toolsStatus))
+            power_state,
+            tools_status))
+
+    def wait_for_vm_shutdown(self, boot_time, timeout=VM_SHUTDOWN_WAITING_TIMEOUT, interval=None):
+        """Wait until the rebooted guest goes down
+
+        RebootGuest() only initiates the reboot, for a while the guest keeps running with VMware Tools and SSH
+        available. The guest is down once the tools aren't running or the boot time of the VM has changed
+        (it's updated only when the VM is powered on, i.e. the guest was reset instead of the soft reboot).
+
+        :param datetime boot_time: boot time of the VM before the reboot, None if it's unknown
+        :param int timeout:
+        :param int interval: polling interval, the lower of VM_SHUTDOWN_WAITING_INTERVAL and vm_tools_interval
+            of the operation by default
+        """
+        self._logger.info("Waiting for Virtual Machine to shut down")
+        interval = interval or min(VM_SHUTDOWN_WAITING_INTERVAL, self._vm_tools_interval)
+        timeout_time = datetime.now() + timedelta(seconds=timeout)
+
+        with tracing.span("vm.wait_for_shutdown", resource=self._resource_config.fullname) as phase:
+            polls = 0
+            while True:
+                tools_status = self._vm.guest.toolsStatus
+                current_boot_time = self._vm.runtime.bootTime
+                polls += 1
+                phase.set(polls=polls)
+                VM_TOOLS_POLLS.inc()
+
+                if tools_status == pyVmomi.vim.VirtualMachineToolsStatus.toolsNotRunning:
+                    break
+
+                if boot_time is not None and current_boot_time is not None and current_boot_time != boot_time:
+                    break
+
+                if datetime.now() > timeout_time:
+                    raise Exception("VM didn't shut down within {} minute(s) after the reboot. Tools status: {}"
+                                    .format(timeout / 60, tools_status))
+
+                time.sleep(interval)
+
+        self._logger.info("Virtual Machine is rebooting. Tools status: {}".format(tools_status))
 
     @wait_for_guest_operations
     def _upload_custom_script(self, local_script_path, remote_script_path):
@@ -225,17 +349,22 @@ class PostBootVMConfigureOperation(object):
             script_content = script_file.read()
 
         file_attribute = pyVmomi.vim.vm.guest.FileManager.FileAttributes()
+        VCENTER_CALLS.inc(call="RetrieveContent")
         si_content = self._vcenter_si.RetrieveContent()
 
         try:
-            url = si_content.guestOperationsManager.fileManager.InitiateFileTransferToGuest(
-                self._vm, self._vm_creds, VYOS_CLEAR_VNIC_ID_SCRIPT_PATH, file_attribute, len(script_content), True)
+            VCENTER_CALLS.inc(call="InitiateFileTransferToGuest")
+            with tracing.span("guest.initiate_file_transfer", resource=self._resource_config.fullname):
+                url = si_content.guestOperationsManager.fileManager.InitiateFileTransferToGuest(
+                    self._vm, self._vm_creds, VYOS_CLEAR_VNIC_ID_SCRIPT_PATH, file_attribute, len(script_content),
+                    True)
         except Exception as e:
             self._logger.exception("Unable to upload script file '{}' due to: {}".format(local_script_path, e))
             raise
 
-        resp = requests.put(url=url, data=script_content, verify=False)
-        resp.raise_for_status()
+        with tracing.span("guest.file_upload", resource=self._resource_config.fullname, size=len(script_content)):
+            resp = requests.put(url=url, data=script_content, verify=False)
+            resp.raise_for_status()
 
         self._logger.info("Changing permissions to 755 for script '{}'".format(remote_script_path))
 
@@ -243,9 +372,11 @@ class PostBootVMConfigureOperation(object):
             arguments="755 {}".format(VYOS_CLEAR_VNIC_ID_SCRIPT_PATH),
             programPath="/bin/chmod")
 
-        self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
-                                                                                           auth=self._vm_creds,
-                                                                                           spec=cmdspec)
+        VCENTER_CALLS.inc(call="StartProgramInGuest")
+        with tracing.span("guest.start_program", resource=self._resource_config.fullname, program="/bin/chmod"):
+            self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
+                                                                                               auth=self._vm_creds,
+                                                                                               spec=cmdspec)
 
         self._logger.info("Script '{}' was uploaded as '{}'".format(local_script_path, remote_script_path))
 
@@ -262,9 +393,11 @@ class PostBootVMConfigureOperation(object):
             arguments=remote_script_path,
             programPath=program_path)
 
-        self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
-                                                                                           auth=self._vm_creds,
-                                                                                           spec=cmdspec)
+        VCENTER_CALLS.inc(call="StartProgramInGuest")
+        with tracing.span("guest.start_program", resource=self._resource_config.fullname, program=program_path):
+            self._vcenter_si.content.guestOperationsManager.processManager.StartProgramInGuest(vm=self._vm,
+                                                                                               auth=self._vm_creds,
+                                                                                               spec=cmdspec)
 
         self._logger.info("Script '{} {}' was started".format(program_path, remote_script_path))
 
@@ -274,22 +407,40 @@ class PostBootVMConfigureOperation(object):
         :param str script_path:
         :return:
         """
-        self._upload_custom_script(local_script_path=script_path,
-                                   remote_script_path=VYOS_CLEAR_VNIC_ID_SCRIPT_PATH)
+        with tracing.span("vm.upload_script", resource=self._resource_config.fullname):
+            self._upload_custom_script(local_script_path=script_path,
+                                       remote_script_path=VYOS_CLEAR_VNIC_ID_SCRIPT_PATH)
 
-        self._execute_custom_script(remote_script_path=VYOS_CLEAR_VNIC_ID_SCRIPT_PATH,
-                                    program_path=PERL_PROGRAM_PATH)
+        with tracing.span("vm.execute_script", resource=self._resource_config.fullname):
+            self._execute_custom_script(remote_script_path=VYOS_CLEAR_VNIC_ID_SCRIPT_PATH,
+                                        program_path=PERL_PROGRAM_PATH)
+
+    def get_guest_ip_address(self):
+        """Get IP address of the VM reported by the VMware Tools
+
+        :return: IP address, None if tools didn't report it yet
+        :rtype: str
+        """
+        return self._vm.guest.ipAddress
 
     def reboot_vm(self, wait_for_vm=True):
         """
 
-        :param bool wait_for_vm:
+        :param bool wait_for_vm: wait until the guest goes down and VMware Tools are ready again
         :return:
         """
         self._logger.info("Rebooting VM...")
-        self._vm.RebootGuest()
-
-        if wait_for_vm:
-            self.wait_for_vm()
+        with tracing.span("vm.reboot", resource=self._resource_config.fullname):
+            boot_time = self._vm.runtime.bootTime
+
+            with guest_scheduler.slot(vcenter=self._vcenter_name,
+                                      host=self._esxi_host,
+                                      fault_types=(pyVmomi.vim.fault.GuestOperationsUnavailable,)):
+                VCENTER_CALLS.inc(call="RebootGuest")
+                self._vm.RebootGuest()
+
+            if wait_for_vm:
+                self.wait_for_vm_shutdown(boot_time=boot_time)
+                self.wait_for_vm()
 
         self._logger.info("VM was successfully rebooted")
@@ -0,0 +1,211 @@
+"""Detection of the configuration drift from the Configuration File the router was deployed with
+
+Running configuration isn't transferred on every check: the device hashes its normalized configuration and only
+that digest is compared with the digest of the baseline file. Full configuration is read only when digests differ
+and then the line-level diff is built.
+
+Both sides are normalized the same way, so the digests match for the equal configurations:
+    - comment lines (i.e. "/* === vyatta-config-version: ... === */") are removed
+    - trailing whitespace is removed
+    - values of the secrets are replaced with the mask, the device shows them masked
+      (i.e. "encrypted-password ****************") while the baseline file has the real values
+    - empty lines are removed
+
+Checks of the devices are spread over the time window with stable per-device offsets, so the periodic checks of
+the same device happen at the same phase of the period, and all checks of the driver process share the global
+concurrency limit.
+"""
+
+import difflib
+import hashlib
+from multiprocessing.pool import ThreadPool
+import re
+import threading
+import time
+import zlib
+
+from vyos import metrics
+
+
+DRIFT_MAX_CONCURRENCY = 8
+DRIFT_MAX_WORKERS = 32
+BASELINE_CACHE_TTL = 10 * 60
+DIFF_CONTEXT_LINES = 3
+
+SECRET_MASK = "****************"
+
+# keep in sync with normalize_config()
+NORMALIZE_CONFIG_PIPELINE = (r"sed -e '/^[[:space:]]*\/\*.*\*\/[[:space:]]*$/d' -e 's/[[:space:]]*$//'"
+                             r" -e 's/^\([[:space:]]*\(encrypted-password\|plaintext-password\|password"
+                             r"\|pre-shared-secret\|secret\)\)[[:space:]].*$/\1 " + SECRET_MASK + r"/'"
+                             r" -e '/^$/d' | sha256sum")
+
+COMMENT_LINE_RE = re.compile(r"^\s*/\*.*\*/\s*$")
+SECRET_LINE_RE = re.compile(r"^(\s*(?:encrypted-password|plaintext-password|password|pre-shared-secret|secret))"
+                            r"\s.*$")
+DIGEST_RE = re.compile(r"\b([0-9a-f]{64})\b")
+
+DRIFT_CHECKS = metrics.counter("vyos_drift_checks_total", "Configuration drift checks by result", ("result",))
+
+
+def normalize_config(config):
+    """
+
+    :param str config: configuration in the config.boot format
+    :rtype: list[str]
+    """
+    lines = []
+    for line in config.splitlines():
+        line = line.rstrip()
+        if line and not COMMENT_LINE_RE.match(line):
+            lines.append(SECRET_LINE_RE.sub(r"\1 " + SECRET_MASK, line))
+
+    return lines
+
+
+def get_config_digest(config):
+    """Digest of the normalized configuration, the same as the device calculates with NORMALIZE_CONFIG_PIPELINE
+
+    :param str config: configuration in the config.boot format
+    :rtype: str
+    """
+    lines = normalize_config(config)
+    data = "".join(line + "\n" for line in lines)
+
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def parse_digest(output):
+    """
+
+    :param str output: output of the digest command, i.e. "1f2e...9a  -"
+    :rtype: str
+    """
+    match = DIGEST_RE.search(output)
+    if match is None:
+        raise Exception("Unable to get configuration digest from the output: {}".format(output))
+
+    return match.group(1)
+
+
+def diff_configs(baseline, running, baseline_name="baseline", running_name="running"):
+    """Line-level diff of the normalized configurations
+
+    :param str baseline:
+    :param str running:
+    :param str baseline_name: name of the baseline in the diff header, i.e. URL of the Configuration File
+    :param str running_name:
+    :rtype: str
+    """
+    return "\n".join(difflib.unified_diff(normalize_config(baseline),
+                                          normalize_config(running),
+                                          fromfile=baseline_name,
+                                          tofile=running_name,
+                                          n=DIFF_CONTEXT_LINES,
+                                          lineterm=""))
+
+
+class BaselineCache(object):
+    def __init__(self, ttl=BASELINE_CACHE_TTL):
+        """Downloaded baseline files with their digests, routers deployed from the same file share the entry
+
+        :param int ttl: seconds the file stays valid
+        """
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._baselines = {}
+
+    def get(self, url, download):
+        """
+
+        :param str url: Configuration File URL
+        :param download: function(url) -> file content
+        :return: baseline configuration and its digest
+        :rtype: tuple[str, str]
+        """
+        with self._lock:
+            expires_at, baseline = self._baselines.get(url, (0, None))
+
+        if expires_at < time.time():
+            config = download(url)
+            if isinstance(config, bytes):
+                config = config.decode("utf-8", "replace")
+
+            baseline = (config, get_config_digest(config))
+            with self._lock:
+                self._baselines[url] = (time.time() + self._ttl, baseline)
+
+        return baseline
+
+
+def get_schedule_offset(name, window):
+    """Stable offset of the device check within the time window
+
+    :param str name: resource name
+    :param float window: seconds
+    :rtype: float
+    """
+    if not window:
+        return 0
+
+    return (zlib.crc32(name.encode("utf-8")) & 0xffffffff) % 10000 / 10000.0 * window
+
+
+class DriftScheduler(object):
+    def __init__(self, max_concurrency=DRIFT_MAX_CONCURRENCY):
+        """Run drift checks spread over the time window with the concurrency limit shared by all callers
+
+        :param int max_concurrency: max number of devices checked at the same time by the driver process
+        """
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)
+
+    def run(self, resource_configs, check, logger, window=0, max_workers=DRIFT_MAX_WORKERS):
+        """
+
+        :param list[vyos.configuration_attributes_structure.VyOSResource] resource_configs:
+        :param check: function(resource_config) -> dict with the "drifted" key
+        :param logging.Logger logger:
+        :param float window: seconds to spread the device checks over
+        :param int max_workers: max number of devices waiting for their turn at the same time
+        :return: results per resource and summary
+        :rtype: tuple[list[dict], dict]
+        """
+        start_time = time.time()
+
+        def check_resource(resource_config):
+            time.sleep(max(start_time + get_schedule_offset(resource_config.fullname, window) - time.time(), 0))
+            result = {"resource": resource_config.fullname, "success": True, "error": None, "drifted": None}
+
+            with self._semaphore:
+                check_start_time = time.time()
+                try:
+                    result.update(check(resource_config))
+                except Exception as e:
+                    logger.exception("Failed to check configuration drift of '{}'".format(resource_config.fullname))
+                    result.update(success=False, error=str(e))
+
+            result["duration"] = round(time.time() - check_start_time, 3)
+            DRIFT_CHECKS.inc(result="error" if not result["success"] else
+                             "drifted" if result["drifted"] else "in_sync")
+            return result
+
+        results = []
+        if resource_configs:
+            pool = ThreadPool(max(min(max_workers, len(resource_configs)), 1))
+            try:
+                results = pool.map(check_resource, resource_configs)
+            finally:
+                pool.close()
+                pool.join()
+
+        summary = {"resources": len(results),
+                   "in_sync": len([result for result in results if result["success"] and not result["drifted"]]),
+                   "drifted": len([result for result in results if result["drifted"]]),
+                   "failed": len([result for result in results if not result["success"]]),
+                   "wall_time": round(time.time() - start_time, 3)}
+
+        return results, summary
+
+
+baseline_cache = BaselineCache()
+drift_scheduler = DriftScheduler()
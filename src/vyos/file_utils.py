@@ -0,0 +1,122 @@
+"""Atomic replacement of the files shared between the driver processes
+
+os.rename fails on Windows when the target exists, os.replace is available only on Python 3. Files are written
+to a temporary file in the same directory and moved over the target under an exclusive lock of the "<path>.lock"
+file, so the processes that read, merge and rewrite the same file under that lock don't lose each other's updates.
+"""
+
+from contextlib import contextmanager
+import errno
+import os
+import tempfile
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+
+LOCK_SUFFIX = ".lock"
+LOCK_TIMEOUT = 10
+LOCK_RETRY_INTERVAL = 0.05
+
+
+def _try_lock(lock_file):
+    """
+
+    :param file lock_file:
+    :return: whether the lock was acquired
+    :rtype: bool
+    """
+    try:
+        if fcntl is not None:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+    except (IOError, OSError) as e:
+        if e.errno in (errno.EACCES, errno.EAGAIN, errno.EDEADLK):
+            return False
+        raise
+
+    return True
+
+
+def _unlock(lock_file):
+    """
+
+    :param file lock_file:
+    """
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+    else:
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+@contextmanager
+def file_lock(path, timeout=LOCK_TIMEOUT):
+    """Exclusive lock of the file between processes, the "<path>.lock" file is used as the lock
+
+    :param str path: locked file
+    :param float timeout: seconds to wait for the lock
+    :raise IOError: if lock isn't acquired within the timeout
+    """
+    with open(path + LOCK_SUFFIX, "a+") as lock_file:
+        deadline = time.time() + timeout
+
+        while not _try_lock(lock_file):
+            if time.time() > deadline:
+                raise IOError(errno.ETIMEDOUT, "Unable to lock file within {} sec".format(timeout), path)
+            time.sleep(LOCK_RETRY_INTERVAL)
+
+        try:
+            yield
+        finally:
+            _unlock(lock_file)
+
+
+def replace_file(source, destination):
+    """Move file over the existing one, the caller is expected to hold file_lock(destination) on Windows
+
+    :param str source:
+    :param str destination:
+    """
+    if hasattr(os, "replace"):
+        os.replace(source, destination)
+        return
+
+    try:
+        os.rename(source, destination)
+    except OSError:
+        if not os.path.exists(destination):
+            raise
+        # Windows doesn't overwrite on rename
+        os.remove(destination)
+        os.rename(source, destination)
+
+
+def write_file(path, data, mode=None):
+    """Write file through the temporary file, so readers never see it partially written
+
+    On Windows with Python 2 the file is missing for a moment while it's replaced (see replace_file)
+
+    :param str path:
+    :param bytes data:
+    :param int mode: permissions of the file, i.e. 0o644, mkstemp makes it readable by the owner only
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    file_descriptor, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as tmp_file:
+            tmp_file.write(data)
+        if mode is not None:
+            os.chmod(tmp_path, mode)
+        replace_file(tmp_path, path)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -2,11 +2,11 @@ from random import randint
 import re
 
 
-from cloudshell.cli.command_template.command_template_executor import CommandTemplateExecutor
 from cloudshell.devices.autoload.autoload_builder import AutoloadDetailsBuilder
 
 from vyos.autoload import models
 from vyos.cli import command_templates
+from vyos.cli.command_template_executor import VyOSCommandTemplateExecutor
 
 
 class VyOSAutoloadFlow(object):
@@ -27,9 +27,9 @@ class VyOSAutoloadFlow(object):
         :return:
         """
         with self._cli_handler.get_cli_service(self._cli_handler.default_mode) as session:
-            output = CommandTemplateExecutor(session,
-                                             command_templates.SHOW_INTERFACES,
-                                             ).execute_command()
+            output = VyOSCommandTemplateExecutor(session,
+                                                 command_templates.SHOW_INTERFACES,
+                                                 ).execute_command()
 
             root_resource = models.GenericDeployedApp(shell_name=self._resource_config.shell_name,
                                                       name="VyOS Deployed App",
@@ -0,0 +1,60 @@
+from vyos.command_actions.config_transaction import ConfigTransaction
+from vyos.networking_utils import is_ssh_available
+from vyos import metrics
+
+
+CONFIG_TRANSACTIONS = metrics.counter("vyos_config_transactions_total", "Configuration transactions by result",
+                                      ("status",))
+
+
+class VyOSConfigTransactionFlow(object):
+    def __init__(self, cli_handler, resource_config, logger):
+        """
+
+        :param cli_handler:
+        :param resource_config:
+        :param logger:
+        """
+        self._cli_handler = cli_handler
+        self._resource_config = resource_config
+        self._logger = logger
+
+    def _verify_management_path(self):
+        """Check that management address still answers on the CLI port after the commit
+
+        Only the SSH server identification string is checked: it proves the management address and routing, but
+        not that the new configuration allows to log in and run commands
+
+        :rtype: bool
+        """
+        return is_ssh_available(address=self._resource_config.address,
+                                port=self._resource_config.cli_tcp_port)
+
+    def execute_flow(self, commands, confirm_minutes=None):
+        """Apply 'set'/'delete' commands as one transaction with a single commit
+
+        :param list[str] commands: 'set ...' and 'delete ...' commands
+        :param int confirm_minutes: use 'commit-confirm' and confirm changes after management path verification
+        """
+        status = "error"
+        try:
+            self._apply(commands=commands, confirm_minutes=confirm_minutes)
+            status = "ok"
+        finally:
+            CONFIG_TRANSACTIONS.inc(status=status)
+
+    def _apply(self, commands, confirm_minutes):
+        """
+
+        :param list[str] commands:
+        :param int confirm_minutes:
+        """
+        with self._cli_handler.get_cli_service(self._cli_handler.config_mode) as config_session:
+            with ConfigTransaction(cli_service=config_session,
+                                   logger=self._logger,
+                                   confirm_minutes=confirm_minutes,
+                                   verify_callback=self._verify_management_path,
+                                   resource_name=self._resource_config.fullname) as transaction:
+                for command in commands:
+                    if command.strip():
+                        transaction.add(command)
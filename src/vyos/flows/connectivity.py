@@ -0,0 +1,66 @@
+from multiprocessing.pool import ThreadPool
+
+from vyos.command_actions.config_transaction import ConfigTransaction
+from vyos.connectivity import build_action_result
+
+
+CONNECTIVITY_MAX_WORKERS = 8
+
+
+class VyOSApplyConnectivityChangesFlow(object):
+    def __init__(self, get_cli_handler, logger, max_workers=CONNECTIVITY_MAX_WORKERS):
+        """
+
+        :param get_cli_handler: function(resource_config) -> VyOSCliHandler
+        :param logger:
+        :param int max_workers: max number of devices configured at the same time
+        """
+        self._get_cli_handler = get_cli_handler
+        self._logger = logger
+        self._max_workers = max_workers
+
+    def _apply_device_actions(self, resource_config, actions):
+        """Apply all actions of the device in one configuration session with a single commit
+
+        :param vyos.configuration_attributes_structure.VyOSResource resource_config:
+        :param list[vyos.connectivity.ConnectivityAction] actions:
+        :return: results per action
+        :rtype: list[dict]
+        """
+        try:
+            cli_handler = self._get_cli_handler(resource_config)
+
+            with cli_handler.get_cli_service(cli_handler.config_mode) as config_session:
+                with ConfigTransaction(cli_service=config_session,
+                                       logger=self._logger,
+                                       resource_name=resource_config.fullname) as transaction:
+                    for action in actions:
+                        for command in action.get_commands():
+                            transaction.add(command)
+        except Exception as e:
+            self._logger.exception("Failed to apply connectivity changes on '{}'".format(resource_config.fullname))
+            return [build_action_result(action=action, success=False, message=str(e)) for action in actions]
+
+        self._logger.info("{} connectivity action(s) applied on '{}'".format(len(actions), resource_config.fullname))
+
+        return [build_action_result(action=action, success=True, message=action.success_message)
+                for action in actions]
+
+    def execute_flow(self, device_actions):
+        """Apply actions of the devices in parallel, each device is committed once
+
+        :param list[tuple[VyOSResource, list[vyos.connectivity.ConnectivityAction]]] device_actions:
+        :return: results per action
+        :rtype: list[dict]
+        """
+        if not device_actions:
+            return []
+
+        pool = ThreadPool(max(min(self._max_workers, len(device_actions)), 1))
+        try:
+            device_results = pool.map(lambda item: self._apply_device_actions(*item), device_actions)
+        finally:
+            pool.close()
+            pool.join()
+
+        return [result for results in device_results for result in results]
@@ -0,0 +1,40 @@
+from vyos.command_actions.system_actions import SystemActions
+from vyos import drift
+
+
+class VyOSDriftDetectionFlow(object):
+    def __init__(self, cli_handler, logger):
+        """
+
+        :param cli_handler:
+        :param logger:
+        """
+        self._cli_handler = cli_handler
+        self._logger = logger
+
+    def execute_flow(self, baseline, baseline_digest, baseline_name="baseline"):
+        """Compare digest of the running configuration with the baseline one, build the diff only if they differ
+
+        :param str baseline: baseline configuration in the config.boot format
+        :param str baseline_digest: digest of the baseline configuration
+        :param str baseline_name: name of the baseline in the diff header
+        :rtype: dict
+        """
+        with self._cli_handler.get_cli_service(self._cli_handler.default_mode) as session:
+            system_actions = SystemActions(session, self._logger)
+            running_digest = system_actions.get_running_config_digest()
+
+            if running_digest == baseline_digest:
+                self._logger.info("Running configuration matches the baseline, digest {}".format(running_digest))
+                return {"drifted": False, "running_digest": running_digest, "baseline_digest": baseline_digest,
+                        "diff": None}
+
+            self._logger.info("Running configuration digest {} differs from the baseline digest {}, reading the "
+                              "running configuration".format(running_digest, baseline_digest))
+            running = system_actions.get_running_config()
+
+        diff = drift.diff_configs(baseline=baseline, running=running, baseline_name=baseline_name,
+                                  running_name="running-config")
+
+        return {"drifted": bool(diff), "running_digest": running_digest, "baseline_digest": baseline_digest,
+                "diff": diff or None}
@@ -17,7 +17,8 @@ class VyOSRestoreFlow(RestoreConfigurationFlow):
         :param vrf_management_name: Virtual Routing and Forwarding Name
         """
         with self._cli_handler.get_cli_service(self._cli_handler.config_mode) as config_session:
-            sys_actions = SystemActions(config_session, self._logger)
+            sys_actions = SystemActions(config_session, self._logger,
+                                        resource_name=getattr(self._cli_handler, "resource_name", None))
             load_action_map = sys_actions.prepare_action_map(path, configuration_type)
             sys_actions.load(path=path,
                              action_map=load_action_map)
@@ -0,0 +1,33 @@
+from vyos.command_actions.batch_actions import ConfigBatchActions
+from vyos.command_actions.batch_actions import prepare_batch_commands
+
+
+class VyOSRunConfigBatchFlow(object):
+    def __init__(self, cli_handler, logger):
+        """
+
+        :param cli_handler:
+        :param logger:
+        """
+        self._cli_handler = cli_handler
+        self._logger = logger
+
+    def execute_flow(self, commands):
+        """Apply configuration commands in one configuration session with a single commit
+
+        :param list[str] commands: configuration mode commands
+        :return: results per command, last one is the commit result
+        :rtype: list[dict]
+        """
+        batch_commands, save = prepare_batch_commands(commands)
+
+        with self._cli_handler.get_cli_service(self._cli_handler.default_mode) as session:
+            results = ConfigBatchActions(session, self._logger).apply(commands=batch_commands, save=save)
+
+        failed = [result for result in results if not result["success"]]
+        if failed:
+            self._logger.error("Configuration batch failed. Results: {}".format(results))
+            raise Exception("Configuration batch failed on command '{}': {}. Changes were not committed"
+                            .format(failed[0]["command"], failed[0]["output"] or "no output"))
+
+        return results
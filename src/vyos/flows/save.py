@@ -1,6 +1,20 @@
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+import time
+
 from cloudshell.devices.flows.action_flows import SaveConfigurationFlow
 
 from vyos.command_actions.system_actions import SystemActions
+from vyos.file_transfer.clients import DEFAULT_TRANSFER_TIMEOUT
+from vyos.file_transfer.clients import upload_file
+from vyos import metrics
+
+
+FAN_OUT_MAX_WORKERS = 4
+FAN_OUT_TIMEOUT = 5 * 60
+
+CONFIG_UPLOADS = metrics.histogram("vyos_config_upload_seconds", "Uploads of the running configuration by result",
+                                   ("status",))
 
 
 class VyOSSaveFlow(SaveConfigurationFlow):
@@ -12,7 +26,86 @@ class VyOSSaveFlow(SaveConfigurationFlow):
         """
 
         with self._cli_handler.get_cli_service(self._cli_handler.config_mode) as config_session:
-            save_action = SystemActions(config_session, self._logger)
+            save_action = SystemActions(config_session, self._logger,
+                                        resource_name=getattr(self._cli_handler, "resource_name", None))
             action_map = save_action.prepare_action_map(configuration_type, folder_path)
             save_action.save(destination=folder_path,
                              action_map=action_map)
+
+
+class VyOSFanOutSaveFlow(object):
+    def __init__(self, cli_handler, logger, max_workers=FAN_OUT_MAX_WORKERS, timeout=FAN_OUT_TIMEOUT,
+                 transfer_timeout=DEFAULT_TRANSFER_TIMEOUT):
+        """
+
+        :param cli_handler:
+        :param logger:
+        :param int max_workers: max number of parallel uploads
+        :param int timeout: overall time to wait for all uploads
+        :param int transfer_timeout: socket timeout for the each upload
+        """
+        self._cli_handler = cli_handler
+        self._logger = logger
+        self._max_workers = max_workers
+        self._timeout = timeout
+        self._transfer_timeout = transfer_timeout
+
+    def _read_running_config(self):
+        """
+
+        :rtype: str
+        """
+        with self._cli_handler.get_cli_service(self._cli_handler.default_mode) as session:
+            return SystemActions(session, self._logger).get_running_config()
+
+    def _upload(self, destination, config):
+        """
+
+        :param str destination:
+        :param str config:
+        :rtype: dict
+        """
+        start_time = time.time()
+        result = {"destination": destination, "success": True, "error": None}
+
+        try:
+            upload_file(destination=destination, data=config, timeout=self._transfer_timeout)
+        except Exception as e:
+            self._logger.exception("Failed to upload configuration to '{}'".format(destination))
+            result.update(success=False, error=str(e))
+
+        result["duration"] = round(time.time() - start_time, 3)
+        CONFIG_UPLOADS.observe(time.time() - start_time, status="ok" if result["success"] else "error")
+        return result
+
+    def execute_flow(self, destinations):
+        """Read running configuration from the device once and upload it to all destinations in parallel
+
+        :param list[str] destinations: full destination paths
+        :return: results per destination
+        :rtype: list[dict]
+        """
+        config = self._read_running_config()
+        self._logger.info("Running configuration was read from the device ({} bytes), uploading it to {} "
+                          "destination(s)".format(len(config), len(destinations)))
+
+        pool = ThreadPool(processes=min(self._max_workers, len(destinations)))
+        try:
+            async_results = [pool.apply_async(self._upload, (destination, config)) for destination in destinations]
+            deadline = time.time() + self._timeout
+            results = []
+
+            for destination, async_result in zip(destinations, async_results):
+                try:
+                    results.append(async_result.get(timeout=max(deadline - time.time(), 0)))
+                except TimeoutError:
+                    self._logger.error("Upload to '{}' didn't finish within {} second(s)"
+                                       .format(destination, self._timeout))
+                    results.append({"destination": destination,
+                                    "success": False,
+                                    "error": "Upload didn't finish within {} second(s)".format(self._timeout),
+                                    "duration": self._timeout})
+        finally:
+            pool.close()
+
+        return results
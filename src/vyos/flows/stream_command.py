@@ -0,0 +1,74 @@
+from vyos.command_actions.stream_actions import STREAM_CHUNK_LINES
+from vyos.command_actions.stream_actions import StreamActions
+from vyos.streaming import DEFAULT_SUMMARY_SIZE
+from vyos.streaming import IncrementalDetector
+from vyos.streaming import OutputSpool
+from vyos import metrics
+
+
+STREAMED_OUTPUT = metrics.counter("vyos_streamed_output_characters_total",
+                                  "Characters of the command outputs streamed from the devices")
+
+
+class VyOSStreamCommandFlow(object):
+    def __init__(self, cli_handler, logger, chunk_lines=STREAM_CHUNK_LINES, summary_size=DEFAULT_SUMMARY_SIZE):
+        """
+
+        :param cli_handler:
+        :param logger:
+        :param int chunk_lines: number of output lines read from the device per round trip
+        :param int summary_size: outputs up to this size are returned as is
+        """
+        self._cli_handler = cli_handler
+        self._logger = logger
+        self._chunk_lines = chunk_lines
+        self._summary_size = summary_size
+
+    def execute_flow(self, commands, error_map=None, spool=True):
+        """Run commands with the outputs streamed from the device, memory usage doesn't depend on the output size
+
+        :param list[str] commands:
+        :param collections.OrderedDict error_map: patterns detected in the output, none by default. Outputs
+            are not checked for the error strings, as "show log" and similar commands print them as the content;
+            the command fails if it exits with the non-zero status
+        :param bool spool: write full outputs to the local spool files
+        :return: output summaries, outputs larger than summary size are truncated with a spool file reference
+        :rtype: list[str]
+        """
+        summaries = []
+
+        with self._cli_handler.get_cli_service(self._cli_handler.default_mode) as session:
+            stream_actions = StreamActions(session, self._logger)
+
+            for command in commands:
+                detector = IncrementalDetector(error_map or {})
+
+                chunks = stream_actions.stream_output(command=command, chunk_lines=self._chunk_lines)
+
+                with OutputSpool(spool=spool, summary_size=self._summary_size) as output_spool:
+                    try:
+                        for chunk in chunks:
+                            detector.feed(chunk)
+                            output_spool.write(chunk)
+                    finally:
+                        chunks.close()
+
+                STREAMED_OUTPUT.inc(output_spool.size)
+                self._logger.info("Command '{}' output: {} character(s), spooled to {}"
+                                  .format(command, output_spool.size, output_spool.path))
+
+                if stream_actions.exit_status:
+                    raise Exception("Command '{}' exited with status {}, output: {}".format(command,
+                                                                                        stream_actions.exit_status,
+                                                                                        output_spool.path or
+                                                                                        output_spool.summary()))
+
+                if detector.matched:
+                    raise Exception("{}. Command: '{}', output: {}".format(detector.first_message,
+                                                                          command,
+                                                                          output_spool.path or
+                                                                          output_spool.summary()))
+
+                summaries.append(output_spool.summary())
+
+        return summaries
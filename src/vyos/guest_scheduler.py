@@ -0,0 +1,162 @@
+"""Throttling of the concurrent guest operations per ESXi host and per vCenter
+
+Guest operations (InitiateFileTransferToGuest, StartProgramInGuest, RebootGuest) of many VMs landing on the same
+ESXi host at once overload hostd and VMware Tools, which answer with GuestOperationsUnavailable. Each operation
+takes a slot of its host and a slot of its vCenter, operations above the limits wait in FIFO order.
+
+Limits are adjusted with AIMD: each successful operation increases the limit by 1/limit (so by one per "limit"
+successes), each GuestOperationsUnavailable fault halves it.
+"""
+
+from collections import deque
+from contextlib import contextmanager
+import threading
+import time
+
+from vyos import metrics
+
+
+HOST_INITIAL_LIMIT = 2
+HOST_MAX_LIMIT = 8
+VCENTER_INITIAL_LIMIT = 8
+VCENTER_MAX_LIMIT = 32
+MIN_LIMIT = 1
+DECREASE_FACTOR = 0.5
+
+GUEST_OPERATIONS_WAIT = metrics.histogram("vyos_guest_operations_wait_seconds",
+                                          "Time guest operations waited for a slot of their ESXi host and vCenter")
+GUEST_OPERATIONS_THROTTLED = metrics.counter("vyos_guest_operations_throttled_total",
+                                             "Decreases of the guest operations limit after faults", ("scope",))
+
+
+class AdaptiveLimiter(object):
+    def __init__(self, initial=HOST_INITIAL_LIMIT, minimum=MIN_LIMIT, maximum=HOST_MAX_LIMIT,
+                 decrease_factor=DECREASE_FACTOR):
+        """Concurrency limit with the FIFO queue of the waiters, adjusted by the results of the operations
+
+        :param int initial: initial number of operations in flight
+        :param int minimum:
+        :param int maximum:
+        :param float decrease_factor: limit is multiplied by it after a fault
+        """
+        self._limit = float(initial)
+        self._minimum = minimum
+        self._maximum = maximum
+        self._decrease_factor = decrease_factor
+        self._condition = threading.Condition()
+        self._queue = deque()
+        self.in_flight = 0
+
+    @property
+    def limit(self):
+        """
+
+        :rtype: int
+        """
+        return int(self._limit)
+
+    def acquire(self):
+        ticket = object()
+
+        with self._condition:
+            self._queue.append(ticket)
+            while self._queue[0] is not ticket or self.in_flight >= self.limit:
+                self._condition.wait()
+
+            self._queue.popleft()
+            self.in_flight += 1
+            self._condition.notify_all()
+
+    def release(self, success=None):
+        """
+
+        :param bool success: True to increase the limit, False to decrease it, None to keep it
+        :return: True if the limit was decreased
+        :rtype: bool
+        """
+        with self._condition:
+            self.in_flight -= 1
+            decreased = False
+
+            if success:
+                self._limit = min(self._limit + 1.0 / self._limit, self._maximum)
+            elif success is not None:
+                limit = max(self._limit * self._decrease_factor, self._minimum)
+                decreased = int(limit) < self.limit
+                self._limit = limit
+
+            self._condition.notify_all()
+
+        return decreased
+
+
+class GuestOperationsScheduler(object):
+    def __init__(self, host_initial=HOST_INITIAL_LIMIT, host_max=HOST_MAX_LIMIT,
+                 vcenter_initial=VCENTER_INITIAL_LIMIT, vcenter_max=VCENTER_MAX_LIMIT):
+        """Limiters of the guest operations per ESXi host and per vCenter, shared by all VMs of the driver process
+
+        :param int host_initial: initial number of operations in flight per ESXi host
+        :param int host_max:
+        :param int vcenter_initial: initial number of operations in flight per vCenter
+        :param int vcenter_max:
+        """
+        self._host_initial = host_initial
+        self._host_max = host_max
+        self._vcenter_initial = vcenter_initial
+        self._vcenter_max = vcenter_max
+        self._lock = threading.Lock()
+        self._limiters = {}
+
+    def get_limiter(self, scope, name):
+        """
+
+        :param str scope: "host" or "vcenter"
+        :param str name: ESXi host or vCenter identifier
+        :rtype: AdaptiveLimiter
+        """
+        with self._lock:
+            limiter = self._limiters.get((scope, name))
+            if limiter is None:
+                if scope == "host":
+                    limiter = AdaptiveLimiter(initial=self._host_initial, maximum=self._host_max)
+                else:
+                    limiter = AdaptiveLimiter(initial=self._vcenter_initial, maximum=self._vcenter_max)
+                self._limiters[(scope, name)] = limiter
+
+            return limiter
+
+    @contextmanager
+    def slot(self, vcenter, host, fault_types=()):
+        """Wait for a slot of the host and of the vCenter, adjust their limits by the result of the operation
+
+        Operation which raised one of the fault types decreases the limits, successful operation increases them,
+        other errors don't change them.
+
+        :param str vcenter: vCenter name
+        :param str host: ESXi host identifier, only vCenter limit is used if it's unknown
+        :param tuple fault_types: exceptions of the overloaded host, i.e. GuestOperationsUnavailable
+        """
+        limiters = [("host", self.get_limiter("host", host))] if host else []
+        limiters.append(("vcenter", self.get_limiter("vcenter", vcenter)))
+        start_time = time.time()
+
+        # always acquired in the same order (host, then vCenter), so waiters can't deadlock
+        for _, limiter in limiters:
+            limiter.acquire()
+
+        GUEST_OPERATIONS_WAIT.observe(time.time() - start_time)
+        success = None
+
+        try:
+            yield
+            success = True
+        except fault_types:
+            success = False
+            raise
+        finally:
+            for scope, limiter in reversed(limiters):
+                if limiter.release(success=success):
+                    GUEST_OPERATIONS_THROTTLED.inc(scope=scope)
+
+
+guest_scheduler = GuestOperationsScheduler()
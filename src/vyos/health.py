@@ -0,0 +1,282 @@
+"""Cheap concurrent reachability/health checks of the VyOS resources
+
+Each target is checked in steps, every next step runs only if the previous one succeeded:
+
+    tcp     - TCP connection to the SSH port
+    ssh     - SSH identification string (banner) of the server
+    auth    - SSH password authentication (optional)
+    command - single op-mode command, "show system uptime" (optional, implies auth)
+
+All steps of the target share a single deadline, timeouts of the steps are what is left of it. Targets are checked
+in parallel by a bounded pool, so the whole sweep takes about as long as the slowest target.
+"""
+
+from multiprocessing import TimeoutError
+from multiprocessing.pool import ThreadPool
+import socket
+import time
+
+from vyos import metrics
+from vyos.networking_utils import get_ssh_banner
+
+
+HEALTH_CHECK_MAX_WORKERS = 32
+HEALTH_CHECK_DEADLINE = 15
+# extra time for the pool to return results of the targets which used up their deadlines
+HEALTH_CHECK_GRACE_PERIOD = 5
+
+UPTIME_COMMAND = "/opt/vyatta/bin/vyatta-op-cmd-wrapper show system uptime"
+COMMAND_OUTPUT_MAX_SIZE = 64 * 1024
+
+STATUS_OK = "ok"
+STATUS_UNREACHABLE = "unreachable"
+STATUS_NO_SSH = "no_ssh"
+STATUS_AUTH_FAILED = "auth_failed"
+STATUS_COMMAND_FAILED = "command_failed"
+STATUS_TIMEOUT = "timeout"
+
+TABLE_COLUMNS = (("resource", "RESOURCE"),
+                 ("address", "ADDRESS"),
+                 ("status", "STATUS"),
+                 ("tcp_ms", "TCP MS"),
+                 ("duration", "TIME S"),
+                 ("details", "DETAILS"))
+
+HEALTH_CHECKS = metrics.counter("vyos_health_checks_total", "Health checks of the VyOS resources by status",
+                                ("status",))
+
+
+class HealthTarget(object):
+    def __init__(self, resource, address, port=22, user=None, password=None):
+        """
+
+        :param str resource: resource name
+        :param str address: IP address of the resource
+        :param int port: SSH port
+        :param str user:
+        :param str password: decrypted password, required by the auth/command checks
+        """
+        self.resource = resource
+        self.address = address
+        self.port = port
+        self.user = user
+        self.password = password
+
+
+class _Deadline(object):
+    def __init__(self, seconds):
+        self._expires_at = time.time() + seconds
+
+    def remaining(self):
+        """Seconds left before the deadline
+
+        :rtype: float
+        :raise socket.timeout: if deadline is reached
+        """
+        remaining = self._expires_at - time.time()
+        if remaining <= 0:
+            raise socket.timeout("Deadline reached")
+
+        return remaining
+
+
+def probe_tcp(address, port, timeout):
+    """
+
+    :param str address:
+    :param int port:
+    :param float timeout:
+    :return: connect time in milliseconds
+    :rtype: float
+    """
+    start_time = time.time()
+    sock = socket.create_connection((address, int(port)), timeout=timeout)
+    sock.close()
+
+    return round((time.time() - start_time) * 1000, 1)
+
+
+def _read_channel(channel, deadline):
+    """Read stdout and stderr of the command until it exits
+
+    :param paramiko.Channel channel:
+    :param _Deadline deadline:
+    :return: exit status and output
+    :rtype: tuple[int, str]
+    """
+    output = b""
+
+    while not channel.exit_status_ready() or channel.recv_ready() or channel.recv_stderr_ready():
+        channel.settimeout(deadline.remaining())
+        if channel.recv_stderr_ready():
+            output += channel.recv_stderr(COMMAND_OUTPUT_MAX_SIZE)
+        else:
+            data = channel.recv(COMMAND_OUTPUT_MAX_SIZE)
+            if not data:
+                break
+            output += data
+
+        output = output[-COMMAND_OUTPUT_MAX_SIZE:]
+
+    return channel.recv_exit_status(), output.decode("utf-8", "replace").strip()
+
+
+def open_ssh_transport(target, deadline):
+    """Connect to the SSH server and authenticate with the password
+
+    :param HealthTarget target:
+    :param _Deadline deadline:
+    :rtype: paramiko.Transport
+    :raise paramiko.AuthenticationException: if authentication failed
+    """
+    import paramiko
+
+    sock = socket.create_connection((target.address, int(target.port)), timeout=deadline.remaining())
+    transport = paramiko.Transport(sock)
+    try:
+        transport.banner_timeout = deadline.remaining()
+        transport.start_client(timeout=deadline.remaining())
+        transport.auth_timeout = deadline.remaining()
+        transport.auth_password(username=target.user, password=target.password)
+    except Exception:
+        transport.close()
+        raise
+
+    return transport
+
+
+def run_command(transport, command, deadline):
+    """
+
+    :param paramiko.Transport transport: authenticated transport
+    :param str command: op-mode command
+    :param _Deadline deadline:
+    :return: command output
+    :rtype: str
+    """
+    channel = transport.open_session(timeout=deadline.remaining())
+    channel.settimeout(deadline.remaining())
+    channel.exec_command(command)
+    exit_status, output = _read_channel(channel=channel, deadline=deadline)
+
+    if exit_status:
+        raise Exception("Command exited with status {}: {}".format(exit_status, output))
+
+    return output
+
+
+def check_target(target, deadline=HEALTH_CHECK_DEADLINE, auth=False, command=None):
+    """Run the health check steps of the target within the deadline
+
+    :param HealthTarget target:
+    :param float deadline: seconds for all steps of the target
+    :param bool auth: check SSH authentication
+    :param str command: op-mode command to run after authentication, i.e. UPTIME_COMMAND
+    :rtype: dict
+    """
+    start_time = time.time()
+    target_deadline = _Deadline(deadline)
+    result = {"resource": target.resource,
+              "address": target.address,
+              "status": STATUS_UNREACHABLE,
+              "tcp_ms": None,
+              "banner": None,
+              "output": None,
+              "error": None}
+
+    try:
+        result["tcp_ms"] = probe_tcp(address=target.address, port=target.port, timeout=target_deadline.remaining())
+        result["status"] = STATUS_NO_SSH
+        result["banner"] = get_ssh_banner(address=target.address, port=target.port,
+                                          timeout=target_deadline.remaining())
+
+        if auth or command:
+            result["status"] = STATUS_AUTH_FAILED
+            transport = open_ssh_transport(target=target, deadline=target_deadline)
+            try:
+                if command:
+                    result["status"] = STATUS_COMMAND_FAILED
+                    result["output"] = run_command(transport=transport, command=command, deadline=target_deadline)
+            finally:
+                transport.close()
+
+        result["status"] = STATUS_OK
+    except socket.timeout:
+        result.update(status=STATUS_TIMEOUT, error="No response within {} second(s)".format(deadline))
+    except Exception as e:
+        result["error"] = str(e) or type(e).__name__
+
+    result["duration"] = round(time.time() - start_time, 3)
+    HEALTH_CHECKS.inc(status=result["status"])
+
+    return result
+
+
+def sweep(targets, check=check_target, max_workers=HEALTH_CHECK_MAX_WORKERS, deadline=HEALTH_CHECK_DEADLINE,
+          **check_kwargs):
+    """Check all targets in parallel with a bounded number of workers
+
+    :param list[HealthTarget] targets:
+    :param check: function(target, deadline, **check_kwargs) -> dict
+    :param int max_workers: max number of targets checked at the same time
+    :param float deadline: seconds for each target
+    :return: results in the targets order and summary
+    :rtype: tuple[list[dict], dict]
+    """
+    start_time = time.time()
+    results = []
+
+    if targets:
+        workers = max(min(max_workers, len(targets)), 1)
+        rounds = (len(targets) + workers - 1) // workers
+        sweep_deadline = start_time + deadline * rounds + HEALTH_CHECK_GRACE_PERIOD
+
+        pool = ThreadPool(workers)
+        try:
+            async_results = [pool.apply_async(check, (target, deadline), check_kwargs) for target in targets]
+
+            for target, async_result in zip(targets, async_results):
+                try:
+                    results.append(async_result.get(timeout=max(sweep_deadline - time.time(), 0)))
+                except TimeoutError:
+                    HEALTH_CHECKS.inc(status=STATUS_TIMEOUT)
+                    results.append({"resource": target.resource,
+                                    "address": target.address,
+                                    "status": STATUS_TIMEOUT,
+                                    "tcp_ms": None,
+                                    "banner": None,
+                                    "output": None,
+                                    "error": "No response within {} second(s)".format(deadline),
+                                    "duration": round(time.time() - start_time, 3)})
+        finally:
+            pool.close()
+
+    summary = {"resources": len(results),
+               "healthy": len([result for result in results if result["status"] == STATUS_OK]),
+               "unhealthy": len([result for result in results if result["status"] != STATUS_OK]),
+               "wall_time": round(time.time() - start_time, 3),
+               "slowest_duration": max([result["duration"] for result in results] or [None])}
+
+    return results, summary
+
+
+def format_table(results, summary):
+    """Compact status table, one line per resource
+
+    :param list[dict] results:
+    :param dict summary:
+    :rtype: str
+    """
+    rows = [[title for _, title in TABLE_COLUMNS]]
+
+    for result in results:
+        details = result["error"] if result["status"] != STATUS_OK else (result["output"] or result["banner"])
+        row = dict(result, details=" ".join((details or "").split()))
+        rows.append(["-" if row[name] is None else str(row[name]) for name, _ in TABLE_COLUMNS])
+
+    widths = [max(len(row[index]) for row in rows) for index in range(len(TABLE_COLUMNS) - 1)]
+    lines = ["  ".join([value.ljust(width) for value, width in zip(row, widths)] + [row[-1]]).rstrip()
+             for row in rows]
+    lines.append("{healthy}/{resources} healthy, {wall_time}s".format(**summary))
+
+    return "\n".join(lines)
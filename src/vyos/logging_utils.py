@@ -0,0 +1,77 @@
+"""Rate-limited logging of the polling and retry loops
+
+Loops report their state on each iteration, but only state changes are logged right away. Repeated identical
+states are collapsed into periodic summaries, i.e. "Still waiting, 14 attempt(s), last state: X". Tracebacks are
+logged only with the first occurrence of the state, messages are formatted only when they are logged.
+"""
+
+import logging
+import time
+
+
+DEFAULT_SUMMARY_INTERVAL = 60
+
+
+class CoalescingLogger(object):
+    def __init__(self, logger, summary_interval=DEFAULT_SUMMARY_INTERVAL, level=logging.INFO):
+        """
+
+        Usage:
+            loop_logger = CoalescingLogger(logger)
+            while not ready():
+                loop_logger.report(state, "Waiting for VM. Power state: %s", power_state)
+                time.sleep(interval)
+            loop_logger.finish("VM is ready")
+
+        :param logging.Logger logger:
+        :param float summary_interval: min number of seconds between the summaries of the repeated state
+        :param int level: logging level of the reports
+        """
+        self._logger = logger
+        self._summary_interval = summary_interval
+        self._level = level
+        self._state = None
+        self._attempts = 0
+        self._state_attempts = 0
+        self._logged_at = 0
+
+    @property
+    def attempts(self):
+        """Total number of the reports
+
+        :rtype: int
+        """
+        return self._attempts
+
+    def report(self, state, msg, *args, **kwargs):
+        """Log message if state changed, summary of the repeated state once per summary interval
+
+        :param state: hashable state of the loop, i.e. (power state, tools status) or exception type and text
+        :param str msg: message with the %-style placeholders, formatted only if it is logged
+        :param args: message arguments
+        :param bool exc_info: log traceback of the current exception with the first occurrence of the state
+        """
+        exc_info = kwargs.pop("exc_info", False)
+        self._attempts += 1
+
+        if state != self._state or self._attempts == 1:
+            self._state = state
+            self._state_attempts = 1
+            self._logged_at = time.time()
+            self._logger.log(self._level, msg, *args, exc_info=exc_info)
+            return
+
+        self._state_attempts += 1
+
+        if time.time() - self._logged_at >= self._summary_interval and self._logger.isEnabledFor(self._level):
+            self._logged_at = time.time()
+            self._logger.log(self._level, "Still waiting, %s attempt(s), %s with the same state. Last state: " + msg,
+                             self._attempts, self._state_attempts, *args)
+
+    def finish(self, msg, *args):
+        """Log final message of the loop with the number of attempts
+
+        :param str msg: message with the %-style placeholders
+        :param args: message arguments
+        """
+        self._logger.log(self._level, msg + " (%s attempt(s))", *(args + (self._attempts,)))
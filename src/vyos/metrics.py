@@ -0,0 +1,457 @@
+"""In-process metrics of the driver: counters, gauges and histograms in the Prometheus text format
+
+Metrics are always collected, they are exported only when requested:
+
+    VYOS_METRICS_FILE - file rewritten after each driver command (i.e. for the node exporter textfile collector)
+    VYOS_METRICS_PORT - port on 127.0.0.1 serving the metrics over HTTP, started with the first driver command
+
+Counters and histograms are updated without locks: each thread writes to its own shard, shards are summed up
+on render and shards of the finished threads are folded into the totals.
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from functools import wraps
+import os
+import threading
+import time
+
+try:
+    from http.server import BaseHTTPRequestHandler
+    from http.server import HTTPServer
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler
+    from BaseHTTPServer import HTTPServer
+
+from vyos import file_utils
+
+
+METRICS_FILE_ENV = "VYOS_METRICS_FILE"
+METRICS_PORT_ENV = "VYOS_METRICS_PORT"
+METRICS_ADDRESS = "127.0.0.1"
+
+DEFAULT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(label_names, label_values, extra=()):
+    """
+
+    :param tuple[str] label_names:
+    :param tuple label_values:
+    :param tuple[tuple[str, str]] extra: additional labels, i.e. (("le", "0.5"),)
+    :rtype: str
+    """
+    labels = list(zip(label_names, label_values)) + list(extra)
+    if not labels:
+        return ""
+
+    return "{" + ",".join('{}="{}"'.format(name, _escape(value)) for name, value in labels) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric(object):
+    TYPE = None
+
+    def __init__(self, name, documentation, label_names=()):
+        """
+
+        :param str name: metric name, i.e. "vyos_cli_retries_total"
+        :param str documentation: help text
+        :param tuple[str] label_names:
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+
+    def _key(self, labels):
+        """
+
+        :param dict labels:
+        :rtype: tuple
+        """
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    def samples(self):
+        """
+
+        :return: sample name suffix, label values, extra labels and value
+        :rtype: list[tuple[str, tuple, tuple, float]]
+        """
+        raise NotImplementedError
+
+    def render(self):
+        """
+
+        :rtype: str
+        """
+        lines = ["# HELP {} {}".format(self.name, self.documentation.replace("\\", "\\\\").replace("\n", "\\n")),
+                 "# TYPE {} {}".format(self.name, self.TYPE)]
+
+        for suffix, label_values, extra, value in self.samples():
+            lines.append("{}{}{} {}".format(self.name, suffix, _format_labels(self.label_names, label_values, extra),
+                                            _format_value(value)))
+
+        return "\n".join(lines) + "\n"
+
+
+class _ShardedMetric(_Metric):
+    def __init__(self, name, documentation, label_names=()):
+        super(_ShardedMetric, self).__init__(name, documentation, label_names)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards = []
+        self._folded = {}
+
+    def _shard(self):
+        """Values written by the current thread only
+
+        :rtype: dict
+        """
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+
+        return shard
+
+    def _merge(self, total, value):
+        raise NotImplementedError
+
+    def _collect(self):
+        """Sum up all shards, shards of the finished threads are folded into the totals
+
+        :rtype: dict
+        """
+        with self._lock:
+            alive = []
+            for thread, shard in self._shards:
+                if thread.is_alive():
+                    alive.append((thread, shard))
+                else:
+                    for key, value in shard.copy().items():
+                        self._folded[key] = self._merge(self._folded.get(key), value)
+            self._shards = alive
+
+            result = dict((key, self._merge(None, value)) for key, value in self._folded.items())
+            for _, shard in alive:
+                for key, value in shard.copy().items():
+                    result[key] = self._merge(result.get(key), value)
+
+        return result
+
+
+class Counter(_ShardedMetric):
+    TYPE = "counter"
+
+    def inc(self, amount=1, **labels):
+        """
+
+        :param float amount:
+        :param labels: label values
+        """
+        shard = self._shard()
+        key = self._key(labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def _merge(self, total, value):
+        return (total or 0) + value
+
+    def get(self, **labels):
+        """
+
+        :rtype: float
+        """
+        return self._collect().get(self._key(labels), 0)
+
+    def samples(self):
+        return [("", key, (), value) for key, value in sorted(self._collect().items())]
+
+
+class Histogram(_ShardedMetric):
+    TYPE = "histogram"
+
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+
+        :param str name:
+        :param str documentation:
+        :param tuple[str] label_names:
+        :param tuple[float] buckets: upper bounds of the buckets
+        """
+        super(Histogram, self).__init__(name, documentation, label_names)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+
+    def observe(self, value, **labels):
+        """
+
+        :param float value:
+        :param labels: label values
+        """
+        shard = self._shard()
+        key = self._key(labels)
+        counts = shard.get(key)
+        if counts is None:
+            # count per bucket, then sum of the values
+            counts = shard[key] = [0] * len(self.buckets) + [0.0]
+
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe duration of the block"""
+        start_time = time.time()
+        try:
+            yield
+        finally:
+            self.observe(time.time() - start_time, **labels)
+
+    def _merge(self, total, value):
+        if total is None:
+            return list(value)
+
+        return [left + right for left, right in zip(total, value)]
+
+    def get_count(self, **labels):
+        """
+
+        :rtype: int
+        """
+        counts = self._collect().get(self._key(labels))
+        return sum(counts[:-1]) if counts else 0
+
+    def samples(self):
+        samples = []
+
+        for key, counts in sorted(self._collect().items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                samples.append(("_bucket", key, (("le", _format_value(float(bound))),), cumulative))
+            samples.append(("_sum", key, (), counts[-1]))
+            samples.append(("_count", key, (), cumulative))
+
+        return samples
+
+
+class Gauge(_Metric):
+    TYPE = "gauge"
+
+    def __init__(self, name, documentation, label_names=()):
+        super(Gauge, self).__init__(name, documentation, label_names)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def set(self, value, **labels):
+        """
+
+        :param float value:
+        :param labels: label values
+        """
+        self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        """
+
+        :param float amount:
+        :param labels: label values
+        """
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        """
+
+        :rtype: float
+        """
+        return self._values.get(self._key(labels), 0)
+
+    @contextmanager
+    def track_in_progress(self, **labels):
+        """Increase gauge while the block is executed"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def samples(self):
+        return [("", key, (), value) for key, value in sorted(self._values.copy().items())]
+
+
+class Registry(object):
+    def __init__(self):
+        """Metrics by name, metrics with the same name are shared between the modules"""
+        self._lock = threading.Lock()
+        self._metrics = {}
+        self._server = None
+
+    def _get_or_create(self, metric_class, name, *args, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = metric_class(name, *args, **kwargs)
+            elif not isinstance(metric, metric_class):
+                raise Exception("Metric '{}' is already registered as {}".format(name, metric.TYPE))
+
+            return metric
+
+    def counter(self, name, documentation, label_names=()):
+        """
+
+        :rtype: Counter
+        """
+        return self._get_or_create(Counter, name, documentation, label_names)
+
+    def gauge(self, name, documentation, label_names=()):
+        """
+
+        :rtype: Gauge
+        """
+        return self._get_or_create(Gauge, name, documentation, label_names)
+
+    def histogram(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """
+
+        :rtype: Histogram
+        """
+        return self._get_or_create(Histogram, name, documentation, label_names, buckets=buckets)
+
+    def render(self):
+        """All metrics in the Prometheus text format
+
+        :rtype: str
+        """
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda metric: metric.name)
+
+        return "".join(metric.render() for metric in metrics)
+
+    def write_textfile(self, path):
+        """Write metrics to the file atomically
+
+        :param str path:
+        """
+        with file_utils.file_lock(path):
+            file_utils.write_file(path, self.render().encode("utf-8"), mode=0o644)
+
+    def serve(self, port, address=METRICS_ADDRESS):
+        """Serve metrics over HTTP in the background thread, only the first call starts the server
+
+        :param int port: 0 to choose free port
+        :param str address:
+        :return: port the server listens on
+        :rtype: int
+        """
+        with self._lock:
+            if self._server is None:
+                registry = self
+
+                class MetricsHandler(BaseHTTPRequestHandler):
+                    def do_GET(self):
+                        body = registry.render().encode("utf-8")
+                        self.send_response(200)
+                        self.send_header("Content-Type", CONTENT_TYPE)
+                        self.send_header("Content-Length", str(len(body)))
+                        self.end_headers()
+                        self.wfile.write(body)
+
+                    def log_message(self, format, *args):
+                        pass
+
+                self._server = HTTPServer((address, port), MetricsHandler)
+                thread = threading.Thread(target=self._server.serve_forever)
+                thread.daemon = True
+                thread.start()
+
+            return self._server.server_address[1]
+
+
+REGISTRY = Registry()
+
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+def export():
+    """Export metrics to the VYOS_METRICS_FILE and/or VYOS_METRICS_PORT if they are set"""
+    path = os.environ.get(METRICS_FILE_ENV)
+    port = os.environ.get(METRICS_PORT_ENV)
+
+    try:
+        if port:
+            REGISTRY.serve(port=int(port))
+        if path:
+            REGISTRY.write_textfile(path)
+    except (IOError, OSError, ValueError):
+        pass
+
+
+COMMANDS = counter("vyos_commands_total", "Driver commands by result", ("command", "status"))
+COMMAND_DURATION = histogram("vyos_command_duration_seconds", "Duration of the driver commands", ("command",))
+COMMANDS_IN_PROGRESS = gauge("vyos_commands_in_progress", "Driver commands being executed, i.e. post-boot "
+                                                          "deployments in flight", ("command",))
+
+
+def measured_command(func):
+    """Count driver command, measure its duration and export metrics afterwards
+
+    :param func: driver command
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        command = func.__name__
+        status = "error"
+
+        try:
+            with COMMANDS_IN_PROGRESS.track_in_progress(command=command):
+                with COMMAND_DURATION.time(command=command):
+                    result = func(*args, **kwargs)
+            status = "ok"
+            return result
+        finally:
+            COMMANDS.inc(command=command, status=status)
+            export()
+
+    return wrapper
+
+
+class CallCounter(object):
+    def __init__(self, target, calls_counter):
+        """Proxy which counts calls of the target methods, i.e. CloudShell API session
+
+        :param target:
+        :param Counter calls_counter: counter with the "method" label
+        """
+        self._target = target
+        self._calls_counter = calls_counter
+
+    def __getattr__(self, item):
+        attribute = getattr(self._target, item)
+        if not callable(attribute):
+            return attribute
+
+        calls_counter = self._calls_counter
+
+        def counted(*args, **kwargs):
+            calls_counter.inc(method=item)
+            return attribute(*args, **kwargs)
+
+        return counted
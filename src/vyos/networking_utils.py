@@ -0,0 +1,66 @@
+import socket
+import time
+
+
+SSH_BANNER_PREFIX = "SSH-"
+SSH_BANNER_MAX_SIZE = 255
+
+
+def get_ssh_banner(address, port=22, timeout=10):
+    """Open TCP connection to the SSH server and read its identification string
+
+    :param str address: IP address of the host
+    :param int port: SSH port
+    :param float timeout: connect/read timeout in seconds
+    :return: SSH identification string, i.e. "SSH-2.0-OpenSSH_5.5p1 Debian-6+squeeze8"
+    :rtype: str
+    :raise Exception: if host is unreachable or it isn't SSH server
+    """
+    sock = socket.create_connection((address, int(port)), timeout=timeout)
+    try:
+        banner = sock.recv(SSH_BANNER_MAX_SIZE).decode("ascii", "replace").strip()
+    finally:
+        sock.close()
+
+    if not banner.startswith(SSH_BANNER_PREFIX):
+        raise Exception("Unexpected SSH identification string '{}' from {}:{}".format(banner, address, port))
+
+    return banner
+
+
+def is_ssh_available(address, port=22, timeout=10):
+    """
+
+    :param str address: IP address of the host
+    :param int port: SSH port
+    :param float timeout: connect/read timeout in seconds
+    :rtype: bool
+    """
+    try:
+        get_ssh_banner(address=address, port=port, timeout=timeout)
+    except Exception:
+        return False
+
+    return True
+
+
+def wait_for_ssh(address, port=22, timeout=20 * 60, interval=5, probe_timeout=10):
+    """Wait until the SSH server answers with its identification string
+
+    :param str address: IP address of the host
+    :param int port: SSH port
+    :param float timeout: overall time to wait in seconds
+    :param float interval: delay between the probes
+    :param float probe_timeout: connect/read timeout of the each probe
+    :rtype: bool
+    """
+    deadline = time.time() + timeout
+
+    while True:
+        if is_ssh_available(address=address, port=port, timeout=min(probe_timeout, max(deadline - time.time(), 1))):
+            return True
+
+        if time.time() + interval > deadline:
+            return False
+
+        time.sleep(interval)
@@ -0,0 +1,191 @@
+"""On-demand profiling of the driver commands
+
+Profiling is enabled for the resource with the "Enable Profiling" attribute or for all resources with the
+VYOS_PROFILE environment variable. Each profiled command writes two files to the profiles directory
+(VYOS_PROFILE_DIR, system temp directory by default):
+
+    <timestamp>-<reservation id>-<command>.prof - cProfile data, could be opened with pstats/snakeviz
+    <timestamp>-<reservation id>-<command>.txt  - top hot functions sorted by cumulative and internal time
+
+Only the last VYOS_PROFILE_KEEP profiles are kept. When profiling is disabled the command is called directly.
+"""
+
+import cProfile
+from datetime import datetime
+from functools import wraps
+import os
+import pstats
+import re
+import tempfile
+import threading
+
+try:
+    from StringIO import StringIO
+except ImportError:
+    from io import StringIO
+
+
+PROFILE_ENV = "VYOS_PROFILE"
+PROFILE_DIR_ENV = "VYOS_PROFILE_DIR"
+PROFILE_KEEP_ENV = "VYOS_PROFILE_KEEP"
+
+PROFILING_ATTRIBUTE = "Enable Profiling"
+DEFAULT_PROFILE_DIR_NAME = "vyos-profiles"
+DEFAULT_PROFILES_TO_KEEP = 20
+TOP_FUNCTIONS_COUNT = 30
+
+PROFILE_EXTENSION = ".prof"
+SUMMARY_EXTENSION = ".txt"
+
+UNSAFE_CHARS_RE = re.compile(r"[^\w.-]+")
+
+_ROTATION_LOCK = threading.Lock()
+
+
+def _is_true(value):
+    return str(value).strip().lower() in ("true", "yes", "1")
+
+
+def is_enabled(context):
+    """Check whether profiling was requested for the command
+
+    :param context: command context
+    :rtype: bool
+    """
+    if _is_true(os.environ.get(PROFILE_ENV, "")):
+        return True
+
+    attributes = getattr(getattr(context, "resource", None), "attributes", None) or {}
+
+    for name, value in attributes.items():
+        if name.rpartition(".")[2] == PROFILING_ATTRIBUTE and _is_true(value):
+            return True
+
+    return False
+
+
+def get_profile_dir():
+    """
+
+    :rtype: str
+    """
+    return os.environ.get(PROFILE_DIR_ENV) or os.path.join(tempfile.gettempdir(), DEFAULT_PROFILE_DIR_NAME)
+
+
+def get_profiles_to_keep():
+    """
+
+    :rtype: int
+    """
+    try:
+        return max(int(os.environ.get(PROFILE_KEEP_ENV, DEFAULT_PROFILES_TO_KEEP)), 1)
+    except ValueError:
+        return DEFAULT_PROFILES_TO_KEEP
+
+
+def _get_reservation_id(context):
+    reservation = getattr(context, "reservation", None)
+    return getattr(reservation, "reservation_id", None) or "no-reservation"
+
+
+def _sanitize(name):
+    return UNSAFE_CHARS_RE.sub("_", str(name))
+
+
+def build_summary(profiler, top_count=TOP_FUNCTIONS_COUNT):
+    """Top hot functions of the profile in the text form
+
+    :param cProfile.Profile profiler:
+    :param int top_count: number of functions in each section
+    :rtype: str
+    """
+    stream = StringIO()
+    stats = pstats.Stats(profiler, stream=stream)
+    stats.strip_dirs()
+
+    for sort_key in ("cumulative", "tottime"):
+        stream.write("Top {} functions by {} time\n".format(top_count, sort_key))
+        stats.sort_stats(sort_key).print_stats(top_count)
+
+    return stream.getvalue()
+
+
+def rotate_profiles(profile_dir, keep):
+    """Remove the oldest profiles, so only the given number of them is left
+
+    :param str profile_dir:
+    :param int keep: number of profiles to keep
+    """
+    profiles = sorted(file_name for file_name in os.listdir(profile_dir) if file_name.endswith(PROFILE_EXTENSION))
+
+    for file_name in profiles[:-keep]:
+        base_name = file_name[:-len(PROFILE_EXTENSION)]
+        for extension in (PROFILE_EXTENSION, SUMMARY_EXTENSION):
+            try:
+                os.remove(os.path.join(profile_dir, base_name + extension))
+            except OSError:
+                pass
+
+
+def save_profile(profiler, reservation_id, command_name, profile_dir=None, keep=None):
+    """Write profile and its summary to the profiles directory
+
+    :param cProfile.Profile profiler:
+    :param str reservation_id:
+    :param str command_name:
+    :param str profile_dir: profiles directory, VYOS_PROFILE_DIR by default
+    :param int keep: number of profiles to keep, VYOS_PROFILE_KEEP by default
+    :return: path to the profile file
+    :rtype: str
+    """
+    profile_dir = profile_dir or get_profile_dir()
+    keep = keep or get_profiles_to_keep()
+
+    if not os.path.isdir(profile_dir):
+        try:
+            os.makedirs(profile_dir)
+        except OSError:
+            if not os.path.isdir(profile_dir):
+                raise
+
+    base_name = "{}-{}-{}".format(datetime.now().strftime("%Y%m%d-%H%M%S-%f"),
+                                  _sanitize(reservation_id),
+                                  _sanitize(command_name))
+    profile_path = os.path.join(profile_dir, base_name + PROFILE_EXTENSION)
+
+    with open(os.path.join(profile_dir, base_name + SUMMARY_EXTENSION), "w") as summary_file:
+        summary_file.write("Reservation: {}\nCommand: {}\n\n".format(reservation_id, command_name))
+        summary_file.write(build_summary(profiler))
+
+    profiler.dump_stats(profile_path)
+
+    with _ROTATION_LOCK:
+        rotate_profiles(profile_dir=profile_dir, keep=keep)
+
+    return profile_path
+
+
+def profiled_command(func):
+    """Profile driver command if profiling is enabled for the resource
+
+    :param func: driver command with the context as a first argument
+    """
+    @wraps(func)
+    def wrapper(self, context, *args, **kwargs):
+        if not is_enabled(context):
+            return func(self, context, *args, **kwargs)
+
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            return func(self, context, *args, **kwargs)
+        finally:
+            profiler.disable()
+            try:
+                save_profile(profiler=profiler,
+                             reservation_id=_get_reservation_id(context),
+                             command_name=func.__name__)
+            except (IOError, OSError):
+                pass
+
+    return wrapper
@@ -1,6 +1,11 @@
+import posixpath
+import re
+import time
+
 from cloudshell.devices.runners.configuration_runner import ConfigurationRunner
 
 from vyos.flows.restore import VyOSRestoreFlow
+from vyos.flows.save import VyOSFanOutSaveFlow
 from vyos.flows.save import VyOSSaveFlow
 
 
@@ -13,6 +18,10 @@ class VyOSConfigurationRunner(ConfigurationRunner):
     def save_flow(self):
         return VyOSSaveFlow(cli_handler=self.cli_handler, logger=self._logger)
 
+    @property
+    def fan_out_save_flow(self):
+        return VyOSFanOutSaveFlow(cli_handler=self.cli_handler, logger=self._logger)
+
     @property
     def file_system(self):
         return ""
@@ -24,3 +33,20 @@ class VyOSConfigurationRunner(ConfigurationRunner):
         :return: valid path or :raise Exception:
         """
         return path
+
+    def save_to_destinations(self, folder_paths, configuration_type="running"):
+        """Save configuration to the several destinations with a single read from the device
+
+        :param list[str] folder_paths: destination folders where file will be saved
+        :param str configuration_type: type of configuration that will be saved
+        :return: saved configuration file name and results per destination
+        :rtype: tuple[str, list[dict]]
+        """
+        system_name = re.sub(r"\s+", "_", self.resource_config.name)[:23]
+        time_stamp = time.strftime("%d%m%y-%H%M%S", time.localtime())
+        destination_filename = "{0}-{1}-{2}".format(system_name, configuration_type.lower(), time_stamp)
+
+        destinations = [posixpath.join(self.get_path(folder_path), destination_filename)
+                        for folder_path in folder_paths]
+
+        return destination_filename, self.fan_out_save_flow.execute_flow(destinations=destinations)
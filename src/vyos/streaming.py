@@ -0,0 +1,204 @@
+"""Bounded-memory processing of the large command outputs
+
+Output is consumed chunk by chunk: IncrementalDetector matches error/success patterns over the chunks (including
+matches crossing the chunk boundary) and OutputSpool writes chunks to a local file keeping only the head and the
+tail of the output in memory for the summary. Spool files are written to the VYOS_SPOOL_DIR directory (system temp
+directory by default) and only the last VYOS_SPOOL_KEEP of them are kept.
+"""
+
+from collections import OrderedDict
+import os
+import re
+import tempfile
+import threading
+
+
+SPOOL_DIR_ENV = "VYOS_SPOOL_DIR"
+SPOOL_KEEP_ENV = "VYOS_SPOOL_KEEP"
+
+DEFAULT_SPOOL_DIR_NAME = "vyos-outputs"
+DEFAULT_SPOOLS_TO_KEEP = 50
+SPOOL_PREFIX = "output-"
+SPOOL_EXTENSION = ".txt"
+
+DEFAULT_SUMMARY_SIZE = 8 * 1024
+DEFAULT_OVERLAP = 512
+
+_ROTATION_LOCK = threading.Lock()
+
+
+class IncrementalDetector(object):
+    def __init__(self, patterns, overlap=DEFAULT_OVERLAP):
+        """Search patterns in the output fed by chunks
+
+        The last characters of the previous chunk are kept, so matches up to that length crossing the chunk
+        boundary are found as well.
+
+        :param collections.OrderedDict patterns: regexp -> message, i.e. the error map of the command template
+        :param int overlap: number of characters kept from the previous chunk
+        """
+        self._patterns = OrderedDict((re.compile(pattern, re.DOTALL), message)
+                                     for pattern, message in patterns.items())
+        self._overlap = overlap
+        self._tail = ""
+        self.matches = OrderedDict()
+
+    def feed(self, chunk):
+        """
+
+        :param str chunk:
+        """
+        text = self._tail + chunk
+
+        for pattern, message in self._patterns.items():
+            if pattern not in self.matches:
+                match = pattern.search(text)
+                if match:
+                    self.matches[pattern] = (message, match.group(0))
+
+        self._tail = text[-self._overlap:]
+
+    @property
+    def matched(self):
+        """
+
+        :rtype: bool
+        """
+        return bool(self.matches)
+
+    @property
+    def first_message(self):
+        """Message of the first matched pattern in the patterns order
+
+        :rtype: str
+        """
+        for pattern in self._patterns:
+            if pattern in self.matches:
+                return self.matches[pattern][0]
+
+
+def get_spool_dir():
+    """
+
+    :rtype: str
+    """
+    return os.environ.get(SPOOL_DIR_ENV) or os.path.join(tempfile.gettempdir(), DEFAULT_SPOOL_DIR_NAME)
+
+
+def get_spools_to_keep():
+    """
+
+    :rtype: int
+    """
+    try:
+        return max(int(os.environ.get(SPOOL_KEEP_ENV, DEFAULT_SPOOLS_TO_KEEP)), 1)
+    except ValueError:
+        return DEFAULT_SPOOLS_TO_KEEP
+
+
+def rotate_spools(spool_dir, keep):
+    """Remove the oldest spool files, so only the given number of them is left
+
+    :param str spool_dir:
+    :param int keep:
+    """
+    spools = [os.path.join(spool_dir, file_name) for file_name in os.listdir(spool_dir)
+              if file_name.startswith(SPOOL_PREFIX) and file_name.endswith(SPOOL_EXTENSION)]
+
+    for path in sorted(spools, key=os.path.getmtime)[:-keep]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _to_bytes(chunk):
+    return chunk.encode("utf-8") if not isinstance(chunk, bytes) else chunk
+
+
+class OutputSpool(object):
+    def __init__(self, spool=True, summary_size=DEFAULT_SUMMARY_SIZE, spool_dir=None):
+        """Collect output chunks into the spool file and keep a bounded summary in memory
+
+        Usage:
+            with OutputSpool() as spool:
+                for chunk in chunks:
+                    spool.write(chunk)
+            return spool.summary()
+
+        :param bool spool: write full output to the file, only summary is kept otherwise
+        :param int summary_size: output up to this size is returned as is, head and tail of it otherwise
+        :param str spool_dir: VYOS_SPOOL_DIR by default
+        """
+        self._spool = spool
+        self._summary_size = summary_size
+        self._spool_dir = spool_dir or get_spool_dir()
+        self._head = ""
+        self._tail = ""
+        self._file = None
+        self.path = None
+        self.size = 0
+
+    def open(self):
+        if not self._spool:
+            return
+
+        if not os.path.isdir(self._spool_dir):
+            try:
+                os.makedirs(self._spool_dir)
+            except OSError:
+                if not os.path.isdir(self._spool_dir):
+                    raise
+
+        file_descriptor, self.path = tempfile.mkstemp(prefix=SPOOL_PREFIX, suffix=SPOOL_EXTENSION,
+                                                      dir=self._spool_dir)
+        self._file = os.fdopen(file_descriptor, "wb")
+
+    def close(self):
+        if self._file is None:
+            return
+
+        self._file.close()
+        self._file = None
+
+        with _ROTATION_LOCK:
+            rotate_spools(spool_dir=self._spool_dir, keep=get_spools_to_keep())
+
+    def write(self, chunk):
+        """
+
+        :param str chunk:
+        """
+        if self._file is not None:
+            self._file.write(_to_bytes(chunk))
+
+        self.size += len(chunk)
+
+        if len(self._head) < self._summary_size:
+            self._head += chunk[:self._summary_size - len(self._head)]
+
+        self._tail = (self._tail + chunk)[-(self._summary_size // 2):]
+
+    def summary(self):
+        """Whole output if it fits the summary size, its head and tail with the spool file reference otherwise
+
+        :rtype: str
+        """
+        if self.size <= self._summary_size:
+            return self._head
+
+        half = self._summary_size // 2
+        reference = " Full output: {}".format(self.path) if self.path else ""
+
+        return "{}\n... {} of {} characters truncated.{}\n{}".format(self._head[:half],
+                                                                     self.size - half - len(self._tail),
+                                                                     self.size,
+                                                                     reference,
+                                                                     self._tail)
+
+    def __enter__(self):
+        self.open()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
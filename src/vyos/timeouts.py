@@ -0,0 +1,309 @@
+"""Adaptive timeouts of the long device operations (load, save, commit)
+
+Durations of the successful operations are collected per resource, operation and file transfer protocol into
+streaming quantile sketches. Timeout of the next operation is the learned quantile (p99 by default) multiplied
+by the safety factor, it is never lower than MIN_TIMEOUT and never higher than the operation default. Until
+enough history is collected the default timeout is used.
+
+Sketches are persisted to the VYOS_TIMEOUTS_FILE JSON file (system temp directory by default), so statistics
+survive restarts of the driver. The file is shared between the driver processes: new durations are merged into
+the sketches read from the file under the file lock, so the processes don't overwrite each other's statistics:
+
+    {"version": 1, "sketches": {"vyos-1|load|scp": {"accuracy": 0.02, "count": 12, "buckets": {"105": 3, ...}}}}
+"""
+
+from contextlib import contextmanager
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+
+from vyos import file_utils
+
+
+TIMEOUTS_FILE_ENV = "VYOS_TIMEOUTS_FILE"
+DEFAULT_TIMEOUTS_FILE_NAME = "vyos-timeouts.json"
+TIMEOUTS_VERSION = 1
+
+LOAD_OPERATION = "load"
+SAVE_OPERATION = "save"
+COMMIT_OPERATION = "commit"
+
+LOCAL_PROTOCOL = "local"
+
+DEFAULT_QUANTILE = 0.99
+DEFAULT_SAFETY_FACTOR = 3.0
+MIN_TIMEOUT = 30
+MIN_SAMPLES = 5
+RELATIVE_ACCURACY = 0.02
+MAX_BUCKETS = 256
+MIN_DURATION = 0.001
+# operation which took at least this part of its timeout is treated as timed out
+TIMED_OUT_RATIO = 0.95
+
+
+class DurationSketch(object):
+    def __init__(self, relative_accuracy=RELATIVE_ACCURACY, buckets=None, count=0, max_buckets=MAX_BUCKETS):
+        """Streaming quantile sketch with logarithmic buckets, quantiles have the given relative accuracy
+
+        :param float relative_accuracy:
+        :param dict[int, int] buckets: samples count per bucket index
+        :param int count: total samples count
+        :param int max_buckets: the lowest buckets are merged when the limit is reached
+        """
+        self.relative_accuracy = relative_accuracy
+        self.buckets = dict(buckets or {})
+        self.count = count
+        self._max_buckets = max_buckets
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+
+    def add(self, value):
+        """
+
+        :param float value: duration in seconds
+        """
+        index = int(math.ceil(math.log(max(value, MIN_DURATION)) / self._log_gamma))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+
+        if len(self.buckets) > self._max_buckets:
+            lowest, next_lowest = sorted(self.buckets)[:2]
+            self.buckets[next_lowest] += self.buckets.pop(lowest)
+
+    def merge(self, other):
+        """Add samples of the other sketch with the same relative accuracy
+
+        :param DurationSketch other:
+        """
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+
+        while len(self.buckets) > self._max_buckets:
+            lowest, next_lowest = sorted(self.buckets)[:2]
+            self.buckets[next_lowest] += self.buckets.pop(lowest)
+
+    def quantile(self, quantile):
+        """
+
+        :param float quantile: 0..1
+        :return: estimated value, None if sketch is empty
+        :rtype: float
+        """
+        if not self.count:
+            return None
+
+        rank = quantile * (self.count - 1)
+        seen = 0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self._gamma ** index / (self._gamma + 1)
+
+    def to_dict(self):
+        """
+
+        :rtype: dict
+        """
+        return {"accuracy": self.relative_accuracy,
+                "count": self.count,
+                "buckets": dict((str(index), count) for index, count in self.buckets.items())}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+
+        :param dict data:
+        :rtype: DurationSketch
+        """
+        return cls(relative_accuracy=data["accuracy"],
+                   buckets=dict((int(index), count) for index, count in data["buckets"].items()),
+                   count=data["count"])
+
+
+def get_protocol(url):
+    """Get file transfer protocol from the URL, i.e. "scp://user@host/file" -> "scp"
+
+    :param str url:
+    :rtype: str
+    """
+    if url and "://" in url:
+        return url.partition("://")[0].lower()
+
+    return LOCAL_PROTOCOL
+
+
+class TimeoutAdvisor(object):
+    def __init__(self, path=None, quantile=DEFAULT_QUANTILE, safety_factor=DEFAULT_SAFETY_FACTOR,
+                 min_timeout=MIN_TIMEOUT, min_samples=MIN_SAMPLES):
+        """
+
+        :param str path: JSON file to persist sketches to, in-memory only if not set
+        :param float quantile: quantile of the learned durations used for the timeout
+        :param float safety_factor: learned quantile is multiplied by it
+        :param int min_timeout: lower bound of the learned timeout
+        :param int min_samples: learned timeout is used only after that number of operations
+        """
+        self._path = path
+        self._quantile = quantile
+        self._safety_factor = safety_factor
+        self._min_timeout = min_timeout
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+        self._sketches = self._load()
+        # durations recorded since the last successful save, they are merged into the file content on save
+        self._unsaved = {}
+
+    @staticmethod
+    def _get_key(resource, operation, protocol):
+        return "{}|{}|{}".format(resource, operation, protocol)
+
+    def _load(self):
+        """
+
+        :rtype: dict[str, DurationSketch]
+        """
+        if not self._path or not os.path.exists(self._path):
+            return {}
+
+        try:
+            with open(self._path) as timeouts_file:
+                data = json.load(timeouts_file)
+        except (IOError, OSError, ValueError):
+            return {}
+
+        if data.get("version") != TIMEOUTS_VERSION:
+            return {}
+
+        return dict((key, DurationSketch.from_dict(sketch)) for key, sketch in data.get("sketches", {}).items())
+
+    def _save(self):
+        """Merge unsaved durations into the sketches of the file and write it back, has to be called under the lock
+
+        Sketches written by the other processes are picked up as well
+        """
+        if not self._path or not self._unsaved:
+            return
+
+        with file_utils.file_lock(self._path):
+            sketches = self._load()
+
+            for key, unsaved_sketch in self._unsaved.items():
+                sketch = sketches.get(key)
+                if sketch is None or sketch.relative_accuracy != unsaved_sketch.relative_accuracy:
+                    sketches[key] = unsaved_sketch
+                else:
+                    sketch.merge(unsaved_sketch)
+
+            data = {"version": TIMEOUTS_VERSION,
+                    "sketches": dict((key, sketch.to_dict()) for key, sketch in sketches.items())}
+            file_utils.write_file(self._path, json.dumps(data, separators=(",", ":")).encode("utf-8"))
+
+        self._sketches = sketches
+        self._unsaved = {}
+
+    def get_timeout(self, resource, operation, protocol, default):
+        """
+
+        :param str resource: resource name
+        :param str operation: load/save/commit
+        :param str protocol: file transfer protocol
+        :param int default: timeout without history, None means the CLI session default
+        :return: timeout in seconds
+        :rtype: int
+        """
+        with self._lock:
+            sketch = self._sketches.get(self._get_key(resource, operation, protocol))
+            learned = sketch.quantile(self._quantile) if sketch and sketch.count >= self._min_samples else None
+
+        if learned is None:
+            return default
+
+        timeout = max(int(math.ceil(learned * self._safety_factor)), self._min_timeout)
+
+        return timeout if default is None else min(timeout, default)
+
+    def record(self, resource, operation, protocol, duration):
+        """
+
+        :param str resource: resource name
+        :param str operation: load/save/commit
+        :param str protocol: file transfer protocol
+        :param float duration: seconds
+        """
+        key = self._get_key(resource, operation, protocol)
+
+        with self._lock:
+            self._sketches.setdefault(key, DurationSketch()).add(duration)
+            self._unsaved.setdefault(key, DurationSketch()).add(duration)
+            try:
+                self._save()
+            except (IOError, OSError):
+                pass
+
+
+_advisor = None
+_advisor_lock = threading.Lock()
+
+
+def get_timeouts_file():
+    """
+
+    :rtype: str
+    """
+    return os.environ.get(TIMEOUTS_FILE_ENV) or os.path.join(tempfile.gettempdir(), DEFAULT_TIMEOUTS_FILE_NAME)
+
+
+def get_advisor():
+    """Get shared advisor persisted to the VYOS_TIMEOUTS_FILE
+
+    :rtype: TimeoutAdvisor
+    """
+    global _advisor
+
+    with _advisor_lock:
+        if _advisor is None:
+            _advisor = TimeoutAdvisor(path=get_timeouts_file())
+
+        return _advisor
+
+
+@contextmanager
+def adaptive_timeout(resource, operation, url, default, advisor=None):
+    """Get timeout for the operation and learn from its duration
+
+    Duration is recorded when operation succeeds or when it used up its timeout, other failures are ignored.
+    Operations of the unknown resource always use the default timeout.
+
+    Usage:
+        with adaptive_timeout("vyos-1", LOAD_OPERATION, "scp://host/vyos.boot", default=300) as timeout:
+            executor.execute_command(..., timeout=timeout)
+
+    :param str resource: resource name
+    :param str operation: load/save/commit
+    :param str url: file URL, protocol is taken from it
+    :param int default: default timeout
+    :param TimeoutAdvisor advisor: shared advisor by default
+    """
+    if resource is None:
+        yield default
+        return
+
+    advisor = advisor or get_advisor()
+    protocol = get_protocol(url)
+    timeout = advisor.get_timeout(resource=resource, operation=operation, protocol=protocol, default=default)
+    start_time = time.time()
+
+    try:
+        yield timeout
+    except Exception:
+        duration = time.time() - start_time
+        if timeout and duration >= timeout * TIMED_OUT_RATIO:
+            advisor.record(resource=resource, operation=operation, protocol=protocol, duration=duration)
+        raise
+
+    advisor.record(resource=resource, operation=operation, protocol=protocol, duration=time.time() - start_time)
@@ -0,0 +1,194 @@
+"""Phase level tracing of the driver commands
+
+Spans are nested per thread and written as JSON lines to the file from the VYOS_TRACE_FILE environment variable:
+
+    {"trace_id": "...", "span_id": "...", "parent_id": "...", "name": "vcenter.connect", "start": 1526380000.1,
+     "duration": 0.734, "status": "ok", "thread": "Thread-3", "attributes": {"resource": "vyos-1"}}
+
+When tracing is disabled span() returns a shared no-op object, so instrumented code pays only for a function call.
+"""
+
+from functools import wraps
+import json
+import os
+import threading
+import time
+import uuid
+
+
+TRACE_FILE_ENV = "VYOS_TRACE_FILE"
+
+STATUS_OK = "ok"
+STATUS_ERROR = "error"
+
+
+class _NoopSpan(object):
+    def set(self, **attributes):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Span(object):
+    __slots__ = ("_tracer", "name", "attributes", "trace_id", "span_id", "parent_id", "start")
+
+    def __init__(self, tracer, name, attributes):
+        """
+
+        :param Tracer tracer:
+        :param str name: phase name, i.e. "vcenter.connect"
+        :param dict attributes: resource names, attempt counts, etc.
+        """
+        self._tracer = tracer
+        self.name = name
+        self.attributes = attributes
+        self.trace_id = None
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = None
+        self.start = None
+
+    def set(self, **attributes):
+        """Add attributes to the span, i.e. number of attempts known only at the end of the phase"""
+        self.attributes.update(attributes)
+
+    def __enter__(self):
+        stack = self._tracer.get_stack()
+        if stack:
+            self.trace_id = stack[-1].trace_id
+            self.parent_id = stack[-1].span_id
+        else:
+            self.trace_id = uuid.uuid4().hex
+
+        stack.append(self)
+        self.start = time.time()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.time() - self.start
+        stack = self._tracer.get_stack()
+        if stack and stack[-1] is self:
+            stack.pop()
+
+        record = {"trace_id": self.trace_id,
+                  "span_id": self.span_id,
+                  "parent_id": self.parent_id,
+                  "name": self.name,
+                  "start": round(self.start, 6),
+                  "duration": round(duration, 6),
+                  "status": STATUS_OK if exc_type is None else STATUS_ERROR,
+                  "thread": threading.current_thread().name,
+                  "attributes": self.attributes}
+
+        if exc_type is not None:
+            record["error"] = "{}: {}".format(exc_type.__name__, exc_val)
+
+        self._tracer.emit(record)
+        return False
+
+
+class Tracer(object):
+    def __init__(self, path=None):
+        """
+
+        :param str path: file to append JSON lines to, tracing is disabled if not set
+        """
+        self._path = path
+        self._file = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def enabled(self):
+        return self._path is not None
+
+    def get_stack(self):
+        """Spans opened in the current thread
+
+        :rtype: list[Span]
+        """
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+
+        return stack
+
+    def span(self, name, **attributes):
+        """
+
+        :param str name: phase name
+        :rtype: Span
+        """
+        if self._path is None:
+            return NOOP_SPAN
+
+        return Span(tracer=self, name=name, attributes=attributes)
+
+    def emit(self, record):
+        """
+
+        :param dict record:
+        """
+        line = json.dumps(record, default=str) + "\n"
+
+        with self._lock:
+            try:
+                if self._file is None:
+                    self._file = open(self._path, "a")
+                self._file.write(line)
+                self._file.flush()
+            except (IOError, OSError):
+                pass
+
+
+_tracer = Tracer(path=os.environ.get(TRACE_FILE_ENV) or None)
+
+
+def configure(path):
+    """Enable tracing to the given file, or disable it if path is None
+
+    :param str path:
+    """
+    global _tracer
+    _tracer = Tracer(path=path)
+
+
+def span(name, **attributes):
+    """Open a span for the phase
+
+    Usage:
+        with tracing.span("vcenter.connect", vcenter=vcenter_name) as phase:
+            ...
+            phase.set(attempts=attempts)
+
+    :param str name: phase name
+    :rtype: Span
+    """
+    return _tracer.span(name, **attributes)
+
+
+def _get_resource_name(context):
+    resource = getattr(context, "resource", None)
+    return getattr(resource, "fullname", None) or getattr(resource, "name", None)
+
+
+def traced_command(func):
+    """Wrap driver command into the root span with the resource name
+
+    :param func: driver command with the context as a first argument
+    """
+    @wraps(func)
+    def wrapper(self, context, *args, **kwargs):
+        if not _tracer.enabled:
+            return func(self, context, *args, **kwargs)
+
+        with _tracer.span("command.{}".format(func.__name__), resource=_get_resource_name(context)):
+            return func(self, context, *args, **kwargs)
+
+    return wrapper
@@ -2,11 +2,16 @@
 #
 # Vyatta Clone Helper: Clear NIC hw-id [on boot]
 #
+# Usage: clear-nic-hw-id.pl [config_file] [sysfs_net_dir]
+#
+# Interface presence is read once from sysfs and config.boot is scanned in a single pass, without loading
+# the whole configuration tree. Modified config is written to a temporary file and renamed over the original.
+#
 use strict;
 use POSIX qw(strftime);
 use File::Copy;
-use lib "/opt/vyatta/share/perl5/";
-use XorpConfigParser;
+use File::Basename qw(dirname);
+use File::Temp qw(tempfile);
 
 use constant TRUE	=> 1;
 use constant FALSE	=> 0;
@@ -15,39 +20,71 @@ use constant CLEAR      => 2;
 
 my $config_file 	= "/opt/vyatta/etc/config/config.boot";
 $config_file            = $ARGV[0] if defined($ARGV[0]);
+my $sysfs_net_dir       = "/sys/class/net";
+$sysfs_net_dir          = $ARGV[1] if defined($ARGV[1]);
 my $backup_config_file  = $config_file . ".clear-nic-hw-id." . strftime("%Y%m%d%H%M%S",localtime) . "." . int(rand(10000));
 
-my $xcp 		= new XorpConfigParser();
-$xcp->parse($config_file);
+#
+# Step 0: Read names of the interfaces present in the system
+#
+opendir(my $net_dir, $sysfs_net_dir) or die("Can't open $sysfs_net_dir: $!\n");
+my %present_ifs = map { $_ => TRUE } grep { !/^\./ } readdir($net_dir);
+closedir($net_dir);
+
+#
+# Step 1: Collect information about [ethernet] interfaces in a single pass over the config
+#
+open(my $config_in, '<', $config_file) or die("Can't open $config_file: $!\n");
+my @lines = <$config_in>;
+close $config_in;
 
 my @if_names		= ();
 my %if_presense_state 	= ();
 my %if_config_state	= ();
+my %if_first_line	= ();
+my %if_last_line	= ();
+my %if_hw_id_line	= ();
 my $present_if_number	= 0;
 
-#
-# Step 1: Collect information about [ethernet] interfaces
-#
-my $root_node 	= $xcp->get_node(['interfaces']);
-my $nodes 	= $root_node->{'children'};
-foreach my $node (@$nodes) {
-  if ($node->{'name'} =~ m/^ethernet eth[0-9]{1,}$/) {
-    my $if_name 			= $node->{'name'}; $if_name =~ s/^ethernet //;
-    @if_names 				= (@if_names, $if_name);
+my $depth		= 0;
+my $in_interfaces	= FALSE;
+my $current_if		= undef;
+
+for my $line_number (0 .. $#lines) {
+  my $statement = $lines[$line_number];
+  $statement =~ s/"(?:[^"\\]|\\.)*"/""/g; # Braces inside of the quoted values (i.e. descriptions) don't count
+  $statement =~ s/\/\*.*?\*\///g;
+  $statement =~ s/^\s+|\s+$//g;
+
+  if (($depth == 0) and ($statement =~ m/^interfaces\s*\{$/)) {
+    $in_interfaces = TRUE;
+  } elsif ($in_interfaces and ($depth == 1) and ($statement =~ m/^ethernet (eth[0-9]{1,})(\s*\{)?$/)) {
+    my $if_name 			= $1;
+    push(@if_names, $if_name);
     $if_presense_state{$if_name} 	= FALSE;
     $if_config_state{$if_name}   	= FALSE;
-    if (`/sbin/ip link show $if_name 2>/dev/null`) {
+    $if_first_line{$if_name}		= $line_number;
+    $if_last_line{$if_name}		= $line_number;
+    if ($present_ifs{$if_name}) {
       $if_presense_state{$if_name} = TRUE;
       $present_if_number++;
     }
-    my $child_nodes 			= $node->{'children'};
-    foreach my $child_node (@$child_nodes) {
-      if ($child_node->{'name'} !~ m/^hw-id .*/) {
-        $if_config_state{$if_name} = TRUE;
-        last;
-      }
+    $current_if = $if_name if defined($2);
+  } elsif (defined($current_if) and ($depth == 2) and ($statement ne '') and ($statement ne '}')) {
+    if ($statement =~ m/^hw-id /) {
+      $if_hw_id_line{$current_if} = $line_number unless defined($if_hw_id_line{$current_if});
+    } else {
+      $if_config_state{$current_if} = TRUE;
     }
   }
+
+  $depth += ($statement =~ tr/{//) - ($statement =~ tr/}//);
+
+  if (defined($current_if) and ($depth <= 1)) {
+    $if_last_line{$current_if} = $line_number;
+    $current_if = undef;
+  }
+  $in_interfaces = FALSE if ($depth <= 0);
 }
 
 #
@@ -73,36 +110,30 @@ if ($mode_of_operation == REMAP) {
 }
 
 #
-# Step 3: Perform actual remap/clear
+# Step 3: Mark lines to drop: hw-id of the kept interfaces and whole blocks of the excess interfaces
 #
+my @drop_line = (FALSE) x scalar(@lines);
 my $if_c = 1;
 foreach my $if_name (@if_names) {
   if ($if_c <= $old_if_number) { # For these interfaces we just clear hw-id
-    my $node 		= $xcp->get_node(['interfaces', 'ethernet ' . $if_name]);
-    my $child_nodes 	= $node->{'children'};
-    my $hw_id 		= '';
-    foreach my $child_node (@$child_nodes) {
-      if ($child_node->{'name'} =~ /hw-id .*/) {
-        $hw_id = $child_node->{'name'};
-        last;
-      }
-    }
-    $xcp->delete_child($node->{'children'}, $hw_id);
-    } else { # Delete excess interfaces (NB! In clear mode we never get here!)
-      my $node 		= $xcp->get_node(['interfaces']);
-      my $sub_node 	= $xcp->get_node(['interfaces', 'ethernet ' . $if_name]);
-      $xcp->delete_child($node->{'children'}, 'ethernet ' . $if_name);
-    }
+    $drop_line[$if_hw_id_line{$if_name}] = TRUE if defined($if_hw_id_line{$if_name});
+  } else { # Delete excess interfaces (NB! In clear mode we never get here!)
+    $drop_line[$_] = TRUE for ($if_first_line{$if_name} .. $if_last_line{$if_name});
+  }
   $if_c++;
 }
 
 # Backup original config file
 copy($config_file, $backup_config_file) or die("Can't copy(backup) $config_file to $backup_config_file: $!\n");
-# Overwrite original config file
-open(my $config, '>', $config_file) or die ("Can't open $config_file: $!");
-select $config;
-$xcp->output(0);
-select STDOUT;
-close $config;
+# Write new config next to the original one and replace it atomically, keeping its permissions and owner
+my @config_stat = stat($config_file);
+my ($config, $tmp_config_file) = tempfile(".clear-nic-hw-id.XXXXXX", DIR => dirname($config_file));
+for my $line_number (0 .. $#lines) {
+  print $config $lines[$line_number] unless $drop_line[$line_number];
+}
+close($config) or die("Can't write $tmp_config_file: $!\n");
+chmod($config_stat[2] & 07777, $tmp_config_file);
+chown($config_stat[4], $config_stat[5], $tmp_config_file);
+rename($tmp_config_file, $config_file) or die("Can't replace $config_file: $!\n");
 # Bye Bye Kansas!
 exit(0);
@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.command_actions.batch_actions`
+"""
+
+from distutils.spawn import find_executable
+import logging
+import os
+import re
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+try:
+    from vyos.command_actions import batch_actions
+except ImportError:
+    batch_actions = None
+
+
+COMMANDS = ["set interfaces ethernet eth1 description 'uplink  # 1'",
+            "set system login banner pre-login 'it'\\''s \"error: none\" $HOME'",
+            "delete interfaces ethernet eth2"]
+
+
+class _CliService(object):
+    def __init__(self):
+        self.calls = []
+
+    def send_command(self, command, action_map=None, error_map=None, **kwargs):
+        self.calls.append((command, error_map))
+        return ""
+
+
+@unittest.skipIf(batch_actions is None, "cloudshell-cli is required")
+class TestBatchActions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_prepare_batch_commands(self):
+        commands, save = batch_actions.prepare_batch_commands(["configure", " set system host-name r1 ", "",
+                                                               "commit", "save", "exit"])
+
+        self.assertEqual(commands, ["set system host-name r1"])
+        self.assertTrue(save)
+        self.assertEqual(batch_actions.prepare_batch_commands(["delete system ntp"]), (["delete system ntp"], False))
+
+    def test_build_batch_script(self):
+        lines = batch_actions.build_batch_script(COMMANDS[:2], save=True).splitlines()
+
+        self.assertEqual(lines[:3], ["#!/bin/vbash", "source /opt/vyatta/etc/functions/script-template", "configure"])
+        self.assertEqual(lines[3:5], ["echo '__VYOS_BATCH_BEGIN__ 0'",
+                                      COMMANDS[0] + " || { echo '__VYOS_BATCH_FAILED__ 0'; exit 1; }"])
+        self.assertEqual(lines[-5:], ["echo '__VYOS_BATCH_BEGIN__ commit'",
+                                      "commit || { echo '__VYOS_BATCH_FAILED__ commit'; exit 1; }",
+                                      "save", "exit", "echo '__VYOS_BATCH_DONE__'"])
+
+    def test_parse_batch_output(self):
+        output = ("__VYOS_BATCH_BEGIN__ 0\r\n"
+                  "__VYOS_BATCH_BEGIN__ 1\r\n"
+                  "  Invalid value\r\n"
+                  "Set failed\r\n"
+                  "__VYOS_BATCH_FAILED__ 1\r\n"
+                  "vyos@vyos:~$ ")
+
+        results = batch_actions.parse_batch_output(COMMANDS, output)
+
+        self.assertEqual([(result["executed"], result["success"]) for result in results],
+                         [(True, True), (True, False), (False, False), (False, False)])
+        self.assertEqual(results[1]["output"], "Invalid value\r\nSet failed")
+        self.assertEqual(results[-1]["command"], "commit")
+
+        results = batch_actions.parse_batch_output(COMMANDS[:1], "__VYOS_BATCH_BEGIN__ 0\n__VYOS_BATCH_BEGIN__ "
+                                                                 "commit\n__VYOS_BATCH_DONE__\nvyos@vyos:~$ ")
+        self.assertTrue(all(result["success"] for result in results))
+
+    def test_upload_script_error_map_ignores_script_content(self):
+        cli_service = _CliService()
+        batch_actions.ConfigBatchActions(cli_service, logging.getLogger(__name__)).upload_script(
+            script="error: line 1\nline 2\nline 3\n", remote_path="/tmp/batch.sh", chunk_size=2)
+
+        self.assertEqual([command.split(" ")[-2:] for command, _ in cli_service.calls],
+                         [[">", "/tmp/batch.sh"], [">>", "/tmp/batch.sh"]])
+
+        for command, error_map in cli_service.calls:
+            self.assertFalse([pattern for pattern in error_map if re.search(pattern, command, re.DOTALL)])
+
+        self.assertTrue(re.search(list(error_map)[0], "-vbash: /tmp/batch.sh: Permission denied"))
+
+    @unittest.skipUnless(find_executable("bash"), "bash is required")
+    def test_uploaded_script_is_written_as_is(self):
+        cli_service = _CliService()
+        remote_path = os.path.join(self.tmp_dir, "batch.sh")
+        script = batch_actions.build_batch_script(COMMANDS)
+
+        batch_actions.ConfigBatchActions(cli_service, logging.getLogger(__name__)).upload_script(
+            script=script, remote_path=remote_path, chunk_size=4)
+
+        for command, _ in cli_service.calls:
+            subprocess.check_call(["bash", "-c", command])
+
+        with open(remote_path) as script_file:
+            self.assertEqual(script_file.read(), script)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.autoload.bulk` and `vyos.autoload.cache`
+"""
+
+import logging
+import threading
+import time
+import unittest
+
+from vyos.autoload.bulk import discover_concurrently
+from vyos.autoload.cache import AutoloadCache
+from vyos.configuration_attributes_structure import VyOSResource
+
+
+class TestBulkAutoload(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.resource_configs = [VyOSResource(address="192.168.1.{}".format(index), fullname="vyos-{}".format(index))
+                                 for index in range(4)]
+
+    def test_resources_are_discovered_concurrently(self):
+        def discover(resource_config):
+            time.sleep(0.2)
+            return resource_config.fullname
+
+        results, summary = discover_concurrently(resource_configs=self.resource_configs,
+                                                 discover=discover,
+                                                 logger=self.logger,
+                                                 max_workers=4)
+
+        self.assertEqual([result["details"] for result in results], ["vyos-0", "vyos-1", "vyos-2", "vyos-3"])
+        self.assertEqual(summary["succeeded"], 4)
+        self.assertLess(summary["wall_time"], summary["sum_of_durations"])
+
+    def test_failed_resource_doesnt_stop_others(self):
+        def discover(resource_config):
+            if resource_config.fullname == "vyos-1":
+                raise Exception("Unable to connect")
+            return resource_config.fullname
+
+        results, summary = discover_concurrently(resource_configs=self.resource_configs,
+                                                 discover=discover,
+                                                 logger=self.logger)
+
+        self.assertEqual(summary["failed"], 1)
+        self.assertEqual(results[1]["error"], "Unable to connect")
+        self.assertIsNone(results[1]["details"])
+
+    def test_cached_details_are_consumed_once(self):
+        cache = AutoloadCache(ttl=60)
+        cache.put(self.resource_configs[0], "details")
+
+        self.assertEqual(cache.pop(self.resource_configs[0]), "details")
+        self.assertIsNone(cache.pop(self.resource_configs[0]))
+
+    def test_expired_details_are_ignored(self):
+        cache = AutoloadCache(ttl=-1)
+        cache.put(self.resource_configs[0], "details")
+
+        self.assertIsNone(cache.pop(self.resource_configs[0]))
+
+    def test_pending_details_are_waited_for(self):
+        cache = AutoloadCache(ttl=60)
+        cache.start(self.resource_configs[0])
+        timer = threading.Timer(0.2, cache.put, args=(self.resource_configs[0], "details"))
+        timer.start()
+
+        self.assertTrue(cache.is_pending(self.resource_configs[0]))
+        self.assertEqual(cache.pop(self.resource_configs[0], timeout=5), "details")
+        self.assertFalse(cache.is_pending(self.resource_configs[0]))
+
+    def test_cancelled_discovery_isnt_waited_for(self):
+        cache = AutoloadCache(ttl=60)
+        cache.start(self.resource_configs[0])
+        threading.Timer(0.1, cache.cancel, args=(self.resource_configs[0],)).start()
+        start_time = time.time()
+
+        self.assertIsNone(cache.pop(self.resource_configs[0], timeout=5))
+        self.assertLess(time.time() - start_time, 2)
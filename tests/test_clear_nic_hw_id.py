@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos/vm_scripts/clear-nic-hw-id.pl`
+"""
+
+from distutils.spawn import find_executable
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+
+
+SCRIPT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, "src", "vyos", "vm_scripts",
+                           "clear-nic-hw-id.pl")
+
+CONFIG_FOOTER = ('system {\n    host-name vyos\n    login {\n        user vyos {\n            authentication {\n'
+                 '                plaintext-password ""\n            }\n        }\n    }\n}\n\n\n'
+                 '/* Warning: Do not remove the following line. */\n'
+                 '/* === vyatta-config-version: "system@6:quagga@2:webgui@1" === */\n'
+                 '/* Release version: VyOS 1.1.8 */\n')
+
+
+def generate_config(interfaces):
+    """
+
+    :param list[tuple[str, bool]] interfaces: interface name and whether it has configuration besides hw-id
+    :rtype: str
+    """
+    lines = ["interfaces {"]
+
+    for index, (if_name, configured) in enumerate(interfaces):
+        lines.append("    ethernet {} {{".format(if_name))
+        if configured:
+            lines.extend(["        address 10.0.{}.1/24".format(index),
+                          '        description "uplink {{{}}}"'.format(index)])
+        lines.append("        hw-id 00:0c:29:00:00:{:02x}".format(index))
+        lines.append("    }")
+
+    lines.extend(["    loopback lo {", "    }", "}"])
+
+    return "\n".join(lines) + "\n" + CONFIG_FOOTER
+
+
+@unittest.skipUnless(find_executable("perl"), "perl is not available")
+class TestClearNicHwId(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.config_file = os.path.join(self.tmp_dir, "config.boot")
+        self.sysfs_dir = os.path.join(self.tmp_dir, "net")
+        os.mkdir(self.sysfs_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def _run(self, config, present_interfaces):
+        with open(self.config_file, "w") as config_file:
+            config_file.write(config)
+
+        for if_name in present_interfaces + ["lo"]:
+            os.mkdir(os.path.join(self.sysfs_dir, if_name))
+
+        process = subprocess.Popen(["perl", SCRIPT_PATH, self.config_file, self.sysfs_dir],
+                                   stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        _, error = process.communicate()
+
+        with open(self.config_file) as config_file:
+            return process.returncode, config_file.read(), error.decode("utf-8")
+
+    def _backups(self):
+        return [file_name for file_name in os.listdir(self.tmp_dir) if ".clear-nic-hw-id." in file_name]
+
+    def test_clear_mode_removes_hw_id_only(self):
+        interfaces = [("eth{}".format(index), index % 2 == 0) for index in range(8)]
+        config = generate_config(interfaces)
+
+        return_code, new_config, _ = self._run(config, [if_name for if_name, _ in interfaces])
+
+        self.assertEqual(return_code, 0)
+        self.assertNotIn("hw-id", new_config)
+        self.assertEqual(new_config, "".join(line for line in config.splitlines(True) if "hw-id" not in line))
+        self.assertEqual(len(self._backups()), 1)
+
+    def test_clear_mode_when_no_interfaces_present(self):
+        config = generate_config([("eth0", True), ("eth1", False), ("eth2", False)])
+
+        return_code, new_config, _ = self._run(config, [])
+
+        self.assertEqual(return_code, 0)
+        self.assertNotIn("hw-id", new_config)
+        self.assertIn("ethernet eth2 {", new_config)
+
+    def test_remap_mode_drops_new_interfaces(self):
+        config = generate_config([("eth0", True), ("eth1", True), ("eth2", False), ("eth3", False)])
+
+        return_code, new_config, _ = self._run(config, ["eth2", "eth3"])
+
+        self.assertEqual(return_code, 0)
+        self.assertNotIn("hw-id", new_config)
+        self.assertIn("ethernet eth0 {", new_config)
+        self.assertIn('description "uplink {1}"', new_config)
+        self.assertNotIn("ethernet eth2", new_config)
+        self.assertNotIn("ethernet eth3", new_config)
+        self.assertIn("loopback lo {\n    }\n}\nsystem {", new_config)
+
+    def test_remap_mode_fails_on_odd_interface_number(self):
+        config = generate_config([("eth0", True), ("eth1", False), ("eth2", False)])
+
+        return_code, new_config, error = self._run(config, ["eth1", "eth2"])
+
+        self.assertNotEqual(return_code, 0)
+        self.assertIn("Odd interface number: 3", error)
+        self.assertEqual(new_config, config)
+        self.assertEqual(self._backups(), [])
+
+    def test_remap_mode_fails_on_configured_new_interface(self):
+        config = generate_config([("eth0", True), ("eth1", True), ("eth2", False), ("eth3", True)])
+
+        return_code, new_config, error = self._run(config, ["eth2", "eth3"])
+
+        self.assertNotEqual(return_code, 0)
+        self.assertIn("New interface absent or configured: eth3", error)
+        self.assertEqual(new_config, config)
@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.command_actions.config_transaction`
+"""
+
+import logging
+import unittest
+
+try:
+    from vyos.command_actions.config_transaction import ConfigTransaction
+except ImportError:
+    ConfigTransaction = None
+
+
+class _CliService(object):
+    def __init__(self, failing_commands=()):
+        self.commands = []
+        self._failing_commands = failing_commands
+
+    def send_command(self, command, action_map=None, error_map=None, **kwargs):
+        self.commands.append(command)
+        if command.split(" ")[0] in self._failing_commands:
+            raise Exception("Failed to execute '{}'".format(command))
+        return ""
+
+
+@unittest.skipIf(ConfigTransaction is None, "cloudshell-cli is required")
+class TestConfigTransaction(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.disabled = True
+        self.addCleanup(setattr, self.logger, "disabled", False)
+
+    def test_operations_are_committed_once(self):
+        cli_service = _CliService()
+
+        with ConfigTransaction(cli_service, self.logger) as transaction:
+            transaction.set("interfaces ethernet eth1 vif 10")
+            transaction.add("delete interfaces ethernet eth1 vif 20")
+
+        self.assertEqual(cli_service.commands, ["set interfaces ethernet eth1 vif 10",
+                                                "delete interfaces ethernet eth1 vif 20",
+                                                "commit"])
+
+    def test_nothing_is_sent_if_block_failed(self):
+        cli_service = _CliService()
+
+        with self.assertRaises(ValueError):
+            with ConfigTransaction(cli_service, self.logger) as transaction:
+                transaction.set("interfaces ethernet eth1 vif 10")
+                raise ValueError()
+
+        self.assertEqual(cli_service.commands, [])
+
+    def test_changes_are_discarded_on_failure(self):
+        cli_service = _CliService(failing_commands=("commit",))
+
+        with self.assertRaises(Exception) as error:
+            with ConfigTransaction(cli_service, self.logger) as transaction:
+                transaction.set("interfaces ethernet eth1 vif 10")
+
+        self.assertEqual(str(error.exception), "Failed to execute 'commit'")
+        self.assertEqual(cli_service.commands, ["set interfaces ethernet eth1 vif 10", "commit", "discard"])
+
+    def test_discard_error_doesnt_hide_original_error(self):
+        cli_service = _CliService(failing_commands=("set", "discard"))
+
+        with self.assertRaises(Exception) as error:
+            with ConfigTransaction(cli_service, self.logger) as transaction:
+                transaction.set("interfaces ethernet eth1 vif 10")
+
+        self.assertEqual(str(error.exception), "Failed to execute 'set interfaces ethernet eth1 vif 10'")
+        self.assertEqual(cli_service.commands, ["set interfaces ethernet eth1 vif 10", "discard"])
+
+    def test_changes_are_confirmed_after_verification(self):
+        cli_service = _CliService()
+
+        with ConfigTransaction(cli_service, self.logger, confirm_minutes=5,
+                               verify_callback=lambda: True) as transaction:
+            transaction.set("system ntp server 10.0.0.1")
+
+        self.assertEqual(cli_service.commands, ["set system ntp server 10.0.0.1", "commit-confirm 5", "confirm"])
+
+    def test_changes_are_not_confirmed_if_verification_failed(self):
+        cli_service = _CliService()
+
+        with self.assertRaises(Exception) as error:
+            with ConfigTransaction(cli_service, self.logger, confirm_minutes=5,
+                                   verify_callback=lambda: False) as transaction:
+                transaction.set("system ntp server 10.0.0.1")
+
+        self.assertIn("roll back them in 5 minute(s)", str(error.exception))
+        self.assertEqual(cli_service.commands, ["set system ntp server 10.0.0.1", "commit-confirm 5"])
+
+
+if __name__ == '__main__':
+    unittest.main()
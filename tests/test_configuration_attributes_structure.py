@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.configuration_attributes_structure`
+"""
+
+from multiprocessing.pool import ThreadPool
+import unittest
+
+from vyos.configuration_attributes_structure import VyOSResource
+
+
+SHELL_TYPE = "CS_GenericDeployedApp"
+SHELL_NAME = "Vyos"
+
+
+class _Namespace(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+def build_context(attributes):
+    return _Namespace(resource=_Namespace(address="192.168.1.10",
+                                          family="CS_GenericAppFamily",
+                                          fullname="vyos-1",
+                                          name="vyos-1",
+                                          attributes=attributes))
+
+
+class TestVyOSResource(unittest.TestCase):
+
+    def setUp(self):
+        self.attributes = {"Vyos.User": "vyos",
+                           "Vyos.Password": "encrypted",
+                           "Vyos.Enable SSH": "True",
+                           "Vyos.CLI TCP Port": "2222",
+                           "Vyos.Sessions Concurrency Limit": "4.0"}
+
+    def test_attributes_are_parsed_and_typed(self):
+        resource_config = VyOSResource(address="192.168.1.10", shell_type=SHELL_TYPE, shell_name=SHELL_NAME,
+                                       attributes=self.attributes)
+
+        self.assertEqual(resource_config.user, "vyos")
+        self.assertEqual(resource_config.password, "encrypted")
+        self.assertIs(resource_config.enable_ssh, True)
+        self.assertEqual(resource_config.cli_tcp_port, 2222)
+        self.assertEqual(resource_config.sessions_concurrency_limit, 4)
+        self.assertEqual(resource_config.cli_connection_type, "SSH")
+        self.assertIsNone(resource_config.config_file)
+
+    def test_defaults_for_missing_and_invalid_attributes(self):
+        resource_config = VyOSResource(shell_type=SHELL_TYPE, shell_name=SHELL_NAME,
+                                       attributes={"Vyos.CLI TCP Port": "", "Vyos.Sessions Concurrency Limit": "0"})
+
+        self.assertEqual(resource_config.cli_tcp_port, 22)
+        self.assertEqual(resource_config.sessions_concurrency_limit, 1)
+        self.assertIs(resource_config.enable_ssh, False)
+
+    def test_resource_config_is_immutable(self):
+        resource_config = VyOSResource(shell_type=SHELL_TYPE, shell_name=SHELL_NAME, attributes=self.attributes)
+
+        with self.assertRaises(AttributeError):
+            resource_config.user = "root"
+        with self.assertRaises(AttributeError):
+            resource_config.custom = "value"
+        with self.assertRaises(TypeError):
+            resource_config.attributes["Vyos.User"] = "root"
+
+        self.attributes["Vyos.User"] = "root"
+        self.assertEqual(resource_config.user, "vyos")
+
+    def test_from_context_is_memoized_per_attributes(self):
+        first = VyOSResource.from_context(build_context(dict(self.attributes)), SHELL_TYPE, SHELL_NAME)
+        second = VyOSResource.from_context(build_context(dict(self.attributes)), SHELL_TYPE, SHELL_NAME)
+
+        self.attributes["Vyos.CLI TCP Port"] = "22"
+        changed = VyOSResource.from_context(build_context(self.attributes), SHELL_TYPE, SHELL_NAME)
+
+        self.assertIs(first, second)
+        self.assertIsNot(first, changed)
+        self.assertEqual(changed.cli_tcp_port, 22)
+
+    def test_concurrent_commands_share_resource_config(self):
+        attributes = dict(self.attributes, **{"Vyos.User": "concurrent"})
+        pool = ThreadPool(8)
+        try:
+            resource_configs = pool.map(lambda _: VyOSResource.from_context(build_context(attributes), SHELL_TYPE,
+                                                                            SHELL_NAME), range(64))
+        finally:
+            pool.close()
+            pool.join()
+
+        self.assertEqual(len(set(id(resource_config) for resource_config in resource_configs)), 1)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.connectivity`
+"""
+
+import json
+import unittest
+
+from vyos import connectivity
+
+
+def build_action(action_id, action_type, target, vlan_id):
+    return {"actionId": action_id,
+            "type": action_type,
+            "actionTarget": {"fullName": target, "fullAddress": "10.0.0.1/1"},
+            "connectionId": "connection-{}".format(action_id),
+            "connectionParams": {"vlanId": vlan_id, "mode": "Trunk", "type": "setVlanParameter"},
+            "connectorAttributes": [],
+            "customActionAttributes": []}
+
+
+class TestConnectivity(unittest.TestCase):
+
+    def test_actions_grouped_per_device(self):
+        request = json.dumps({"driverRequest": {"actions": [
+            build_action("1", connectivity.SET_VLAN, "vyos-1/eth1", "10-12"),
+            build_action("2", connectivity.SET_VLAN, "vyos-2/eth2", "20"),
+            build_action("3", connectivity.REMOVE_VLAN, "vyos-1/eth1", "30,40"),
+        ]}})
+
+        device_actions = connectivity.group_by_device(connectivity.parse_request(request))
+
+        self.assertEqual(list(device_actions), ["vyos-1", "vyos-2"])
+        self.assertEqual([command for action in device_actions["vyos-1"] for command in action.get_commands()],
+                         ["set interfaces ethernet eth1 vif 10",
+                          "set interfaces ethernet eth1 vif 11",
+                          "set interfaces ethernet eth1 vif 12",
+                          "delete interfaces ethernet eth1 vif 30",
+                          "delete interfaces ethernet eth1 vif 40"])
+        self.assertEqual(device_actions["vyos-2"][0].get_commands(), ["set interfaces ethernet eth2 vif 20"])
+
+    def test_invalid_vlan_ids(self):
+        for vlan_id in ("0", "4095", "20-10", "abc"):
+            with self.assertRaises(Exception):
+                connectivity.parse_vlan_ids(vlan_id)
+
+    def test_unsupported_action_type(self):
+        request = json.dumps({"driverRequest": {"actions": [
+            build_action("1", "setQinQ", "vyos-1/eth1", "10")]}})
+
+        with self.assertRaises(Exception):
+            connectivity.parse_request(request)
+
+    def test_response(self):
+        action = connectivity.ConnectivityAction(action_id="1", action_type=connectivity.REMOVE_VLAN,
+                                                 target="vyos-1/eth1", vlan_id="10")
+
+        response = json.loads(connectivity.build_response([
+            connectivity.build_action_result(action=action, success=True, message=action.success_message)]))
+
+        self.assertEqual(response["driverResponse"]["actionResults"],
+                         [{"actionId": "1", "type": "removeVlan", "updatedInterface": "vyos-1/eth1",
+                           "infoMessage": "VLAN 10 was removed on 'vyos-1/eth1'", "errorMessage": "",
+                           "success": True}])
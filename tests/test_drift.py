@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.drift`
+"""
+
+from distutils.spawn import find_executable
+import logging
+import subprocess
+import threading
+import time
+import unittest
+
+from vyos.configuration_attributes_structure import VyOSResource
+from vyos import drift
+
+
+BASELINE = """interfaces {
+    ethernet eth0 {
+        address dhcp
+    }
+}
+system {
+    host-name vyos
+}
+
+
+/* Warning: Do not remove the following line. */
+/* === vyatta-config-version: "system@6:config-management@1" === */
+/* Release version: VyOS 1.1.8 */
+"""
+
+RUNNING = """interfaces {
+    ethernet eth0 {
+        address dhcp
+    }
+}
+system {
+    host-name vyos
+}
+"""
+
+LOGIN_BASELINE = """system {
+    login {
+        user vyos {
+            authentication {
+                encrypted-password $6$QxPS.uk6mfo$9QBSo8u1FkH16gMyAVhus6fU3LOzvLR9Z9.82m3tiHFAx/
+                plaintext-password ""
+            }
+            level admin
+        }
+    }
+}
+"""
+
+LOGIN_RUNNING = """system {
+    login {
+        user vyos {
+            authentication {
+                encrypted-password ****************
+                plaintext-password ****************
+            }
+            level admin
+        }
+    }
+}
+"""
+
+
+class TestDrift(unittest.TestCase):
+
+    def test_digest_ignores_comments_and_whitespace(self):
+        self.assertEqual(drift.get_config_digest(BASELINE), drift.get_config_digest(RUNNING))
+        self.assertNotEqual(drift.get_config_digest(BASELINE),
+                            drift.get_config_digest(RUNNING.replace("host-name vyos", "host-name router")))
+
+    @unittest.skipUnless(find_executable("sed") and find_executable("sha256sum"), "sed and sha256sum are required")
+    def test_digest_matches_device_pipeline(self):
+        process = subprocess.Popen(drift.NORMALIZE_CONFIG_PIPELINE, shell=True, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+        output, _ = process.communicate(BASELINE.encode("utf-8"))
+
+        self.assertEqual(drift.parse_digest(output.decode("utf-8")), drift.get_config_digest(BASELINE))
+
+    def test_digest_ignores_masked_secrets(self):
+        self.assertEqual(drift.get_config_digest(LOGIN_BASELINE), drift.get_config_digest(LOGIN_RUNNING))
+        self.assertNotEqual(drift.get_config_digest(LOGIN_BASELINE),
+                            drift.get_config_digest(LOGIN_RUNNING.replace("level admin", "level operator")))
+        self.assertEqual(drift.diff_configs(baseline=LOGIN_BASELINE, running=LOGIN_RUNNING), "")
+
+    @unittest.skipUnless(find_executable("sed") and find_executable("sha256sum"), "sed and sha256sum are required")
+    def test_device_pipeline_masks_secrets(self):
+        process = subprocess.Popen(drift.NORMALIZE_CONFIG_PIPELINE, shell=True, stdin=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+        output, _ = process.communicate(LOGIN_RUNNING.encode("utf-8"))
+
+        self.assertEqual(drift.parse_digest(output.decode("utf-8")), drift.get_config_digest(LOGIN_BASELINE))
+
+    def test_diff_of_the_drifted_configuration(self):
+        diff = drift.diff_configs(baseline=BASELINE, running=RUNNING.replace("host-name vyos", "host-name router"))
+
+        self.assertIn("-    host-name vyos", diff.splitlines())
+        self.assertIn("+    host-name router", diff.splitlines())
+        self.assertNotIn("vyatta-config-version", diff)
+
+    def test_baseline_is_downloaded_once(self):
+        downloads = []
+
+        def download(url):
+            downloads.append(url)
+            return BASELINE.encode("utf-8")
+
+        cache = drift.BaselineCache(ttl=60)
+        baseline, digest = cache.get("tftp://10.0.0.1/vyos.boot", download)
+
+        self.assertEqual(cache.get("tftp://10.0.0.1/vyos.boot", download), (baseline, digest))
+        self.assertEqual(downloads, ["tftp://10.0.0.1/vyos.boot"])
+        self.assertEqual(digest, drift.get_config_digest(RUNNING))
+
+    def test_checks_are_spread_and_limited(self):
+        resource_configs = [VyOSResource(address="10.0.0.{}".format(index), fullname="vyos-{}".format(index))
+                            for index in range(8)]
+        lock = threading.Lock()
+        running = [0]
+        max_running = [0]
+        started = {}
+
+        def check(resource_config):
+            with lock:
+                started[resource_config.fullname] = time.time()
+                running[0] += 1
+                max_running[0] = max(max_running[0], running[0])
+            time.sleep(0.05)
+            with lock:
+                running[0] -= 1
+            return {"drifted": resource_config.fullname == "vyos-0"}
+
+        start_time = time.time()
+        results, summary = drift.DriftScheduler(max_concurrency=2).run(resource_configs=resource_configs,
+                                                                       check=check,
+                                                                       logger=logging.getLogger(__name__),
+                                                                       window=0.5)
+
+        self.assertLessEqual(max_running[0], 2)
+        self.assertEqual((summary["drifted"], summary["in_sync"], summary["failed"]), (1, 7, 0))
+        for resource_config in resource_configs:
+            self.assertGreaterEqual(started[resource_config.fullname] - start_time,
+                                    drift.get_schedule_offset(resource_config.fullname, 0.5) - 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.file_utils`
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from vyos import file_utils
+
+
+class TestFileUtils(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp_dir, "data.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_write_file_replaces_existing_file(self):
+        file_utils.write_file(self.path, b"old")
+        file_utils.write_file(self.path, b"new", mode=0o644)
+
+        with open(self.path, "rb") as data_file:
+            self.assertEqual(data_file.read(), b"new")
+        self.assertEqual(sorted(os.listdir(self.tmp_dir)), ["data.json"])
+
+    def test_replace_file_overwrites_target_when_rename_doesnt(self):
+        source = os.path.join(self.tmp_dir, "source")
+        for path, data in ((source, b"new"), (self.path, b"old")):
+            with open(path, "wb") as data_file:
+                data_file.write(data)
+
+        rename = os.rename
+
+        def windows_rename(src, dst):
+            if os.path.exists(dst):
+                raise OSError(17, "Cannot create a file when that file already exists")
+            rename(src, dst)
+
+        os_replace = getattr(os, "replace", None)
+        try:
+            if os_replace is not None:
+                del os.replace
+            os.rename = windows_rename
+            file_utils.replace_file(source, self.path)
+        finally:
+            os.rename = rename
+            if os_replace is not None:
+                os.replace = os_replace
+
+        with open(self.path, "rb") as data_file:
+            self.assertEqual(data_file.read(), b"new")
+        self.assertFalse(os.path.exists(source))
+
+    def test_file_lock_times_out_while_locked(self):
+        with file_utils.file_lock(self.path):
+            with self.assertRaises(IOError):
+                with file_utils.file_lock(self.path, timeout=0.1):
+                    pass
+
+        with file_utils.file_lock(self.path, timeout=0.1):
+            pass
+
+
+if __name__ == '__main__':
+    unittest.main()
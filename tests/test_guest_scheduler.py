@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.guest_scheduler`
+"""
+
+import threading
+import time
+import unittest
+
+from vyos.guest_scheduler import AdaptiveLimiter
+from vyos.guest_scheduler import GuestOperationsScheduler
+
+
+class GuestOperationsUnavailable(Exception):
+    pass
+
+
+class TestGuestScheduler(unittest.TestCase):
+
+    def run_operations(self, scheduler, hosts, duration=0.05):
+        lock = threading.Lock()
+        in_flight = {}
+        max_in_flight = {}
+
+        def operation(host):
+            with scheduler.slot(vcenter="vcenter", host=host):
+                with lock:
+                    in_flight[host] = in_flight.get(host, 0) + 1
+                    max_in_flight[host] = max(max_in_flight.get(host, 0), in_flight[host])
+                time.sleep(duration)
+                with lock:
+                    in_flight[host] -= 1
+
+        threads = [threading.Thread(target=operation, args=(host,)) for host in hosts]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        return max_in_flight
+
+    def test_operations_are_limited_per_host(self):
+        scheduler = GuestOperationsScheduler(host_initial=2, host_max=2, vcenter_initial=32)
+        max_in_flight = self.run_operations(scheduler, ["host-1"] * 6 + ["host-2"] * 6)
+
+        self.assertEqual(max_in_flight, {"host-1": 2, "host-2": 2})
+
+    def test_operations_are_limited_per_vcenter(self):
+        scheduler = GuestOperationsScheduler(host_initial=8, vcenter_initial=3, vcenter_max=3)
+        lock = threading.Lock()
+        counters = {"in_flight": 0, "max": 0}
+
+        def operation(host):
+            with scheduler.slot(vcenter="vcenter", host=host):
+                with lock:
+                    counters["in_flight"] += 1
+                    counters["max"] = max(counters["max"], counters["in_flight"])
+                time.sleep(0.05)
+                with lock:
+                    counters["in_flight"] -= 1
+
+        threads = [threading.Thread(target=operation, args=("host-{}".format(index),)) for index in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(counters["max"], 3)
+
+    def test_limit_increases_additively_and_decreases_multiplicatively(self):
+        scheduler = GuestOperationsScheduler(host_initial=2, host_max=8)
+
+        # 2 -> 2.5 -> 2.9 -> ... -> 4.1 after 6 successes
+        for _ in range(6):
+            with scheduler.slot(vcenter="vcenter", host="host-1"):
+                pass
+        self.assertEqual(scheduler.get_limiter("host", "host-1").limit, 4)
+
+        with self.assertRaises(GuestOperationsUnavailable):
+            with scheduler.slot(vcenter="vcenter", host="host-1", fault_types=(GuestOperationsUnavailable,)):
+                raise GuestOperationsUnavailable()
+        self.assertEqual(scheduler.get_limiter("host", "host-1").limit, 2)
+
+        with self.assertRaises(ValueError):
+            with scheduler.slot(vcenter="vcenter", host="host-1", fault_types=(GuestOperationsUnavailable,)):
+                raise ValueError()
+        self.assertEqual(scheduler.get_limiter("host", "host-1").limit, 2)
+
+    def test_waiters_are_served_in_order(self):
+        limiter = AdaptiveLimiter(initial=1, maximum=1)
+        limiter.acquire()
+        order = []
+
+        def wait(index):
+            limiter.acquire()
+            order.append(index)
+            limiter.release()
+
+        threads = []
+        for index in range(5):
+            thread = threading.Thread(target=wait, args=(index,))
+            thread.start()
+            threads.append(thread)
+            time.sleep(0.02)
+
+        limiter.release()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(order, list(range(5)))
+
+
+if __name__ == '__main__':
+    unittest.main()
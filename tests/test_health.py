@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.health`
+"""
+
+import socket
+import threading
+import time
+import unittest
+
+from vyos import health
+
+
+class FakeServer(object):
+    def __init__(self, banner=None):
+        """TCP server which sends the banner to each client, sends nothing if banner isn't set"""
+        self._banner = banner
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.bind(("127.0.0.1", 0))
+        self._sock.listen(8)
+        self._clients = []
+        self.port = self._sock.getsockname()[1]
+
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+
+    def _serve(self):
+        while True:
+            try:
+                client, _ = self._sock.accept()
+            except (socket.error, OSError):
+                return
+
+            self._clients.append(client)
+            if self._banner:
+                client.sendall(self._banner)
+
+    def close(self):
+        for client in self._clients:
+            client.close()
+        self._sock.close()
+
+
+def get_closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+
+    return port
+
+
+class TestHealth(unittest.TestCase):
+
+    def setUp(self):
+        self.ssh_server = FakeServer(banner=b"SSH-2.0-OpenSSH_5.5p1 Debian-6+squeeze8\r\n")
+        self.silent_server = FakeServer()
+
+    def tearDown(self):
+        self.ssh_server.close()
+        self.silent_server.close()
+
+    def test_statuses_of_the_targets(self):
+        targets = [health.HealthTarget("vyos-ok", "127.0.0.1", self.ssh_server.port),
+                   health.HealthTarget("vyos-silent", "127.0.0.1", self.silent_server.port),
+                   health.HealthTarget("vyos-down", "127.0.0.1", get_closed_port())]
+
+        results, summary = health.sweep(targets=targets, deadline=1)
+
+        self.assertEqual([result["status"] for result in results],
+                         [health.STATUS_OK, health.STATUS_TIMEOUT, health.STATUS_UNREACHABLE])
+        self.assertEqual(results[0]["banner"], "SSH-2.0-OpenSSH_5.5p1 Debian-6+squeeze8")
+        self.assertEqual((summary["healthy"], summary["unhealthy"]), (1, 2))
+
+    def test_sweep_takes_about_the_slowest_target_time(self):
+        def check(target, deadline):
+            time.sleep(0.3)
+            return {"resource": target.resource, "address": target.address, "status": health.STATUS_OK,
+                    "tcp_ms": 1.0, "banner": "SSH-2.0", "output": None, "error": None, "duration": 0.3}
+
+        targets = [health.HealthTarget("vyos-{}".format(index), "10.0.0.{}".format(index)) for index in range(10)]
+        results, summary = health.sweep(targets=targets, check=check, max_workers=10)
+
+        self.assertEqual(summary["healthy"], 10)
+        self.assertLess(summary["wall_time"], 1.5)
+
+    def test_stuck_target_is_reported_after_the_deadline(self):
+        def check(target, deadline):
+            time.sleep(10 if target.resource == "vyos-stuck" else 0)
+            return {"resource": target.resource, "address": target.address, "status": health.STATUS_OK,
+                    "tcp_ms": 1.0, "banner": "SSH-2.0", "output": None, "error": None, "duration": 0}
+
+        targets = [health.HealthTarget("vyos-ok", "10.0.0.1"), health.HealthTarget("vyos-stuck", "10.0.0.2")]
+        health.HEALTH_CHECK_GRACE_PERIOD, grace_period = 0, health.HEALTH_CHECK_GRACE_PERIOD
+        try:
+            results, summary = health.sweep(targets=targets, check=check, deadline=0.5)
+        finally:
+            health.HEALTH_CHECK_GRACE_PERIOD = grace_period
+
+        self.assertEqual([result["status"] for result in results], [health.STATUS_OK, health.STATUS_TIMEOUT])
+        self.assertLess(summary["wall_time"], 2)
+
+    def test_status_table(self):
+        results = [{"resource": "vyos-1", "address": "10.0.0.1", "status": health.STATUS_OK, "tcp_ms": 1.5,
+                    "banner": "SSH-2.0-OpenSSH", "output": " 10:00:00 up 2 days,\n load average: 0.00",
+                    "error": None, "duration": 0.2},
+                   {"resource": "vyos-2", "address": "10.0.0.2", "status": health.STATUS_UNREACHABLE,
+                    "tcp_ms": None, "banner": None, "output": None, "error": "Connection refused", "duration": 0.1}]
+
+        table = health.format_table(results=results, summary={"resources": 2, "healthy": 1, "wall_time": 0.2})
+        lines = table.splitlines()
+
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith("10:00:00 up 2 days, load average: 0.00"))
+        self.assertIn("unreachable", lines[2])
+        self.assertEqual(lines[-1], "1/2 healthy, 0.2s")
+
+
+if __name__ == '__main__':
+    unittest.main()
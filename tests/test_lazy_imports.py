@@ -0,0 +1,43 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests that heavy dependencies are not imported together with the `driver` module
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+try:
+    import cloudshell.shell.core
+except ImportError:
+    cloudshell = None
+
+
+HEAVY_PACKAGES = ("pyVmomi", "pyVim", "paramiko", "cloudshell.cp.vcenter", "cloudshell.cli")
+
+IMPORT_SCRIPT = """
+import json
+import sys
+
+import driver
+
+print(json.dumps(sorted(sys.modules)))
+"""
+
+
+class TestLazyImports(unittest.TestCase):
+
+    @unittest.skipIf(cloudshell is None, "cloudshell-shell-core is required to import the driver")
+    def test_driver_import_doesnt_load_heavy_packages(self):
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        output = subprocess.check_output([sys.executable, "-c", IMPORT_SCRIPT], env=env)
+        modules = json.loads(output.decode("utf-8").strip().splitlines()[-1])
+
+        leaked = [module for module in modules
+                  if any(module == package or module.startswith(package + ".") for package in HEAVY_PACKAGES)]
+
+        self.assertEqual(leaked, [])
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.logging_utils`
+"""
+
+import logging
+import unittest
+
+from vyos.logging_utils import CoalescingLogger
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super(ListHandler, self).__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class TestCoalescingLogger(unittest.TestCase):
+
+    def setUp(self):
+        self.handler = ListHandler()
+        self.logger = logging.getLogger("{}.{}".format(__name__, self.id()))
+        self.logger.setLevel(logging.DEBUG)
+        self.logger.propagate = False
+        self.logger.addHandler(self.handler)
+
+    def test_repeated_state_is_collapsed(self):
+        loop_logger = CoalescingLogger(self.logger, summary_interval=60)
+
+        for _ in range(14):
+            loop_logger.report("poweredOff", "Waiting for VM. Power state: %s", "poweredOff")
+        loop_logger.report("poweredOn", "Waiting for VM. Power state: %s", "poweredOn")
+        loop_logger.finish("VM is ready")
+
+        self.assertEqual([record.getMessage() for record in self.handler.records],
+                         ["Waiting for VM. Power state: poweredOff",
+                          "Waiting for VM. Power state: poweredOn",
+                          "VM is ready (15 attempt(s))"])
+
+    def test_summary_is_logged_once_per_interval(self):
+        loop_logger = CoalescingLogger(self.logger, summary_interval=0)
+
+        loop_logger.report("toolsNotRunning", "Tools status is %s", "toolsNotRunning")
+        loop_logger.report("toolsNotRunning", "Tools status is %s", "toolsNotRunning")
+
+        self.assertEqual(self.handler.records[-1].getMessage(),
+                         "Still waiting, 2 attempt(s), 2 with the same state. Last state: Tools status is "
+                         "toolsNotRunning")
+
+    def test_traceback_is_logged_on_state_change_only(self):
+        loop_logger = CoalescingLogger(self.logger, summary_interval=0)
+
+        for error in ("unavailable", "unavailable", "unavailable", "timeout"):
+            try:
+                raise Exception(error)
+            except Exception as e:
+                loop_logger.report(str(e), "Operation failed", exc_info=True)
+
+        self.assertEqual([bool(record.exc_info) for record in self.handler.records], [True, False, False, True])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.metrics`
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+try:
+    from urllib.request import urlopen
+except ImportError:
+    from urllib2 import urlopen
+
+from vyos import metrics
+
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = metrics.Registry()
+
+    def test_counter_sums_shards_of_all_threads(self):
+        counter = self.registry.counter("vyos_test_total", "Test counter", ("operation",))
+
+        def increment():
+            for _ in range(1000):
+                counter.inc(operation="load")
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        counter.inc(5, operation="save")
+
+        self.assertEqual(counter.get(operation="load"), 8000)
+        self.assertEqual(counter.get(operation="save"), 5)
+        self.assertIn('vyos_test_total{operation="load"} 8000\n', self.registry.render())
+
+    def test_histogram_and_gauge_render(self):
+        histogram = self.registry.histogram("vyos_test_seconds", "Test histogram", buckets=(1, 10))
+        gauge = self.registry.gauge("vyos_test_in_progress", "Test gauge", ("command",))
+
+        for value in (0.5, 5, 50):
+            histogram.observe(value)
+
+        with gauge.track_in_progress(command="vm_post_boot_configure"):
+            text = self.registry.render()
+
+        self.assertIn('vyos_test_seconds_bucket{le="1.0"} 1\n', text)
+        self.assertIn('vyos_test_seconds_bucket{le="10.0"} 2\n', text)
+        self.assertIn('vyos_test_seconds_bucket{le="+Inf"} 3\n', text)
+        self.assertIn("vyos_test_seconds_sum 55.5\n", text)
+        self.assertIn("vyos_test_seconds_count 3\n", text)
+        self.assertIn('vyos_test_in_progress{command="vm_post_boot_configure"} 1\n', text)
+        self.assertEqual(gauge.get(command="vm_post_boot_configure"), 0)
+
+    def test_metric_type_conflict(self):
+        self.registry.counter("vyos_test_total", "Test counter")
+
+        with self.assertRaises(Exception):
+            self.registry.gauge("vyos_test_total", "Test gauge")
+
+    def test_textfile_and_http_export(self):
+        self.registry.counter("vyos_test_total", "Test counter").inc()
+        tmp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp_dir, "vyos.prom")
+            self.registry.write_textfile(path)
+
+            with open(path) as metrics_file:
+                self.assertEqual(metrics_file.read(), self.registry.render())
+        finally:
+            shutil.rmtree(tmp_dir)
+
+        port = self.registry.serve(port=0)
+        response = urlopen("http://127.0.0.1:{}/metrics".format(port))
+
+        self.assertIn("vyos_test_total 1", response.read().decode("utf-8"))
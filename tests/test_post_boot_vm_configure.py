@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.deployment.post_boot_vm_configure` against the vCenter stand-in of the benchmarks
+"""
+
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+try:
+    from fake_vcenter import FakeVCenter
+    from post_boot import FakeCloudShellAPI
+    from post_boot import VCENTER_NAME
+    import pyVmomi
+    from vyos.configuration_attributes_structure import VyOSResource
+    from vyos.deployment.post_boot_vm_configure import PostBootVMConfigureOperation
+except ImportError:
+    FakeVCenter = None
+
+
+SHELL_NAME = "Vyos"
+
+
+@unittest.skipIf(FakeVCenter is None, "cloudshell-cp-vcenter and pyvmomi are required")
+class TestPostBootVMConfigure(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.disabled = True
+        self.addCleanup(setattr, self.logger, "disabled", False)
+
+    def get_operation(self, vcenter, vm_uuid):
+        resource_config = VyOSResource(address="NA",
+                                       shell_type="CS_GenericDeployedApp",
+                                       shell_name=SHELL_NAME,
+                                       fullname="vyos-1",
+                                       name="vyos-1",
+                                       attributes={"{}.User".format(SHELL_NAME): "vyos",
+                                                   "{}.Password".format(SHELL_NAME): "vyos"})
+
+        return PostBootVMConfigureOperation(resource_config=resource_config,
+                                            cs_api=FakeCloudShellAPI(vm_uuids={"vyos-1": vm_uuid}),
+                                            vcenter_name=VCENTER_NAME,
+                                            logger=self.logger,
+                                            vcenter_service=vcenter.service,
+                                            vm_tools_interval=0.05,
+                                            guest_operations_interval=0.05)
+
+    def test_reboot_waits_for_guest_to_go_down_and_come_back(self):
+        vcenter = FakeVCenter(tools_ready_delay=0.1, guest_operations_delay=0.1, shutdown_delay=0.5, api_latency=0)
+        vm_uuid = vcenter.add_vm()
+        operation = self.get_operation(vcenter=vcenter, vm_uuid=vm_uuid)
+        operation.wait_for_vm()
+
+        operation.reboot_vm()
+
+        vm = vcenter.vms[vm_uuid]
+        self.assertFalse(vm.is_shutting_down)
+        self.assertEqual(vm.guest.toolsStatus, pyVmomi.vim.VirtualMachineToolsStatus.toolsOk)
+
+
+if __name__ == '__main__':
+    unittest.main()
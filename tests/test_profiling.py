@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.profiling`
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from vyos import profiling
+
+
+class _Namespace(object):
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+
+class _Driver(object):
+    @profiling.profiled_command
+    def restore(self, context, path):
+        return sum(range(1000)), path
+
+
+class TestProfiling(unittest.TestCase):
+
+    def setUp(self):
+        self.profile_dir = tempfile.mkdtemp()
+        self._environ = os.environ.copy()
+        os.environ.pop(profiling.PROFILE_ENV, None)
+        os.environ[profiling.PROFILE_DIR_ENV] = self.profile_dir
+        os.environ[profiling.PROFILE_KEEP_ENV] = "2"
+
+    def tearDown(self):
+        os.environ.clear()
+        os.environ.update(self._environ)
+        shutil.rmtree(self.profile_dir)
+
+    @staticmethod
+    def _build_context(enable_profiling):
+        return _Namespace(resource=_Namespace(attributes={"Vyos.Enable Profiling": enable_profiling}),
+                          reservation=_Namespace(reservation_id="c6ba183e-b70d"))
+
+    def test_disabled_profiling_writes_nothing(self):
+        result = _Driver().restore(self._build_context("False"), "tftp://10.0.0.1/config")
+
+        self.assertEqual(result, (499500, "tftp://10.0.0.1/config"))
+        self.assertEqual(os.listdir(self.profile_dir), [])
+
+    def test_profile_and_summary_are_written(self):
+        _Driver().restore(self._build_context("True"), "tftp://10.0.0.1/config")
+
+        files = sorted(os.listdir(self.profile_dir))
+
+        self.assertEqual(len(files), 2)
+        self.assertTrue(files[0].endswith("-c6ba183e-b70d-restore.prof"))
+        self.assertTrue(files[1].endswith("-c6ba183e-b70d-restore.txt"))
+
+    def test_old_profiles_are_rotated(self):
+        for _ in range(4):
+            _Driver().restore(self._build_context("True"), "tftp://10.0.0.1/config")
+
+        self.assertEqual(len(os.listdir(self.profile_dir)), 4)
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.cli.prompt`
+"""
+
+import re
+import unittest
+
+from vyos.cli.prompt import build_config_prompt
+from vyos.cli.prompt import build_default_prompt
+from vyos.cli.prompt import get_search_start
+from vyos.cli.prompt import remove_prompt
+
+
+class TestPrompt(unittest.TestCase):
+
+    def test_default_prompt_matches_only_at_the_end(self):
+        prompt_re = re.compile(build_default_prompt("vyos"))
+
+        self.assertTrue(prompt_re.search("Welcome to VyOS\r\nvyos@vyos:~$ "))
+        self.assertTrue(prompt_re.search("vyos@router-1:/config/scripts$ "))
+        self.assertFalse(prompt_re.search("vyos@vyos:~$ show interfaces\r\neth0  $1 # comment\r\n"))
+        self.assertFalse(prompt_re.search("description 'costs $5'"))
+
+    def test_default_prompt_is_narrowed_to_user(self):
+        prompt_re = re.compile(build_default_prompt("admin"))
+
+        self.assertTrue(prompt_re.search("\r\nadmin@vyos:~$ "))
+        self.assertFalse(prompt_re.search("\r\nvyos@vyos:~$ "))
+
+    def test_config_prompt(self):
+        prompt_re = re.compile(build_config_prompt("vyos"))
+
+        self.assertTrue(prompt_re.search("configure\r\n[edit]\r\nvyos@vyos# "))
+        self.assertTrue(prompt_re.search("[edit interfaces ethernet eth0]\r\nvyos@vyos# "))
+        self.assertFalse(prompt_re.search("[edit]\r\nvyos@vyos# show\r\n # comment\r\n"))
+        self.assertFalse(prompt_re.search("vyos@vyos:~$ "))
+        self.assertFalse(re.search(build_default_prompt("vyos"), "[edit]\r\nvyos@vyos# "))
+
+    def test_prompt_is_removed_from_output_by_line(self):
+        output = "eth0    10.0.0.1/24   u/u  uplink $1 # primary\nlo      127.0.0.1/8   u/u\n"
+        config_output = "interfaces {\n    ethernet eth0\n}\n"
+        all_prompts = "|".join((build_default_prompt(), build_config_prompt()))
+
+        # the same substitution as cloudshell-cli CliServiceImpl.send_command(remove_prompt=True)
+        for prompt, text, prompt_text in ((build_default_prompt("vyos"), output, "vyos@vyos:~$ "),
+                                          (build_config_prompt("vyos"), config_output, "[edit]\nvyos@vyos# "),
+                                          (all_prompts, output, "vyos@vyos:~$ "),
+                                          (all_prompts, config_output, "[edit]\nvyos@vyos# ")):
+            self.assertTrue(re.search(prompt, text + prompt_text, re.DOTALL))
+            self.assertEqual(re.sub(r"^.*{}.*$".format(prompt), "", text + prompt_text, flags=re.MULTILINE), text)
+
+    def test_prompt_is_found_from_search_start(self):
+        prompt_re = re.compile(build_default_prompt("vyos"))
+        output = "line with $ and #\n" * 100000
+
+        self.assertFalse(prompt_re.search(output, get_search_start(output, len(output))))
+
+        for checked_output in (output, output + "vyos@v", output + "vyos@vyos:~"):
+            buffer = output + "vyos@vyos:~$ "
+            search_start = get_search_start(buffer, len(checked_output))
+
+            self.assertTrue(prompt_re.search(buffer, search_start))
+            self.assertGreater(search_start, len(output) - 2048)
+
+        config_re = re.compile(build_config_prompt("vyos"))
+        config_output = output + "[edit interfaces]\nvyos@vyos# "
+        self.assertTrue(config_re.search(config_output, get_search_start(config_output, len(output) + 20)))
+
+    def test_remove_prompt(self):
+        self.assertEqual(remove_prompt("eth0 $1 #\nvyos@vyos:~$ "), "eth0 $1 #\n")
+        self.assertEqual(remove_prompt("interfaces {\n}\n[edit]\nadmin@r-1# "), "interfaces {\n}\n")
+        self.assertEqual(remove_prompt("vyos@vyos:~$ show\neth0\n"), "vyos@vyos:~$ show\neth0\n")
+
+
+if __name__ == '__main__':
+    import sys
+    sys.exit(unittest.main())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.flows.save.VyOSFanOutSaveFlow`
+"""
+
+import logging
+import os
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+
+try:
+    from vyos.flows.save import VyOSFanOutSaveFlow
+except ImportError:
+    VyOSFanOutSaveFlow = None
+
+
+RUNNING_CONFIG = "interfaces {\n    ethernet eth0 {\n        address dhcp\n    }\n}\n"
+
+
+class _CliService(object):
+    def __init__(self):
+        self.commands = []
+
+    def send_command(self, command, *args, **kwargs):
+        self.commands.append(command)
+        return RUNNING_CONFIG
+
+
+class _CliServiceContext(object):
+    def __init__(self, cli_service):
+        self._cli_service = cli_service
+
+    def __enter__(self):
+        return self._cli_service
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class _CliHandler(object):
+    default_mode = "default"
+
+    def __init__(self):
+        self.cli_service = _CliService()
+
+    def get_cli_service(self, command_mode):
+        return _CliServiceContext(self.cli_service)
+
+
+@unittest.skipIf(VyOSFanOutSaveFlow is None, "cloudshell-networking-devices is required")
+class TestFanOutSave(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cli_handler = _CliHandler()
+        self.logger = logging.getLogger(__name__)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_config_is_read_once_and_uploaded_to_all_destinations(self):
+        destinations = [os.path.join(self.tmp_dir, "vyos-{}".format(index)) for index in range(3)]
+
+        results = VyOSFanOutSaveFlow(cli_handler=self.cli_handler, logger=self.logger).execute_flow(destinations)
+
+        self.assertEqual(len(self.cli_handler.cli_service.commands), 1)
+        self.assertEqual([(result["destination"], result["success"]) for result in results],
+                         [(destination, True) for destination in destinations])
+        for destination in destinations:
+            with open(destination) as config_file:
+                self.assertEqual(config_file.read(), RUNNING_CONFIG)
+
+    def test_partial_failure(self):
+        destinations = [os.path.join(self.tmp_dir, "vyos-running"),
+                        "tftp://10.0.0.1/vyos-running",
+                        os.path.join(self.tmp_dir, "missing", "vyos-running")]
+
+        results = VyOSFanOutSaveFlow(cli_handler=self.cli_handler, logger=self.logger).execute_flow(destinations)
+
+        self.assertEqual([result["success"] for result in results], [True, False, False])
+        self.assertIn("Unsupported protocol", results[1]["error"])
+        self.assertTrue(results[2]["error"])
+
+    def test_slow_upload_is_reported_as_timed_out(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.bind(("127.0.0.1", 0))
+        server.listen(1)
+        self.addCleanup(server.close)
+
+        destinations = ["ftp://127.0.0.1:{}/vyos-running".format(server.getsockname()[1]),
+                        os.path.join(self.tmp_dir, "vyos-running")]
+        start_time = time.time()
+
+        results = VyOSFanOutSaveFlow(cli_handler=self.cli_handler, logger=self.logger, timeout=0.3,
+                                     transfer_timeout=2).execute_flow(destinations)
+
+        self.assertLess(time.time() - start_time, 1.5)
+        self.assertEqual([result["success"] for result in results], [False, True])
+        self.assertIn("didn't finish within", results[0]["error"])
+
+
+if __name__ == '__main__':
+    unittest.main()
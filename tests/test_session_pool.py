@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.cli.session_pool` against the fake VyOS SSH server of the benchmarks
+"""
+
+import logging
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+try:
+    from fake_vyos_server import FakeVyOSServer
+    from vyos.cli.handler import VyOSCliHandler
+    from vyos.cli.session_pool import get_pooled_cli
+    from vyos.cli.session_pool import get_resource_key
+    from vyos.cli.session_pool import get_session_pool
+    from vyos.configuration_attributes_structure import VyOSResource
+except ImportError:
+    FakeVyOSServer = None
+
+
+SHELL_NAME = "Vyos"
+
+
+class _DecryptedPassword(object):
+    def __init__(self, value):
+        self.Value = value
+
+
+class _CloudShellAPI(object):
+    def DecryptPassword(self, encrypted_string):
+        return _DecryptedPassword(encrypted_string)
+
+
+@unittest.skipIf(FakeVyOSServer is None, "cloudshell-cli and paramiko are required")
+class TestSessionPool(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.stop()
+
+    def get_cli_handler(self, max_pool_size=1):
+        server = FakeVyOSServer()
+        server.start()
+        self.servers.append(server)
+
+        resource_config = VyOSResource(address=server.address,
+                                       shell_name=SHELL_NAME,
+                                       fullname="vyos-{}".format(server.port),
+                                       attributes={"{}.User".format(SHELL_NAME): server.user,
+                                                   "{}.Password".format(SHELL_NAME): server.password,
+                                                   "{}.CLI TCP Port".format(SHELL_NAME): server.port})
+
+        resource_key = get_resource_key(address=server.address, port=server.port, user=server.user)
+        cli = get_pooled_cli(resource_key=resource_key, max_pool_size=max_pool_size)
+        cli_handler = VyOSCliHandler(cli=cli, resource_config=resource_config, logger=self.logger,
+                                     api=_CloudShellAPI())
+
+        return server, resource_key, cli_handler
+
+    def test_session_is_reused_through_cli_context_manager(self):
+        server, resource_key, cli_handler = self.get_cli_handler()
+
+        for _ in range(3):
+            with cli_handler.get_cli_service(cli_handler.default_mode) as cli_service:
+                output = cli_service.send_command("show interfaces")
+                self.assertIn("eth0", output)
+                self.assertNotIn("vyos@vyos", output)
+
+        self.assertEqual(server.connections_count, 1)
+        self.assertEqual(get_session_pool(resource_key).stats.hits, 2)
+
+    def test_pools_of_resources_do_not_share_sessions_limit(self):
+        first_handler = self.get_cli_handler()[2]
+        _, resource_key, second_handler = self.get_cli_handler()
+        get_session_pool(resource_key)._pool_timeout = 2
+
+        with first_handler.get_cli_service(first_handler.default_mode):
+            with second_handler.get_cli_service(second_handler.default_mode) as cli_service:
+                cli_service.send_command("show interfaces")
+
+    def test_replaced_pool_disconnects_idle_sessions(self):
+        server, resource_key, cli_handler = self.get_cli_handler()
+
+        with cli_handler.get_cli_service(cli_handler.default_mode):
+            pass
+
+        old_pool = get_session_pool(resource_key)
+        session = old_pool._pool.queue[0]
+
+        get_session_pool(resource_key, max_pool_size=2)
+
+        self.assertTrue(old_pool._pool.empty())
+        self.assertEqual(old_pool._session_manager.existing_sessions_count(), 0)
+        self.assertIsNone(session._handler.get_transport())
+
+    def test_resource_key_depends_on_connection_details(self):
+        key = get_resource_key(address="192.168.1.10", port=22, user="vyos")
+
+        self.assertNotEqual(key, get_resource_key(address="192.168.1.11", port=22, user="vyos"))
+        self.assertNotEqual(key, get_resource_key(address="192.168.1.10", port=2222, user="vyos"))
+        self.assertNotEqual(key, get_resource_key(address="192.168.1.10", port=22, user="admin"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.cli.sessions`
+"""
+
+from collections import OrderedDict
+import logging
+import unittest
+
+try:
+    from cloudshell.cli.session.session_exceptions import CommandExecutionException
+    from cloudshell.cli.session.session_exceptions import SessionReadTimeout
+    from vyos.cli.prompt import build_config_prompt
+    from vyos.cli.prompt import build_default_prompt
+    from vyos.cli.sessions import VyOSSSHSession
+except ImportError:
+    VyOSSSHSession = None
+
+
+if VyOSSSHSession is not None:
+    class _Session(VyOSSSHSession):
+        def __init__(self, reads):
+            """
+
+            :param list[str] reads: chunks of the output, None ends the read
+            """
+            super(_Session, self).__init__("192.168.1.10", "vyos", "vyos")
+            self._reads = list(reads)
+            self.sent = []
+
+        def _send(self, command, logger):
+            self.sent.append(command)
+
+        def _receive(self, timeout, logger):
+            data = self._reads.pop(0) if self._reads else None
+            if data is None:
+                raise SessionReadTimeout()
+            return data
+
+
+@unittest.skipIf(VyOSSSHSession is None, "cloudshell-cli is required")
+class TestVyOSSSHSession(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.disabled = True
+        self.addCleanup(setattr, self.logger, "disabled", False)
+
+    def test_prompt_split_between_reads_is_found(self):
+        output_line = "eth0    10.0.0.1/24   u/u  uplink $1 # primary\n"
+        reads = [None, "show interfaces\n"]
+        reads.extend(part for _ in range(200) for part in (output_line * 10, None))
+        reads.extend(["vyos@vy", None, "os:~$ ", None])
+
+        output = _Session(reads).hardware_expect("show interfaces", build_default_prompt("vyos"), self.logger)
+
+        self.assertEqual(output, output_line * 2000 + "vyos@vyos:~$ ")
+
+    def test_config_prompt_split_between_reads_is_found(self):
+        reads = [None, "configure\n[edit]", None, "\nvyos@vyos# ", None]
+
+        output = _Session(reads).hardware_expect("configure", build_config_prompt("vyos"), self.logger)
+
+        self.assertEqual(output, "[edit]\nvyos@vyos# ")
+
+    def test_actions_and_errors(self):
+        session = _Session([None, "save scp://10.0.0.1/vyos.boot\nPass", None, "word: ", None,
+                            "Error saving configuration\nvyos@vyos:~$ ", None])
+        action_map = OrderedDict([("[Pp]assword:", lambda session, logger: session.send_line("secret", logger))])
+        error_map = OrderedDict([("[Ee]rror saving", "Failed to save configuration file")])
+
+        with self.assertRaises(CommandExecutionException) as error:
+            session.hardware_expect("save scp://10.0.0.1/vyos.boot", build_default_prompt("vyos"), self.logger,
+                                    action_map=action_map, error_map=error_map)
+
+        self.assertIn("Failed to save configuration file", str(error.exception))
+        self.assertEqual(session.sent, ["save scp://10.0.0.1/vyos.boot\r", "secret\r"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.flows.stream_command`
+"""
+
+import logging
+import unittest
+
+try:
+    from vyos.flows.stream_command import VyOSStreamCommandFlow
+except ImportError:
+    VyOSStreamCommandFlow = None
+
+
+LOG_OUTPUT = "Oct 19 10:00:01 vyos sshd[1201]: error: kex_exchange_identification: Connection closed\n" \
+             "Oct 19 10:00:02 vyos systemd[1]: Started Session 5 of user vyos.\n"
+
+
+class _CliService(object):
+    def __init__(self, output, exit_status=0):
+        self.commands = []
+        self._output = output
+        self._exit_status = exit_status
+
+    def send_command(self, command, *args, **kwargs):
+        self.commands.append(command)
+
+        if "__VYOS_OUTPUT_LINES__" in command:
+            return "__VYOS_OUTPUT_LINES__{}:{}\nvyos@vyos:~$ ".format(self._exit_status,
+                                                                      len(self._output.splitlines()))
+        if command.startswith("sed"):
+            return self._output + "vyos@vyos:~$ "
+        return "vyos@vyos:~$ "
+
+
+class _CliServiceContext(object):
+    def __init__(self, cli_service):
+        self._cli_service = cli_service
+
+    def __enter__(self):
+        return self._cli_service
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+class _CliHandler(object):
+    default_mode = "default"
+
+    def __init__(self, cli_service):
+        self.cli_service = cli_service
+
+    def get_cli_service(self, command_mode):
+        return _CliServiceContext(self.cli_service)
+
+
+@unittest.skipIf(VyOSStreamCommandFlow is None, "cloudshell-cli is required")
+class TestStreamCommand(unittest.TestCase):
+
+    def setUp(self):
+        self.logger = logging.getLogger(__name__)
+        self.logger.disabled = True
+        self.addCleanup(setattr, self.logger, "disabled", False)
+
+    def test_errors_in_output_content_are_not_failures(self):
+        cli_handler = _CliHandler(_CliService(LOG_OUTPUT))
+
+        summaries = VyOSStreamCommandFlow(cli_handler=cli_handler, logger=self.logger).execute_flow(
+            commands=["show log"], spool=False)
+
+        self.assertEqual(summaries, [LOG_OUTPUT])
+        self.assertTrue(cli_handler.cli_service.commands[-1].startswith("rm -f "))
+
+    def test_non_zero_exit_status_is_failure(self):
+        cli_handler = _CliHandler(_CliService("Invalid command: show [foo]\n", exit_status=1))
+
+        with self.assertRaises(Exception) as error:
+            VyOSStreamCommandFlow(cli_handler=cli_handler, logger=self.logger).execute_flow(
+                commands=["show foo"], spool=False)
+
+        self.assertIn("exited with status 1", str(error.exception))
+        self.assertIn("Invalid command", str(error.exception))
+
+    def test_error_map_is_checked_when_given(self):
+        cli_handler = _CliHandler(_CliService(LOG_OUTPUT))
+
+        with self.assertRaises(Exception) as error:
+            VyOSStreamCommandFlow(cli_handler=cli_handler, logger=self.logger).execute_flow(
+                commands=["show log"], error_map={"kex_exchange": "SSH key exchange failed"}, spool=False)
+
+        self.assertIn("SSH key exchange failed", str(error.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.streaming`
+"""
+
+from collections import OrderedDict
+import os
+import shutil
+import tempfile
+import unittest
+
+from vyos import streaming
+
+
+class TestStreaming(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_detector_finds_match_across_chunks(self):
+        detector = streaming.IncrementalDetector(OrderedDict((("[Cc]ommit failed", "Failed to commit changes"),
+                                                              ("error:", "Error happens"))))
+        for chunk in ("line 1\nline 2\nCom", "mit fai", "led\nline 3\n"):
+            detector.feed(chunk)
+
+        self.assertTrue(detector.matched)
+        self.assertEqual(detector.first_message, "Failed to commit changes")
+        self.assertEqual(len(detector.matches), 1)
+
+    def test_small_output_is_returned_as_is(self):
+        with streaming.OutputSpool(summary_size=100, spool_dir=self.tmp_dir) as spool:
+            spool.write("interfaces {\n")
+            spool.write("}\n")
+
+        self.assertEqual(spool.summary(), "interfaces {\n}\n")
+        with open(spool.path) as spool_file:
+            self.assertEqual(spool_file.read(), "interfaces {\n}\n")
+
+    def test_large_output_is_truncated_with_reference(self):
+        chunks = ["{:06d}\n".format(index) for index in range(10000)]
+
+        with streaming.OutputSpool(summary_size=70, spool_dir=self.tmp_dir) as spool:
+            for chunk in chunks:
+                spool.write(chunk)
+
+        summary = spool.summary()
+        self.assertTrue(summary.startswith("000000\n"))
+        self.assertTrue(summary.endswith("009999\n"))
+        self.assertIn(spool.path, summary)
+        self.assertEqual(spool.size, 70000)
+        self.assertEqual(os.path.getsize(spool.path), 70000)
+
+    def test_old_spools_are_rotated(self):
+        os.environ[streaming.SPOOL_KEEP_ENV] = "2"
+        try:
+            for _ in range(4):
+                with streaming.OutputSpool(spool_dir=self.tmp_dir) as spool:
+                    spool.write("output\n")
+        finally:
+            del os.environ[streaming.SPOOL_KEEP_ENV]
+
+        self.assertEqual(len(os.listdir(self.tmp_dir)), 2)
+        self.assertTrue(os.path.exists(spool.path))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.timeouts`
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from vyos import timeouts
+
+
+class TestTimeouts(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.timeouts_file = os.path.join(self.tmp_dir, "timeouts.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_sketch_quantiles_within_accuracy(self):
+        sketch = timeouts.DurationSketch()
+        for value in range(1, 1001):
+            sketch.add(value / 10.0)
+
+        for quantile, expected in ((0.5, 50.0), (0.9, 90.0), (0.99, 99.0)):
+            self.assertAlmostEqual(sketch.quantile(quantile), expected, delta=expected * 0.03)
+
+    def test_default_timeout_without_history(self):
+        advisor = timeouts.TimeoutAdvisor(path=self.timeouts_file)
+        for _ in range(timeouts.MIN_SAMPLES - 1):
+            advisor.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 2.0)
+
+        self.assertEqual(advisor.get_timeout("vyos-1", timeouts.LOAD_OPERATION, "scp", default=300), 300)
+        self.assertIsNone(advisor.get_timeout("vyos-1", timeouts.COMMIT_OPERATION, "local", default=None))
+
+    def test_learned_timeout_is_bounded_and_persisted(self):
+        advisor = timeouts.TimeoutAdvisor(path=self.timeouts_file, safety_factor=3.0, min_timeout=30)
+        for _ in range(10):
+            advisor.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 20.0)
+            advisor.record("vyos-1", timeouts.SAVE_OPERATION, "tftp", 1.0)
+            advisor.record("vyos-1", timeouts.COMMIT_OPERATION, "local", 200.0)
+
+        restored = timeouts.TimeoutAdvisor(path=self.timeouts_file, safety_factor=3.0, min_timeout=30)
+
+        self.assertAlmostEqual(restored.get_timeout("vyos-1", timeouts.LOAD_OPERATION, "scp", default=300), 60,
+                               delta=2)
+        self.assertEqual(restored.get_timeout("vyos-1", timeouts.SAVE_OPERATION, "tftp", default=180), 30)
+        self.assertEqual(restored.get_timeout("vyos-1", timeouts.LOAD_OPERATION, "http", default=300), 300)
+        self.assertEqual(restored.get_timeout("vyos-2", timeouts.LOAD_OPERATION, "scp", default=300), 300)
+        self.assertAlmostEqual(restored.get_timeout("vyos-1", timeouts.COMMIT_OPERATION, "local", default=None), 600,
+                               delta=20)
+
+    def test_advisors_sharing_file_merge_their_durations(self):
+        first = timeouts.TimeoutAdvisor(path=self.timeouts_file)
+        second = timeouts.TimeoutAdvisor(path=self.timeouts_file)
+
+        for _ in range(3):
+            first.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 20.0)
+            second.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 20.0)
+        second.record("vyos-2", timeouts.SAVE_OPERATION, "tftp", 1.0)
+
+        restored = timeouts.TimeoutAdvisor(path=self.timeouts_file)
+
+        self.assertEqual(restored._sketches["vyos-1|load|scp"].count, 6)
+        self.assertEqual(restored._sketches["vyos-2|save|tftp"].count, 1)
+        self.assertEqual(second._sketches["vyos-1|load|scp"].count, 6)
+
+    def test_durations_are_saved_after_failed_save(self):
+        advisor = timeouts.TimeoutAdvisor(path=os.path.join(self.tmp_dir, "missing", "timeouts.json"))
+        advisor.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 20.0)
+
+        os.mkdir(os.path.join(self.tmp_dir, "missing"))
+        advisor.record("vyos-1", timeouts.LOAD_OPERATION, "scp", 20.0)
+
+        restored = timeouts.TimeoutAdvisor(path=os.path.join(self.tmp_dir, "missing", "timeouts.json"))
+        self.assertEqual(restored._sketches["vyos-1|load|scp"].count, 2)
+
+    def test_adaptive_timeout_records_only_successes_and_timeouts(self):
+        advisor = timeouts.TimeoutAdvisor()
+
+        with timeouts.adaptive_timeout("vyos-1", timeouts.SAVE_OPERATION, "scp://user@host/file", default=180,
+                                       advisor=advisor) as timeout:
+            self.assertEqual(timeout, 180)
+
+        with self.assertRaises(Exception):
+            with timeouts.adaptive_timeout("vyos-1", timeouts.SAVE_OPERATION, "scp://user@host/file", default=180,
+                                           advisor=advisor):
+                raise Exception("Copy command failed")
+
+        sketch = advisor._sketches["vyos-1|save|scp"]
+        self.assertEqual(sketch.count, 1)
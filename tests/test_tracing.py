@@ -0,0 +1,59 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tests for `vyos.tracing`
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from vyos import tracing
+
+
+class TestTracing(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.trace_file = os.path.join(self.tmp_dir, "trace.jsonl")
+        tracing.configure(self.trace_file)
+
+    def tearDown(self):
+        tracing.configure(None)
+        shutil.rmtree(self.tmp_dir)
+
+    def _read_records(self):
+        with open(self.trace_file) as trace_file:
+            return [json.loads(line) for line in trace_file]
+
+    def test_nested_spans_share_trace(self):
+        with tracing.span("command.save", resource="vyos-1"):
+            with tracing.span("cli.command") as phase:
+                phase.set(attempts=2)
+
+        child, parent = self._read_records()
+
+        self.assertEqual(child["trace_id"], parent["trace_id"])
+        self.assertEqual(child["parent_id"], parent["span_id"])
+        self.assertIsNone(parent["parent_id"])
+        self.assertEqual(child["attributes"], {"attempts": 2})
+        self.assertEqual(parent["attributes"], {"resource": "vyos-1"})
+
+    def test_failed_span_is_recorded_with_error(self):
+        with self.assertRaises(ValueError):
+            with tracing.span("vcenter.connect"):
+                raise ValueError("boom")
+
+        record, = self._read_records()
+
+        self.assertEqual(record["status"], tracing.STATUS_ERROR)
+        self.assertEqual(record["error"], "ValueError: boom")
+
+    def test_disabled_tracing_returns_noop_span(self):
+        tracing.configure(None)
+
+        self.assertIs(tracing.span("cli.command"), tracing.NOOP_SPAN)
+        self.assertFalse(os.path.exists(self.trace_file))
@@ -5,21 +5,79 @@
 Tests for `VyosDriver`
 """
 
+import logging
 import unittest
 
+from cloudshell.cli.session_manager_impl import SessionManagerException
+import mock
+
 from driver import VyosDriver
 
 
+class _Resource(object):
+    address = "192.168.1.10"
+    family = "Virtual Router"
+    fullname = "vyos-1"
+    name = "vyos-1"
+    attributes = {"Vyos.User": "vyos", "Vyos.Password": "vyos"}
+
+
+class _Context(object):
+    resource = _Resource()
+
+
 class TestVyosDriver(unittest.TestCase):
 
     def setUp(self):
-        pass
+        self.driver = VyosDriver()
+        self.logger = logging.getLogger(__name__)
+
+        for target, value in (("driver.get_logger_with_thread_id", self.logger),
+                              ("driver.get_api", mock.MagicMock()),
+                              ("driver.VyosDriver._get_cli_handler", mock.MagicMock())):
+            patcher = mock.patch(target, return_value=value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @mock.patch("driver.time.sleep")
+    @mock.patch("vyos.flows.stream_command.VyOSStreamCommandFlow")
+    def test_run_custom_command_streamed_retries_session_errors(self, flow_class, sleep):
+        flow_class.return_value.execute_flow.side_effect = [SessionManagerException("VyOS", "Connection refused"),
+                                                           ["interfaces output", "version output"]]
+
+        output = self.driver.run_custom_command_streamed(_Context(), "show interfaces;show version")
+
+        self.assertEqual(output, "interfaces output\nversion output")
+        flow_class.return_value.execute_flow.assert_called_with(commands=["show interfaces", "show version"])
+        self.assertEqual(flow_class.call_args[1]["logger"], self.logger)
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch("driver.time.sleep")
+    @mock.patch("cloudshell.devices.runners.run_command_runner.RunCommandRunner")
+    def test_run_custom_command_retries_session_errors(self, runner_class, sleep):
+        runner_class.return_value.run_custom_command.side_effect = [SessionManagerException("VyOS", "Timeout"),
+                                                                    "interfaces output"]
+
+        output = self.driver.run_custom_command(_Context(), "show interfaces")
+
+        self.assertEqual(output, "interfaces output")
+        runner_class.return_value.run_custom_command.assert_called_with(custom_command=["show interfaces"])
+        self.assertEqual(runner_class.call_args[1]["logger"], self.logger)
+        self.assertEqual(sleep.call_count, 1)
+
+    @mock.patch("driver.time.sleep")
+    @mock.patch("cloudshell.devices.runners.run_command_runner.RunCommandRunner")
+    def test_run_custom_config_command_retries_session_errors(self, runner_class, sleep):
+        runner_class.return_value.run_custom_config_command.side_effect = [
+            SessionManagerException("VyOS", "Timeout"), "commit output"]
 
-    def tearDown(self):
-        pass
+        output = self.driver.run_custom_config_command(_Context(), "set system host-name r1;commit")
 
-    def test_000_something(self):
-        pass
+        self.assertEqual(output, "commit output")
+        runner_class.return_value.run_custom_config_command.assert_called_with(
+            custom_command=["set system host-name r1", "commit"])
+        self.assertEqual(sleep.call_count, 1)
+        self.assertFalse(runner_class.return_value.run_custom_command.called)
 
 
 if __name__ == '__main__':